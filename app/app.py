@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
@@ -5,18 +7,34 @@ from app.config import env
 from app.routes.auth import auth_router
 from app.routes.comment import comment_router
 from app.routes.media import media_router
+from app.routes.metrics import metrics_router
 from app.routes.post import post_router
 from app.routes.posttag import posttag_router
 from app.routes.user import user_router
+from app.services.last_login import (
+    start_last_login_flusher,
+    stop_last_login_flusher,
+)
+from app.storage.variants import shutdown_variant_pool
 
 API_VERSION = env.get_env("API_VERSION", "/v1")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    flusher = start_last_login_flusher()
+    yield
+    await stop_last_login_flusher(flusher)
+    shutdown_variant_pool()
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(auth_router, prefix=API_VERSION)
 app.include_router(post_router, prefix=API_VERSION)
 app.include_router(comment_router, prefix=API_VERSION)
 app.include_router(media_router, prefix=API_VERSION)
 app.include_router(posttag_router, prefix=API_VERSION)
+app.include_router(metrics_router, prefix=API_VERSION)
 app.include_router(user_router, prefix=API_VERSION)
 
 
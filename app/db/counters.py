@@ -0,0 +1,114 @@
+import asyncio
+from uuid import UUID
+
+from sqlmodel import func, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Comment, Post, UserCommentLikeLink, UserPostLikeLink
+from app.db.setup import engine
+from app.log.console import log_info, log_success
+
+
+async def repair_counters(db_session: AsyncSession):
+    """
+    Recomputes the denormalised like and comment counters of every post
+    and comment from the link and comment tables.
+
+    Args:
+        db_session (AsyncSession): The database session.
+    """
+    post_likes = (
+        select(func.count())
+        .select_from(UserPostLikeLink)
+        .where(UserPostLikeLink.post_id == Post.post_id)
+        .scalar_subquery()
+    )
+    post_comments = (
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.post_id == Post.post_id)
+        .scalar_subquery()
+    )
+    comment_likes = (
+        select(func.count())
+        .select_from(UserCommentLikeLink)
+        .where(UserCommentLikeLink.comment_id == Comment.comment_id)
+        .scalar_subquery()
+    )
+    await db_session.exec(
+        update(Post)
+        .values(like_count=post_likes, comment_count=post_comments)
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.exec(
+        update(Comment)
+        .values(like_count=comment_likes)
+        .execution_options(synchronize_session=False)
+    )
+    await db_session.commit()
+
+
+async def discount_user(db_session: AsyncSession, username: str) -> set[UUID]:
+    """
+    Takes a user's likes and comments off the counters of the posts and
+    comments of other users, before the user is deleted along with them.
+    The caller commits.
+
+    Args:
+        db_session (AsyncSession): The database session.
+        username (str): The user about to be deleted.
+
+    Returns:
+        set[UUID]: The posts whose counters changed, directly or through
+        one of their comments.
+    """
+    liked_posts = select(UserPostLikeLink.post_id).where(
+        UserPostLikeLink.username == username
+    )
+    liked_comments = select(UserCommentLikeLink.comment_id).where(
+        UserCommentLikeLink.username == username
+    )
+    commented_posts = select(Comment.post_id).where(
+        Comment.author_username == username
+    )
+    own_comments = (
+        select(func.count())
+        .select_from(Comment)
+        .where(Comment.post_id == Post.post_id)
+        .where(Comment.author_username == username)
+        .scalar_subquery()
+    )
+    post_ids = set()
+    for statement in (
+        update(Post)
+        .where(Post.post_id.in_(liked_posts))
+        .where(Post.author_username != username)
+        .values(like_count=Post.like_count - 1)
+        .returning(Post.post_id),
+        update(Post)
+        .where(Post.post_id.in_(commented_posts))
+        .where(Post.author_username != username)
+        .values(comment_count=Post.comment_count - own_comments)
+        .returning(Post.post_id),
+        update(Comment)
+        .where(Comment.comment_id.in_(liked_comments))
+        .where(Comment.author_username != username)
+        .values(like_count=Comment.like_count - 1)
+        .returning(Comment.post_id),
+    ):
+        result = await db_session.exec(
+            statement.execution_options(synchronize_session=False)
+        )
+        post_ids.update(result.scalars())
+    return post_ids
+
+
+async def main():
+    log_info("Repairing like and comment counters...")
+    async with AsyncSession(engine) as db_session:
+        await repair_counters(db_session)
+    log_success("Counters repaired.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,31 +3,42 @@ from typing import Optional, get_args
 from uuid import UUID, uuid4
 
 from pydantic import field_validator
-from sqlmodel import Field, Relationship, Session, SQLModel
+from sqlalchemy import JSON, Index
+from sqlmodel import Field, Relationship, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.dto.comment_dto import CommentDTO
 from app.dto.media_dto import ContentTypeLiteral, MediaDTO
-from app.dto.post_dto import PostDTO
+from app.dto.post_dto import PostDTO, PostSummaryDTO
 from app.dto.posttag_dto import PostTagDTO
 from app.dto.user_dto import UserDTO
 from app.utils.crypto import gen_id
 
 
 class PostTagLink(SQLModel, table=True):
+    # The primary key leads with post_id; tag filters look up by tag first
+    __table_args__ = (
+        Index("ix_posttaglink_tag_id_post_id", "tag_id", "post_id"),
+    )
+
     post_id: UUID = Field(foreign_key="post.post_id", primary_key=True)
     tag_id: UUID = Field(foreign_key="posttag.tag_id", primary_key=True)
 
 
 class UserPostLikeLink(SQLModel, table=True):
     post_id: UUID = Field(foreign_key="post.post_id", primary_key=True)
-    username: str = Field(foreign_key="user.username", primary_key=True)
+    username: str = Field(
+        foreign_key="user.username", primary_key=True, index=True
+    )
 
 
 class UserCommentLikeLink(SQLModel, table=True):
     comment_id: UUID = Field(
         foreign_key="comment.comment_id", primary_key=True
     )
-    username: str = Field(foreign_key="user.username", primary_key=True)
+    username: str = Field(
+        foreign_key="user.username", primary_key=True, index=True
+    )
 
 
 class User(SQLModel, table=True):
@@ -35,7 +46,7 @@ class User(SQLModel, table=True):
     role_id: str = Field(foreign_key="role.role_id", unique=True)
     avatar_url: Optional[str]
     display_name: str
-    email: str
+    email: str = Field(unique=True, index=True)
     hashed_password: str
     last_login: datetime
     bio: Optional[str]
@@ -68,8 +79,8 @@ class User(SQLModel, table=True):
         back_populates="uploader", cascade_delete=True
     )
 
-    def update_from_dto(
-        self, dto: UserDTO, db_session: Session, commit: bool = True
+    async def update_from_dto(
+        self, dto: UserDTO, db_session: AsyncSession, commit: bool = True
     ):
         self.display_name = dto.display_name
         self.avatar_url = dto.avatar_url
@@ -81,7 +92,7 @@ class User(SQLModel, table=True):
 
         if commit:
             db_session.add(self)
-            db_session.commit()
+            await db_session.commit()
 
     def to_dto(self) -> UserDTO:
         return UserDTO(
@@ -105,18 +116,44 @@ class Role(SQLModel, table=True):
 
 
 class Permission(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_permission_role_resource_action",
+            "role_id",
+            "resource_type",
+            "resource_id",
+            "action",
+            unique=True,
+        ),
+        Index("ix_permission_resource", "resource_type", "resource_id"),
+    )
+
     permission_id: str = Field(default_factory=gen_id, primary_key=True)
-    name: str = Field(primary_key=True)
     role_id: str = Field(foreign_key="role.role_id")
+    resource_type: str
+    # Empty for global permissions that cover every resource of the type
+    resource_id: str = ""
+    action: str
     role: Role = Relationship(back_populates="permissions")
 
 
+class Blob(SQLModel, table=True):
+    """A stored file, shared by every Media row with the same content"""
+
+    sha256: str = Field(primary_key=True)
+    size: int
+    ref_count: int = 0
+
+
 class Media(SQLModel, table=True):
     media_id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str
     protected: bool = False
     media_type: str
     description: str
+    size: int = 0
+    # None for files stored before the blob store, under their media_id
+    sha256: Optional[str] = Field(default=None, foreign_key="blob.sha256")
     uploader_username: str = Field(foreign_key="user.username")
     uploader: User = Relationship(back_populates="medias")
 
@@ -154,7 +191,32 @@ class PostMedia(SQLModel, table=True):
         )
 
 
+class PostBody(SQLModel, table=True):
+    # Kept out of post so that listings, counter updates and joins only
+    # touch narrow rows; loaded with a primary-key lookup when needed.
+    post_id: UUID = Field(foreign_key="post.post_id", primary_key=True)
+    content: str
+    # Derived from content by app.services.render when the post is written
+    content_html: str = ""
+    excerpt: str = ""
+    reading_time: int = 0
+    toc: list = Field(default_factory=list, sa_type=JSON)
+    # The post's last_modified and the renderer the HTML was rendered with
+    rendered_from: Optional[datetime] = None
+    render_version: int = 0
+    post: "Post" = Relationship(back_populates="body")
+
+
 class Post(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_post_published_created_at", "published", "created_at"),
+        Index(
+            "ix_post_author_username_created_at",
+            "author_username",
+            "created_at",
+        ),
+    )
+
     post_id: UUID = Field(default_factory=uuid4, primary_key=True)
     author_username: str = Field(foreign_key="user.username")
     created_at: datetime
@@ -162,9 +224,14 @@ class Post(SQLModel, table=True):
     modified: bool = False
     title: str
     description: str
-    content: str
     published: bool = False
-    medias: list[PostMedia] = Relationship(back_populates="post")
+    # Denormalised so listings never load likers or comments to count them
+    like_count: int = 0
+    comment_count: int = 0
+    body: PostBody = Relationship(back_populates="post", cascade_delete=True)
+    medias: list[PostMedia] = Relationship(
+        back_populates="post", cascade_delete=True
+    )
     author: User = Relationship(back_populates="posts")
     liked_by: list[User] = Relationship(
         back_populates="liked_posts", link_model=UserPostLikeLink
@@ -176,14 +243,8 @@ class Post(SQLModel, table=True):
         back_populates="posts", link_model=PostTagLink
     )
 
-    def get_likes_count(self):
-        return len(self.liked_by)
-
-    def get_comments_count(self):
-        return len(self.comments)
-
-    def to_dto(self) -> PostDTO:
-        return PostDTO(
+    def to_summary_dto(self) -> PostSummaryDTO:
+        return PostSummaryDTO(
             post_id=self.post_id,
             author_username=self.author_username,
             created_at=self.created_at,
@@ -191,18 +252,27 @@ class Post(SQLModel, table=True):
             modified=self.modified,
             title=self.title,
             description=self.description,
-            content=self.content,
             published=self.published,
-            like_count=self.get_likes_count(),
-            comments_count=self.get_comments_count(),
+            like_count=self.like_count,
+            comments_count=self.comment_count,
             tags=[tag.to_dto() for tag in self.tags],
             medias=[media.to_dto() for media in self.medias],
         )
 
+    def to_dto(self) -> PostDTO:
+        return PostDTO(
+            **dict(self.to_summary_dto()),
+            content=self.body.content,
+            content_html=self.body.content_html,
+            excerpt=self.body.excerpt,
+            reading_time=self.body.reading_time,
+            toc=self.body.toc,
+        )
+
 
 class PostTag(SQLModel, table=True):
     tag_id: UUID = Field(default_factory=uuid4, primary_key=True)
-    name: str
+    name: str = Field(unique=True, index=True)
     posts: list[Post] = Relationship(
         back_populates="tags", link_model=PostTagLink
     )
@@ -216,21 +286,19 @@ class PostTag(SQLModel, table=True):
 
 class Comment(SQLModel, table=True):
     comment_id: UUID = Field(default_factory=uuid4, primary_key=True)
-    post_id: UUID = Field(foreign_key="post.post_id")
+    post_id: UUID = Field(foreign_key="post.post_id", index=True)
     author_username: str = Field(foreign_key="user.username")
     created_at: datetime
     last_modified: datetime
     modified: bool = False
     content: str
+    like_count: int = 0
     post: Post = Relationship(back_populates="comments")
     author: User = Relationship(back_populates="comments")
     liked_by: list[User] = Relationship(
         back_populates="liked_comments", link_model=UserCommentLikeLink
     )
 
-    def get_likes_count(self):
-        return len(self.liked_by)
-
     def to_dto(self) -> CommentDTO:
         return CommentDTO(
             comment_id=self.comment_id,
@@ -240,7 +308,7 @@ class Comment(SQLModel, table=True):
             last_modified=self.last_modified,
             modified=self.modified,
             content=self.content,
-            likes_count=self.get_likes_count(),
+            likes_count=self.like_count,
         )
 
 
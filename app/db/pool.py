@@ -0,0 +1,99 @@
+import time
+from typing import Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.log.console import log_warning
+
+
+class PoolStats:
+    """
+    Running checkout statistics for the database connection pool. A
+    checkout's time covers waiting for a free connection and, when the
+    pool has to, opening or pre-pinging it.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_checkout_time = 0.0
+        self.max_checkout_time = 0.0
+        self.last_checkout_time = 0.0
+
+    def record_checkout(self, checkout_time: float):
+        self.checkouts += 1
+        self.total_checkout_time += checkout_time
+        self.last_checkout_time = checkout_time
+        self.max_checkout_time = max(self.max_checkout_time, checkout_time)
+
+
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that times every checkout and warns when one takes longer
+    than `slow_checkout` seconds, which create_async_engine passes on
+    like the other pool arguments.
+    """
+
+    def __init__(
+        self,
+        creator,
+        slow_checkout: float = 0.1,
+        stats: Optional[PoolStats] = None,
+        **kwargs,
+    ):
+        super().__init__(creator, **kwargs)
+        self.slow_checkout = slow_checkout
+        self.stats = stats or PoolStats()
+
+    def recreate(self) -> "MonitoredPool":
+        # Disposing of the engine replaces its pool; keep the settings
+        # and the statistics gathered so far.
+        pool = super().recreate()
+        pool.slow_checkout = self.slow_checkout
+        pool.stats = self.stats
+        return pool
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            log_warning(
+                f"Database pool checkout timed out after "
+                f"{time.perf_counter() - started:.3f}s "
+                f"(checked out: {self.checkedout()}, "
+                f"overflow: {self.overflow()})"
+            )
+            raise
+        checkout_time = time.perf_counter() - started
+        self.stats.record_checkout(checkout_time)
+        if checkout_time > self.slow_checkout:
+            self.stats.slow_checkouts += 1
+            log_warning(
+                f"Slow database pool checkout: {checkout_time:.3f}s "
+                f"(checked out: {self.checkedout()}, "
+                f"overflow: {self.overflow()})"
+            )
+        return connection
+
+    def status_dict(self) -> dict:
+        stats = self.stats
+        return {
+            "pool_size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "slow_checkouts": stats.slow_checkouts,
+            "average_checkout_time": (
+                stats.total_checkout_time / stats.checkouts
+                if stats.checkouts
+                else 0.0
+            ),
+            "max_checkout_time": stats.max_checkout_time,
+            "last_checkout_time": stats.last_checkout_time,
+        }
@@ -0,0 +1,250 @@
+import asyncio
+import re
+from typing import List
+from uuid import UUID
+
+from sqlalchemy import event, text
+from sqlmodel import SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Post, PostBody
+from app.db.setup import engine
+from app.log.console import log_info, log_success
+
+REBUILD_BATCH_SIZE = 1000
+
+# SQLite keeps its own FTS5 copy of the searchable columns of published
+# posts, written by index_post() and unindex_post(), so a search never has to
+# join back to post. FTS rows can only be looked up by rowid, so
+# post_search_key assigns each indexed post one and finds it by post id.
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5("
+    "post_id UNINDEXED, title, description, content, "
+    "tokenize = 'porter unicode61')",
+    "CREATE TABLE IF NOT EXISTS post_search_key ("
+    "search_rowid INTEGER PRIMARY KEY, post_id CHAR(32) NOT NULL UNIQUE)",
+]
+
+# Postgres keeps a GIN-indexed tsvector next to the body, written by
+# index_post(). It cannot be a generated column, since it also covers the
+# title and description, which live in post.
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE postbody ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_postbody_search_vector "
+    "ON postbody USING gin (search_vector)",
+]
+
+POSTGRES_VECTOR = (
+    "setweight(to_tsvector('english', {title}), 'A') || "
+    "setweight(to_tsvector('english', {description}), 'B') || "
+    "setweight(to_tsvector('english', {content}), 'C')"
+)
+
+POSTGRES_INDEX = text(
+    "UPDATE postbody SET search_vector = "
+    + POSTGRES_VECTOR.format(
+        title=":title", description=":description", content=":content"
+    )
+    + " WHERE post_id = :post_id"
+)
+
+POSTGRES_REINDEX = text(
+    "UPDATE postbody SET search_vector = "
+    + POSTGRES_VECTOR.format(
+        title="post.title",
+        description="post.description",
+        content="postbody.content",
+    )
+    + " FROM post WHERE post.post_id = postbody.post_id"
+)
+
+SQLITE_KEY = text("INSERT INTO post_search_key(post_id) VALUES (:post_id)")
+
+SQLITE_INDEX = text(
+    "INSERT INTO post_search(rowid, post_id, title, description, content) "
+    "SELECT search_rowid, post_id, :title, :description, :content "
+    "FROM post_search_key WHERE post_id = :post_id"
+)
+
+SQLITE_UNINDEX = text(
+    "DELETE FROM post_search WHERE rowid IN "
+    "(SELECT search_rowid FROM post_search_key WHERE post_id = :post_id)"
+)
+
+SQLITE_UNKEY = text("DELETE FROM post_search_key WHERE post_id = :post_id")
+
+SQLITE_SEARCH = text(
+    "SELECT post_id FROM post_search WHERE post_search MATCH :query "
+    "ORDER BY bm25(post_search, 0.0, 10.0, 5.0, 1.0) "
+    "LIMIT :limit OFFSET :skip"
+)
+
+POSTGRES_SEARCH = text(
+    "SELECT post.post_id "
+    "FROM postbody JOIN post ON post.post_id = postbody.post_id, "
+    "websearch_to_tsquery('english', :query) AS query "
+    "WHERE postbody.search_vector @@ query AND post.published "
+    "ORDER BY ts_rank_cd(postbody.search_vector, query) DESC, "
+    "post.created_at DESC "
+    "LIMIT :limit OFFSET :skip"
+)
+
+
+# Runs on every create_all, so databases created before search existed get
+# the index at startup; `python -m app.db.search` then fills it.
+@event.listens_for(SQLModel.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        statements = SQLITE_SEARCH_DDL
+    elif connection.dialect.name == "postgresql":
+        statements = POSTGRES_SEARCH_DDL
+    else:
+        return
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Post.__table__, "before_drop")
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS post_search")
+        connection.exec_driver_sql("DROP TABLE IF EXISTS post_search_key")
+
+
+def fts_query(query: str) -> str:
+    """
+    Quotes every word as an FTS5 string so user input cannot be read as
+    query syntax; the words are then all required.
+    """
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def uses_fts(db_session: AsyncSession) -> bool:
+    return db_session.bind.dialect.name == "sqlite"
+
+
+def uses_tsvector(db_session: AsyncSession) -> bool:
+    return db_session.bind.dialect.name == "postgresql"
+
+
+async def unindex_post(db_session: AsyncSession, post_id: UUID):
+    """Removes a post from the search index, without committing."""
+    if not uses_fts(db_session):
+        return
+    params = {"post_id": post_id.hex}
+    await db_session.exec(SQLITE_UNINDEX, params=params)
+    await db_session.exec(SQLITE_UNKEY, params=params)
+
+
+async def unindex_posts(db_session: AsyncSession, post_ids: List[UUID]):
+    """Removes several posts from the search index, without committing."""
+    if not uses_fts(db_session):
+        return
+    if post_ids:
+        params = [{"post_id": post_id.hex} for post_id in post_ids]
+        await db_session.exec(SQLITE_UNINDEX, params=params)
+        await db_session.exec(SQLITE_UNKEY, params=params)
+
+
+def search_row(post_id: UUID, title: str, description: str, content: str):
+    return {
+        "post_id": post_id.hex,
+        "title": title,
+        "description": description,
+        "content": content,
+    }
+
+
+async def index_post(db_session: AsyncSession, post: Post):
+    """
+    Adds or refreshes a published post in the search index, or removes an
+    unpublished one, without committing. The post's body must be loaded.
+    """
+    if uses_tsvector(db_session):
+        # The body row has to exist before its vector can be written.
+        # Searches filter on post.published, so drafts are indexed too.
+        await db_session.flush()
+        await db_session.exec(
+            POSTGRES_INDEX,
+            params={
+                "post_id": post.post_id,
+                "title": post.title,
+                "description": post.description,
+                "content": post.body.content,
+            },
+        )
+        return
+    if not uses_fts(db_session):
+        return
+    await unindex_post(db_session, post.post_id)
+    if not post.published:
+        return
+    await db_session.exec(SQLITE_KEY, params={"post_id": post.post_id.hex})
+    await db_session.exec(
+        SQLITE_INDEX,
+        params=search_row(
+            post.post_id, post.title, post.description, post.body.content
+        ),
+    )
+
+
+async def search_post_ids(
+    db_session: AsyncSession, query: str, skip: int, limit: int
+) -> List[UUID]:
+    """
+    Returns the ids of the published posts matching the query, best match
+    first.
+    """
+    if uses_fts(db_session):
+        statement, query = SQLITE_SEARCH, fts_query(query)
+    else:
+        statement = POSTGRES_SEARCH
+    if not query.strip():
+        return []
+    rows = await db_session.exec(
+        statement,
+        params={"query": query, "skip": skip, "limit": limit},
+    )
+    return [UUID(str(post_id)) for (post_id,) in rows.all()]
+
+
+async def rebuild_search_index(db_session: AsyncSession):
+    """
+    Re-indexes every post, e.g. after posts were written outside
+    post_provider.
+
+    Args:
+        db_session (AsyncSession): The database session.
+    """
+    if uses_tsvector(db_session):
+        await db_session.exec(POSTGRES_REINDEX)
+        await db_session.commit()
+        return
+    if not uses_fts(db_session):
+        return
+    await db_session.exec(text("DELETE FROM post_search"))
+    await db_session.exec(text("DELETE FROM post_search_key"))
+    posts = await db_session.stream(
+        select(Post.post_id, Post.title, Post.description, PostBody.content)
+        .join(PostBody)
+        .where(Post.published)
+    )
+    async for rows in posts.partitions(REBUILD_BATCH_SIZE):
+        params = [search_row(*row) for row in rows]
+        await db_session.exec(
+            SQLITE_KEY, params=[{"post_id": row["post_id"]} for row in params]
+        )
+        await db_session.exec(SQLITE_INDEX, params=params)
+    await db_session.commit()
+
+
+async def main():
+    log_info("Rebuilding the post search index...")
+    async with AsyncSession(engine) as db_session:
+        await rebuild_search_index(db_session)
+    log_success("Search index rebuilt.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
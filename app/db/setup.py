@@ -1,17 +1,47 @@
-from sqlmodel import Session, SQLModel, create_engine
+from typing import cast
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.config import env
+from app.db.pool import MonitoredPool
 from app.log.console import log_info
 
-DB_URL = env.get_env("DB_URL", "sqlite:///./app.db")
-engine = create_engine(DB_URL)
+# Use sqlite+aiosqlite:// locally and postgresql+asyncpg:// in production.
+DB_URL = env.get_env("DB_URL", "sqlite+aiosqlite:///./app.db")
+DB_POOL_SIZE = int(env.get_env("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(env.get_env("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(env.get_env("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(env.get_env("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env.get_env("DB_POOL_PRE_PING", "True").lower() == "true"
+# Checkouts taking longer than this many seconds are logged.
+DB_POOL_SLOW_CHECKOUT = float(env.get_env("DB_POOL_SLOW_CHECKOUT", "0.1"))
+
+engine = create_async_engine(
+    DB_URL,
+    poolclass=MonitoredPool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    slow_checkout=DB_POOL_SLOW_CHECKOUT,
+)
 
 
-def connect_db():
+async def connect_db():
     log_info("Connecting to database...")
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
 
 
-def get_db_session():
-    with Session(engine) as session:
+async def get_db_session():
+    # Attributes must stay readable after commit: an expired attribute
+    # would need a lazy refresh, which is not allowed outside the greenlet.
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+
+
+def get_pool_stats() -> dict:
+    return cast(MonitoredPool, engine.pool).status_dict()
@@ -47,6 +47,8 @@ ContentTypeLiteral = Literal[
     "other",
 ]
 
+FitLiteral = Literal["contain", "cover"]
+
 
 class MediaDTO(BaseModel):
     media_id: Optional[UUID]
@@ -67,6 +69,11 @@ class MediaCreatedDTO(BaseModel):
     url: str
 
 
+class BlobDTO(BaseModel):
+    sha256: str
+    size: int
+
+
 class PostMedia(BaseModel):
     media_id: Optional[UUID]
     post_id: Optional[UUID]
@@ -24,7 +24,15 @@ class PostUpdateDTO(BaseModel):
     tags: Optional[List[str]] = None
 
 
-class PostDTO(BaseModel):
+class TocEntryDTO(BaseModel):
+    level: int
+    title: str
+    anchor: str
+
+
+class PostSummaryDTO(BaseModel):
+    """A post without its content, as returned by list endpoints"""
+
     post_id: UUID | None
     author_username: str
     created_at: datetime
@@ -32,9 +40,17 @@ class PostDTO(BaseModel):
     last_modified: datetime
     modified: bool
     description: str
-    content: str
     published: bool
     medias: list[MediaDTO]
     like_count: int
     comments_count: int
     tags: list[PostTagDTO]
+
+
+class PostDTO(PostSummaryDTO):
+    content: str
+    # Rendered from content when the post is written
+    content_html: str
+    excerpt: str
+    reading_time: int
+    toc: list[TocEntryDTO]
@@ -2,7 +2,7 @@ from typing import Annotated
 
 from fastapi import APIRouter, Cookie, Depends, Form, Response
 from pydantic import EmailStr, StringConstraints, constr
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.setup import get_db_session
 from app.routes.providers import auth_provider
@@ -14,7 +14,7 @@ AlphaNumericalStr = constr()
 
 @auth_router.post("/auth/register")
 async def register(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     email: Annotated[EmailStr, Form()],
     username: Annotated[
         Annotated[str, Form()],
@@ -38,7 +38,7 @@ async def register(
 
 @auth_router.post("/auth/login")
 async def login(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     email: Annotated[EmailStr, Form()],
     password: Annotated[str, Form()],
     response: Response,
@@ -53,7 +53,7 @@ async def login(
 
 @auth_router.post("/auth/logout")
 async def logout(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     response: Response,
     session: Annotated[str | None, Cookie()] = None,
 ):
@@ -66,7 +66,7 @@ async def logout(
 
 @auth_router.get("/auth/verify")
 async def verify(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     token: str,
 ):
     return await auth_provider.verify_auth_session(
@@ -2,7 +2,7 @@ from typing import Annotated
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.models import User
 from app.db.setup import get_db_session
@@ -15,7 +15,7 @@ comment_router = APIRouter()
 
 @comment_router.get("/comments/{comment_id}", response_model=CommentDTO)
 async def get_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     _user: Annotated[User, Depends(get_current_user)],
     comment_id: UUID,
 ):
@@ -28,7 +28,7 @@ async def get_comment(
 
 @comment_router.post("/comments", response_model=CommentDTO)
 async def create_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     comment_data: CommentCreateDTO,
     current_user: User = Depends(get_current_user),
 ):
@@ -42,7 +42,7 @@ async def create_comment(
 
 @comment_router.put("/comments/{comment_id}", response_model=CommentDTO)
 async def update_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     comment_id: UUID,
     comment_data: CommentUpdateDTO,
     current_user: User = Depends(get_current_user),
@@ -58,7 +58,7 @@ async def update_comment(
 
 @comment_router.delete("/comments/{comment_id}")
 async def delete_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     comment_id: UUID,
     current_user: User = Depends(get_current_user),
 ):
@@ -72,7 +72,7 @@ async def delete_comment(
 
 @comment_router.post("/comments/{comment_id}/like")
 async def like_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     comment_id: UUID,
     current_user: User = Depends(get_current_user),
 ):
@@ -86,7 +86,7 @@ async def like_comment(
 
 @comment_router.delete("/comments/{comment_id}/like")
 async def unlike_comment(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     comment_id: UUID,
     current_user: User = Depends(get_current_user),
 ):
@@ -1,31 +1,102 @@
-from typing import Annotated
+from typing import Annotated, Optional, get_args
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
-from fastapi.responses import StreamingResponse
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Form, Path, Query, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.models import User
 from app.db.setup import get_db_session
-from app.dto.media_dto import ContentTypeLiteral, MediaCreatedDTO
+from app.dto.media_dto import (
+    BlobDTO,
+    ContentTypeLiteral,
+    FitLiteral,
+    MediaCreatedDTO,
+)
 from app.routes.providers import media_provider
 from app.routes.providers.auth_provider import get_current_user
+from app.storage.response import MediaFileResponse
+from app.storage.upload import receive_media_upload
 
 media_router = APIRouter()
 
 
-@media_router.post("/media", response_model=MediaCreatedDTO)
+# The form is parsed by receive_media_upload rather than by FastAPI, so its
+# schema is documented by hand.
+UPLOAD_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["media_type", "file"],
+                    "properties": {
+                        "media_type": {
+                            "type": "string",
+                            "enum": list(get_args(ContentTypeLiteral)),
+                        },
+                        "protected": {"type": "boolean", "default": False},
+                        "file": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+
+@media_router.post(
+    "/media", response_model=MediaCreatedDTO, openapi_extra=UPLOAD_FORM
+)
 async def upload_media(
     current_user: Annotated[User, Depends(get_current_user)],
-    db_session: Annotated[Session, Depends(get_db_session)],
-    file: UploadFile = File(...),
-    media_type: ContentTypeLiteral = Form(...),
-    protected: bool = Form(False),  # Default value outside of Annotated
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    request: Request,
 ):
-    """Upload a new media file"""
+    """
+    Upload a new media file. Send media_type before the file so its size
+    limit applies while the file is received.
+    """
+    upload = await receive_media_upload(request)
     return await media_provider.upload_media(
         db_session=db_session,
-        file=file,
+        upload=upload,
+        current_user=current_user,
+    )
+
+
+Sha256 = Annotated[str, Path(pattern="^[0-9a-f]{64}$")]
+
+
+@media_router.get("/media/blobs/{sha256}", response_model=BlobDTO)
+async def get_blob(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    sha256: Sha256,
+):
+    """
+    Check whether you already uploaded a file, by its lowercase hex
+    SHA-256, before uploading it again
+    """
+    return await media_provider.get_stored_blob(
+        db_session=db_session, sha256=sha256, current_user=current_user
+    )
+
+
+@media_router.post("/media/blobs/{sha256}", response_model=MediaCreatedDTO)
+async def create_media_from_blob(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    sha256: Sha256,
+    name: Annotated[str, Form()],
+    media_type: Annotated[ContentTypeLiteral, Form()],
+    protected: bool = Form(False),  # Default value outside of Annotated
+):
+    """Create a new media file from a file you already uploaded"""
+    return await media_provider.create_media_from_blob(
+        db_session=db_session,
+        sha256=sha256,
+        name=name,
         media_type=media_type,
         protected=protected,
         current_user=current_user,
@@ -35,13 +106,25 @@ async def upload_media(
 @media_router.get("/media/{media_id}")
 async def get_media(
     current_user: Annotated[User, Depends(get_current_user)],
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     media_id: UUID,
+    w: Annotated[Optional[int], Query()] = None,
+    h: Annotated[Optional[int], Query()] = None,
+    fit: Annotated[FitLiteral, Query()] = "contain",
 ):
-    """Get a media file"""
-    content, content_type = await media_provider.get_media(
+    """
+    Get a media file. Images can be resized by passing w and/or h, from
+    a fixed set of sizes: fit=contain scales the image to fit within them,
+    fit=cover crops it to fill them.
+    """
+    path, stat_result, content_type = await media_provider.get_media(
         db_session=db_session,
         media_id=media_id,
         current_user=current_user,
+        width=w,
+        height=h,
+        fit=fit,
+    )
+    return MediaFileResponse(
+        path, stat_result=stat_result, media_type=content_type
     )
-    return StreamingResponse(content=[content], media_type=content_type)
@@ -0,0 +1,47 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import User
+from app.db.setup import get_db_session
+from app.routes.providers import metrics_provider
+from app.routes.providers.auth_provider import get_current_user
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics/db-pool")
+async def get_db_pool_metrics(
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """Get database connection pool statistics"""
+    return await metrics_provider.get_db_pool_metrics(
+        db_session=db_session,
+        user=current_user,
+    )
+
+
+@metrics_router.get("/metrics/session-cache")
+async def get_session_cache_metrics(
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """Get login session cache statistics"""
+    return await metrics_provider.get_session_cache_metrics(
+        db_session=db_session,
+        user=current_user,
+    )
+
+
+@metrics_router.get("/metrics/post-cache")
+async def get_post_cache_metrics(
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    """Get post response cache statistics"""
+    return await metrics_provider.get_post_cache_metrics(
+        db_session=db_session,
+        user=current_user,
+    )
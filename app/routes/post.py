@@ -1,56 +1,117 @@
 from typing import Annotated, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Form, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Form, Header, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.models import User
 from app.db.setup import get_db_session
-from app.dto.post_dto import PostCreateDTO, PostDTO, PostUpdateDTO
+from app.dto.post_dto import (
+    PostCreateDTO,
+    PostDTO,
+    PostSummaryDTO,
+    PostUpdateDTO,
+)
 from app.routes.providers import post_provider
 from app.routes.providers.auth_provider import get_current_user
+from app.utils.cursor import NEXT_CURSOR_HEADER
+from app.utils.etag import ETAG_HEADER
 
 post_router = APIRouter()
 
 
-@post_router.get("/posts", response_model=List[PostDTO])
+@post_router.get("/posts", response_model=List[PostSummaryDTO])
 async def get_posts(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    fields: Annotated[
+        post_provider.Fields, Depends(post_provider.parse_fields)
+    ],
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     tags: Optional[List[str]] = Query(None),
     author: Optional[str] = None,
     published_only: bool = True,
+    cursor: Optional[str] = None,
+    tags_mode: post_provider.TagsMode = "any",
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get all posts with optional filtering"""
-    return await post_provider.get_posts(
+    posts, next_cursor, etag = await post_provider.get_posts(
         db_session=db_session,
         skip=skip,
         limit=limit,
         tags=tags,
         author=author,
         published_only=published_only,
+        cursor=cursor,
+        tags_mode=tags_mode,
+        fields=fields,
+        if_none_match=if_none_match,
+    )
+    response.headers[ETAG_HEADER] = etag
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=post_provider.serialize_posts(posts, fields),
+        media_type="application/json",
+        headers=response.headers,
+    )
+
+
+@post_router.get("/posts/search", response_model=List[PostSummaryDTO])
+async def search_posts(
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    fields: Annotated[
+        post_provider.Fields, Depends(post_provider.parse_fields)
+    ],
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """Full-text search over post titles, descriptions and contents"""
+    posts, etag = await post_provider.search_posts(
+        db_session=db_session,
+        query=q,
+        skip=skip,
+        limit=limit,
+        fields=fields,
+        if_none_match=if_none_match,
+    )
+    response.headers[ETAG_HEADER] = etag
+    return Response(
+        content=post_provider.serialize_posts(posts, fields),
+        media_type="application/json",
+        headers=response.headers,
     )
 
 
 @post_router.get("/posts/{post_id}", response_model=PostDTO)
 async def get_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)],
+    response: Response,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get a specific post by ID"""
-    return await post_provider.get_post(
+    post, etag = await post_provider.get_post(
         db_session=db_session,
         post_id=post_id,
         current_user=current_user,
+        if_none_match=if_none_match,
     )
+    response.headers[ETAG_HEADER] = etag
+    return post
 
 
 @post_router.post("/posts", response_model=PostDTO)
 async def create_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_data: PostCreateDTO,
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -64,7 +125,7 @@ async def create_post(
 
 @post_router.put("/posts/{post_id}", response_model=PostDTO)
 async def update_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     post_data: PostUpdateDTO,
     current_user: Annotated[User, Depends(get_current_user)],
@@ -80,7 +141,7 @@ async def update_post(
 
 @post_router.delete("/posts/{post_id}")
 async def delete_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -94,7 +155,7 @@ async def delete_post(
 
 @post_router.post("/posts/{post_id}/like")
 async def like_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -108,7 +169,7 @@ async def like_post(
 
 @post_router.delete("/posts/{post_id}/like")
 async def unlike_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)],
 ):
@@ -122,7 +183,7 @@ async def unlike_post(
 
 @post_router.post("/posts/{post_id}/media")
 async def add_media_to_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
     post_id: UUID,
     media_id: UUID = Form(),
@@ -142,7 +203,7 @@ async def add_media_to_post(
 
 @post_router.delete("/posts/{post_id}/media/{media_id}")
 async def remove_media_from_post(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     post_id: UUID,
     media_id: UUID,
     current_user: Annotated[User, Depends(get_current_user)],
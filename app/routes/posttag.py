@@ -1,43 +1,73 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.setup import get_db_session
-from app.dto.post_dto import PostDTO
+from app.dto.post_dto import PostSummaryDTO
 from app.dto.posttag_dto import PostTagDTO
-from app.routes.providers import posttag_provider
+from app.routes.providers import post_provider, posttag_provider
+from app.utils.cursor import NEXT_CURSOR_HEADER
+from app.utils.etag import ETAG_HEADER
 
 posttag_router = APIRouter()
 
 
 @posttag_router.get("/tags", response_model=List[PostTagDTO])
 async def get_tags(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get all post tags"""
-    return await posttag_provider.get_tags(
+    tags, next_cursor, etag = await posttag_provider.get_tags(
         db_session=db_session,
         skip=skip,
         limit=limit,
+        cursor=cursor,
+        if_none_match=if_none_match,
     )
+    response.headers[ETAG_HEADER] = etag
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return tags
 
 
-@posttag_router.get("/tags/{tag_name}/posts", response_model=List[PostDTO])
+@posttag_router.get(
+    "/tags/{tag_name}/posts", response_model=List[PostSummaryDTO]
+)
 async def get_posts_by_tag(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     tag_name: str,
+    response: Response,
+    fields: Annotated[
+        post_provider.Fields, Depends(post_provider.parse_fields)
+    ],
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     published_only: bool = True,
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get all posts with a specific tag"""
-    return await posttag_provider.get_posts_by_tag(
+    posts, next_cursor, etag = await posttag_provider.get_posts_by_tag(
         db_session=db_session,
         tag_name=tag_name,
         skip=skip,
         limit=limit,
         published_only=published_only,
+        cursor=cursor,
+        fields=fields,
+        if_none_match=if_none_match,
+    )
+    response.headers[ETAG_HEADER] = etag
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=post_provider.serialize_posts(posts, fields),
+        media_type="application/json",
+        headers=response.headers,
     )
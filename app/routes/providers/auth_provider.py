@@ -4,7 +4,8 @@ from typing import Annotated
 from fastapi import Cookie, Depends, Form, HTTPException, Response
 from fastapi.responses import RedirectResponse
 from pydantic import EmailStr
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import (
     HTTP_401_UNAUTHORIZED,
     HTTP_409_CONFLICT,
@@ -18,8 +19,14 @@ from app.miscellaneous.error_codes import (
     ERR_INVALID_CREDENTIALS,
     ERR_NEED_VERIFICATION,
 )
-from app.security.password import hash_password, verify_password
+from app.security.password import hash_password, verify_and_update_password
+from app.security.session_cache import (
+    cache_user,
+    get_cached_user,
+    invalidate_session,
+)
 from app.services.email import send_templated_email
+from app.services.last_login import record_activity
 from app.utils.crypto import gen_id
 
 ACCOUNT_VERIFICATION_URL = env.get_env(
@@ -32,7 +39,7 @@ APP_EMAIL_ADDRESS = env.get_env("APP_EMAIL_ADDRESS", "")
 
 
 async def register(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     email: Annotated[EmailStr, Form()],
     username: Annotated[str, Form()],
     display_name: Annotated[str, Form()],
@@ -42,7 +49,7 @@ async def register(
     """
     Register a new user.
     Args:
-        db_session (Session): The database session.
+        db_session (AsyncSession): The database session.
         email (EmailStr): The user's email.
         username (str): The user's username.
         display_name (str): The user's display name.
@@ -52,13 +59,13 @@ async def register(
     if not password == password_repeat:
         raise ValueError("Passwords do not match")
 
-    user_in_db = db_session.get(User, username)
+    user_in_db = await db_session.get(User, username)
     if user_in_db:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT, detail="Username taken."
         )
     stmt = select(User).where(User.email == email)
-    user_in_db = db_session.exec(stmt).first()
+    user_in_db = (await db_session.exec(stmt)).first()
     if user_in_db:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
@@ -69,7 +76,7 @@ async def register(
         username=username,
         email=email,
         display_name=display_name,
-        hashed_password=hash_password(password),
+        hashed_password=await hash_password(password),
         role_id=role.role_id,
         avatar_url=None,
         last_login=datetime.utcnow(),
@@ -86,8 +93,8 @@ async def register(
     db_session.add(role)
     db_session.add(user)
     db_session.add(auth_session)
-    db_session.commit()
-    db_session.refresh(user)
+    await db_session.commit()
+    await db_session.refresh(user)
     print(ACCOUNT_VERIFICATION_URL)
     send_templated_email(
         email=user.email,
@@ -108,7 +115,7 @@ async def register(
 
 
 async def login(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     email: Annotated[EmailStr, Form()],
     password: Annotated[str, Form()],
     response: Response,
@@ -117,7 +124,7 @@ async def login(
     Login a user and create a session.
     If the user is not verified, send a verification email.
     Args:
-        db_session (Session): The database session.
+        db_session (AsyncSession): The database session.
         email (EmailStr): The user's email.
         password (str): The user's password.
         response (Response): The response object.
@@ -125,18 +132,25 @@ async def login(
         UserDTO: The logged-in user.
     """
     stmt = select(User).where(User.email == email)
-    user = db_session.exec(stmt).first()
+    user = (await db_session.exec(stmt)).first()
     if not user:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
             detail=ERR_INVALID_CREDENTIALS,
         )
 
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(
+        password, user.hashed_password
+    )
+    if not verified:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
             detail=ERR_INVALID_CREDENTIALS,
         )
+    if new_hash:
+        # Rehash at the current cost; committed with the login session
+        user.hashed_password = new_hash
+        db_session.add(user)
 
     if (
         not user.account_verified
@@ -148,7 +162,7 @@ async def login(
             expires_at=datetime.utcnow() + timedelta(minutes=30),
         )
         db_session.add(auth_session)
-        db_session.commit()
+        await db_session.commit()
         send_templated_email(
             email=user.email,
             template_name="verification",
@@ -174,8 +188,8 @@ async def login(
         expires_at=datetime.utcnow() + timedelta(days=365),
     )
     db_session.add(login_session)
-    db_session.commit()
-    db_session.refresh(login_session)
+    await db_session.commit()
+    await db_session.refresh(login_session)
     response.set_cookie(
         key="session",
         value=login_session.session_id,
@@ -189,73 +203,79 @@ async def login(
 
 
 async def verify_auth_session(
-    db_session: Annotated[Session, Depends(get_db_session)], session_id: str
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
+    session_id: str,
 ):
     """
     Verify the authentication session.
     Args:
-        db_session (Session): The database session.
+        db_session (AsyncSession): The database session.
         session_id (str): The session ID.
     Returns:
         AuthSession: The authenticated session.
     """
-    auth_session = db_session.get(AuthSession, session_id)
+    auth_session = await db_session.get(AuthSession, session_id)
     if not auth_session or auth_session.expires_at < datetime.utcnow():
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Session expired.",
         )
-    user = auth_session.user
+    user = await db_session.get(User, auth_session.username)
     user.account_verified = True
     user.last_login = datetime.utcnow()
     db_session.add(user)
-    db_session.delete(auth_session)
-    db_session.commit()
+    await db_session.delete(auth_session)
+    await db_session.commit()
     return RedirectResponse(
         url=f"{env.get_env('DOMAIN', default_value='https://blog.ametsowou.me')}/login"
     )
 
 
 async def get_current_user(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     session: Annotated[str | None, Cookie()] = None,
 ):
     """
     Get the current user from the session cookie.
+    last_login is queued for a batched write, so resolving the user does
+    not write to the database.
     """
     if not session:
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authenticated.",
         )
-    login_session = db_session.get(LoginSession, session)
+    user = await get_cached_user(db_session, session)
+    if user:
+        record_activity(user.username)
+        return user
+
+    login_session = await db_session.get(LoginSession, session)
     if not login_session or login_session.expires_at < datetime.utcnow():
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
-    user = db_session.get(User, login_session.username)
+    user = await db_session.get(User, login_session.username)
     if not user:
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
-    user.last_login = datetime.utcnow()
-    db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    record_activity(user.username)
+    cache_user(session, user, login_session.expires_at)
     return user
 
 
 async def logout(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     response: Response,
     session: str | None,
 ):
     """
     Logout the user by deleting the session cookie.
     Args:
-        db_session (Session): The database session.
+        db_session (AsyncSession): The database session.
         response (Response): The response object.
         session (str | None): The session ID from the cookie.
     """
@@ -264,13 +284,14 @@ async def logout(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
-    login_session = db_session.get(LoginSession, session)
+    login_session = await db_session.get(LoginSession, session)
     if not login_session:
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
-    db_session.delete(login_session)
-    db_session.commit()
+    await db_session.delete(login_session)
+    await db_session.commit()
+    invalidate_session(session)
     response.delete_cookie("session")
     log_info(f"User {login_session.username} logged out.")
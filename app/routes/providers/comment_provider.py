@@ -2,19 +2,27 @@ from datetime import datetime
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlmodel import Session
+from sqlmodel import update
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 
-from app.db.models import Comment, Post, User
+from app.db.models import Comment, Post, User, UserCommentLikeLink
 from app.dto.comment_dto import CommentCreateDTO, CommentUpdateDTO
+from app.security.permission import (
+    ACTION_DELETE,
+    ACTION_UPDATE,
+    COMMENT_RESOURCE,
+    has_owner_permission,
+)
+from app.services import post_cache
 
 
 async def get_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
 ):
     """Get a specific comment by ID"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
@@ -23,13 +31,13 @@ async def get_comment(
 
 
 async def create_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_data: CommentCreateDTO,
     current_user: User,
 ):
     """Create a new comment on a post"""
     # Check if post exists
-    post = db_session.get(Post, comment_data.post_id)
+    post = await db_session.get(Post, comment_data.post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
@@ -44,26 +52,40 @@ async def create_comment(
         content=comment_data.content,
     )
     db_session.add(comment)
-    db_session.commit()
-    db_session.refresh(comment)
-    return comment
+    await db_session.exec(
+        update(Post)
+        .where(Post.post_id == comment_data.post_id)
+        .values(comment_count=Post.comment_count + 1)
+    )
+    await db_session.commit()
+    await db_session.refresh(comment)
+    await post_cache.invalidate_post(comment.post_id)
+    return comment.to_dto()
 
 
 async def update_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
     comment_data: CommentUpdateDTO,
     current_user: User,
 ):
     """Update an existing comment"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
         )
 
     # Only the author can update the comment
-    if comment.author_username != current_user.username:
+    if not await has_owner_permission(
+        db_session=db_session,
+        user=current_user,
+        owner_username=comment.author_username,
+        bypass_role=None,
+        resource_name=COMMENT_RESOURCE,
+        resource_id=str(comment.comment_id),
+        action_name=ACTION_UPDATE,
+    ):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to update this comment",
@@ -74,93 +96,136 @@ async def update_comment(
     comment.modified = True
 
     db_session.add(comment)
-    db_session.commit()
-    db_session.refresh(comment)
+    await db_session.commit()
+    await db_session.refresh(comment)
     return comment.to_dto()
 
 
 async def delete_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
     current_user: User,
 ):
     """Delete a comment"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
         )
 
-    # Only the author can delete the comment
-    if comment.author_username != current_user.username:
+    # Only the author, explicit grantees and admins can delete the comment
+    if not await has_owner_permission(
+        db_session=db_session,
+        user=current_user,
+        owner_username=comment.author_username,
+        bypass_role="admin",
+        resource_name=COMMENT_RESOURCE,
+        resource_id=str(comment.comment_id),
+        action_name=ACTION_DELETE,
+    ):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this comment",
         )
 
-    db_session.delete(comment)
-    db_session.commit()
+    await db_session.delete(comment)
+    await db_session.exec(
+        update(Post)
+        .where(Post.post_id == comment.post_id)
+        .values(comment_count=Post.comment_count - 1)
+    )
+    await db_session.commit()
+    await post_cache.invalidate_post(comment.post_id)
     return {"message": "Comment deleted successfully"}
 
 
 async def like_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
     current_user: User,
 ):
     """Like a comment"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
         )
 
     # Check if user already liked the comment
-    if current_user in comment.liked_by:
+    like = await db_session.get(
+        UserCommentLikeLink, (comment_id, current_user.username)
+    )
+    if like:
         return {"message": "Comment already liked"}
 
-    comment.liked_by.append(current_user)
-    db_session.commit()
+    db_session.add(
+        UserCommentLikeLink(
+            comment_id=comment_id, username=current_user.username
+        )
+    )
+    likes_count = (
+        await db_session.exec(
+            update(Comment)
+            .where(Comment.comment_id == comment_id)
+            .values(like_count=Comment.like_count + 1)
+            .returning(Comment.like_count)
+        )
+    ).scalar_one()
+    await db_session.commit()
     return {
         "message": "Comment liked successfully",
-        "likes_count": len(comment.liked_by),
+        "likes_count": likes_count,
     }
 
 
 async def unlike_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
     current_user: User,
 ):
     """Unlike a comment"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
         )
 
     # Check if user liked the comment
-    if current_user not in comment.liked_by:
+    like = await db_session.get(
+        UserCommentLikeLink, (comment_id, current_user.username)
+    )
+    if not like:
         return {"message": "Comment not liked yet"}
 
-    comment.liked_by.remove(current_user)
-    db_session.commit()
+    await db_session.delete(like)
+    likes_count = (
+        await db_session.exec(
+            update(Comment)
+            .where(Comment.comment_id == comment_id)
+            .values(like_count=Comment.like_count - 1)
+            .returning(Comment.like_count)
+        )
+    ).scalar_one()
+    await db_session.commit()
     return {
         "message": "Comment unliked successfully",
-        "likes_count": len(comment.liked_by),
+        "likes_count": likes_count,
     }
 
 
 async def has_user_liked_comment(
-    db_session: Session,
+    db_session: AsyncSession,
     comment_id: UUID,
     current_user: User,
 ):
     """Check if the user has liked the comment"""
-    comment = db_session.get(Comment, comment_id)
+    comment = await db_session.get(Comment, comment_id)
     if not comment:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Comment not found"
         )
 
-    return current_user in comment.liked_by
+    like = await db_session.get(
+        UserCommentLikeLink, (comment_id, current_user.username)
+    )
+    return like is not None
@@ -1,70 +1,159 @@
+import os
 import uuid
+from typing import Optional, get_args
 
-from fastapi import HTTPException, UploadFile
-from sqlmodel import Session
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_400_BAD_REQUEST
 
 from app.db.models import Media, User
-from app.dto.media_dto import ContentTypeLiteral, MediaCreatedDTO
-from app.storage.storage import get_file, write_file
+from app.dto.media_dto import (
+    BlobDTO,
+    ContentTypeLiteral,
+    FitLiteral,
+    MediaCreatedDTO,
+)
+from app.storage.blobs import (
+    add_blob_ref,
+    discard_blob,
+    get_blob,
+    store_blob,
+)
+from app.storage.storage import get_file_path, stat_file
+from app.storage.upload import MediaUpload, size_limit, too_large
+from app.storage.variants import get_variant, pregenerate_variants
+
+_bool_adapter = TypeAdapter(bool)
 
 
 async def upload_media(
-    db_session: Session,
-    file: UploadFile,
-    media_type: ContentTypeLiteral,
-    protected: bool,
+    db_session: AsyncSession,
+    upload: MediaUpload,
     current_user: User,
 ):
-    """Upload a new media file"""
-    # Validate file type
-    if not file.size:
-        raise HTTPException(
-            status_code=HTTP_400_BAD_REQUEST,
-            detail="File size is required",
-        )
+    """
+    Stores a streamed upload as a new media file. The upload's temporary
+    file becomes the blob for its content, unless that is already stored,
+    and is deleted otherwise.
+    """
+    try:
+        media_type = upload.fields.get("media_type")
+        if media_type not in get_args(ContentTypeLiteral):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="A valid media_type is required",
+            )
+        try:
+            protected = _bool_adapter.validate_python(
+                upload.fields.get("protected", False)
+            )
+        except ValidationError:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="protected must be a boolean",
+            )
+        if not upload.size:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="File size is required",
+            )
+        # Checked again now that media_type is known for certain
+        if upload.size > size_limit(media_type):
+            raise too_large(size_limit(media_type))
+        if not upload.filename:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail="File name is required",
+            )
 
-    if file.size > 5 * 1024 * 1024:
-        ...
-    if not file.filename:
-        raise HTTPException(
-            status_code=HTTP_400_BAD_REQUEST,
-            detail="File name is required",
+        sha256 = upload.sha256.hexdigest()
+        stored = await store_blob(
+            db_session, upload.temp_path, sha256, upload.size
         )
+        if stored:
+            upload.temp_path = None
+        media = Media(
+            name=upload.filename,
+            protected=protected,
+            media_type=media_type,
+            description=upload.filename,
+            size=upload.size,
+            sha256=sha256,
+            uploader_username=current_user.username,
+        )
+        db_session.add(media)
+        try:
+            await db_session.commit()
+        except BaseException:
+            if stored:
+                await discard_blob(db_session, sha256)
+            raise
+    finally:
+        await upload.discard()
+
+    pregenerate_variants(media)
+    return MediaCreatedDTO(url=f"/v1/media/{media.media_id}")
+
+
+async def get_stored_blob(
+    db_session: AsyncSession, sha256: str, current_user: User
+) -> BlobDTO:
+    """Check whether the user already uploaded a file with this SHA-256"""
+    blob = await get_blob(db_session, sha256, current_user.username)
+    if not blob:
+        raise HTTPException(status_code=404, detail="File not stored")
+    return BlobDTO(sha256=blob.sha256, size=blob.size)
+
+
+async def create_media_from_blob(
+    db_session: AsyncSession,
+    sha256: str,
+    name: str,
+    media_type: ContentTypeLiteral,
+    protected: bool,
+    current_user: User,
+):
+    """
+    Create a new media file from a file the user already uploaded, so
+    that the client can skip uploading it again
+    """
+    size = await add_blob_ref(db_session, sha256, current_user.username)
+    if size is None:
+        raise HTTPException(status_code=404, detail="File not stored")
+    if size > size_limit(media_type):
+        await db_session.rollback()
+        raise too_large(size_limit(media_type))
 
-    # Create media record
     media = Media(
-        name=file.filename,
+        name=name,
         protected=protected,
         media_type=media_type,
-        description=file.filename,
+        description=name,
+        size=size,
+        sha256=sha256,
         uploader_username=current_user.username,
     )
-
     db_session.add(media)
+    await db_session.commit()
 
-    # Save file using storage utility
-    try:
-        write_file(file, media)
-    except Exception as e:
-        # If file saving fails, clean up the DB record
-        db_session.rollback()
-        raise HTTPException(
-            status_code=HTTP_400_BAD_REQUEST,
-            detail=f"Failed to save file: {str(e)}",
-        )
-
-    db_session.commit()
-    db_session.refresh(media)
-
+    pregenerate_variants(media)
     return MediaCreatedDTO(url=f"/v1/media/{media.media_id}")
 
 
 async def get_media(
-    db_session: Session, media_id: uuid.UUID, current_user: User
+    db_session: AsyncSession,
+    media_id: uuid.UUID,
+    current_user: User,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    fit: FitLiteral = "contain",
 ):
-    """Get a media file"""
-    media = db_session.get(Media, media_id)
+    """
+    Get the path, stat and content type of a media file, or of its image
+    resized to width x height, for the route to stream from storage
+    """
+    media = await db_session.get(Media, media_id)
     if not media:
         raise HTTPException(status_code=404, detail="Media not found")
 
@@ -73,10 +162,16 @@ async def get_media(
         raise HTTPException(status_code=403, detail="Media is protected")
 
     try:
-        content = get_file(media)
-        return content, media.media_type
+        stat_result = stat_file(media)
+        variant = await get_variant(media, width, height, fit)
+        if variant is None:
+            return get_file_path(media), stat_result, media.media_type
+        path, content_type = variant
+        return path, os.stat(path), content_type
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Media file not found")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve media: {str(e)}"
@@ -0,0 +1,45 @@
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.status import HTTP_401_UNAUTHORIZED
+
+from app.db.models import User
+from app.db.setup import get_pool_stats
+from app.security.permission import (
+    ADMIN_ACTION,
+    METRICS_RESOURCE,
+    has_global_permission,
+)
+from app.security.session_cache import session_cache
+from app.services import post_cache
+
+
+async def ensure_metrics_access(db_session: AsyncSession, user: User):
+    if not await has_global_permission(
+        db_session=db_session,
+        role_id=user.role_id,
+        bypass_role="admin",
+        resource_name=METRICS_RESOURCE,
+        action_name=ADMIN_ACTION,
+    ):
+        raise HTTPException(
+            status_code=HTTP_401_UNAUTHORIZED,
+            detail="Not authorized to access this resource",
+        )
+
+
+async def get_db_pool_metrics(db_session: AsyncSession, user: User):
+    """Get the connection pool statistics"""
+    await ensure_metrics_access(db_session=db_session, user=user)
+    return get_pool_stats()
+
+
+async def get_session_cache_metrics(db_session: AsyncSession, user: User):
+    """Get the login session cache statistics"""
+    await ensure_metrics_access(db_session=db_session, user=user)
+    return session_cache.stats()
+
+
+async def get_post_cache_metrics(db_session: AsyncSession, user: User):
+    """Get the post response cache statistics"""
+    await ensure_metrics_access(db_session=db_session, user=user)
+    return post_cache.stats()
@@ -1,72 +1,462 @@
 from datetime import datetime
-from typing import List, Optional
-from uuid import UUID
-
-from fastapi import HTTPException
-from sqlmodel import Session, select
-from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+from functools import partial
+from typing import List, Literal, Optional, Set
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, Query
+from pydantic import TypeAdapter
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import selectinload
+from sqlmodel import func, or_, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_403_FORBIDDEN,
+    HTTP_404_NOT_FOUND,
+)
 
-from app.db.models import Media, Post, PostMedia, PostTag, User
-from app.dto.post_dto import PostCreateDTO, PostUpdateDTO
+from app.db.models import (
+    Media,
+    Post,
+    PostBody,
+    PostMedia,
+    PostTag,
+    PostTagLink,
+    User,
+    UserPostLikeLink,
+)
+from app.db.search import index_post, search_post_ids, unindex_post
+from app.dto.post_dto import (
+    PostCreateDTO,
+    PostDTO,
+    PostSummaryDTO,
+    PostUpdateDTO,
+)
 from app.security.permission import (
-    ACTION_CRUD,
+    ACTION_DELETE,
     ACTION_UPDATE,
     POST_RESOURCE,
-    create_permission,
-    has_crud_permission,
-    has_permission,
+    has_owner_permission,
+    revoke_resource_permissions,
 )
+from app.services import post_cache
+from app.services.render import (
+    RENDER_VERSION,
+    render_post,
+    render_stale_posts,
+)
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.etag import check_not_modified, make_etag
+
+
+def with_summary_relations(query):
+    """
+    Batch-loads every relation Post.to_summary_dto() reads, so serialising
+    a page costs a fixed number of queries whatever its size.
+    """
+    return query.options(
+        selectinload(Post.tags),
+        selectinload(Post.medias).selectinload(PostMedia.media),
+    )
+
+
+def with_dto_relations(query):
+    """Same as `with_summary_relations`, plus the body Post.to_dto() reads"""
+    return with_summary_relations(query).options(selectinload(Post.body))
+
+
+async def get_post_with_relations(
+    db_session: AsyncSession, post_id: UUID
+) -> Optional[Post]:
+    query = with_dto_relations(select(Post).where(Post.post_id == post_id))
+    return (
+        await db_session.exec(query.execution_options(populate_existing=True))
+    ).first()
+
+
+async def upsert_tags(
+    db_session: AsyncSession, names: List[str]
+) -> List[PostTag]:
+    """
+    Returns the tags with the given names in order, creating the missing
+    ones in one INSERT ... ON CONFLICT DO NOTHING, so a writer racing to
+    create the same tag does not fail. Nothing is committed.
+    """
+    names = list(dict.fromkeys(names))
+    if not names:
+        return []
+    tags = {
+        tag.name: tag
+        for tag in (
+            await db_session.exec(
+                select(PostTag).where(PostTag.name.in_(names))
+            )
+        ).all()
+    }
+    missing = [name for name in names if name not in tags]
+    if missing:
+        if db_session.bind.dialect.name == "postgresql":
+            insert = postgresql_insert
+        else:
+            insert = sqlite_insert
+        await db_session.exec(
+            insert(PostTag)
+            .values([dict(tag_id=uuid4(), name=name) for name in missing])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        for tag in (
+            await db_session.exec(
+                select(PostTag).where(PostTag.name.in_(missing))
+            )
+        ).all():
+            tags[tag.name] = tag
+    return [tags[name] for name in names]
+
+
+def paginate_posts(query, skip: int, limit: int, cursor: Optional[str]):
+    """
+    Orders posts newest first by (created_at, post_id) and selects one page.
+    A cursor seeks past the last post of the previous page, so deep pages
+    cost the same as the first one; without it `skip` is used as an
+    offset. One extra row is fetched to tell whether a next page exists.
+    """
+    query = query.order_by(Post.created_at.desc(), Post.post_id.desc())
+    if cursor:
+        try:
+            created_at, post_id = decode_cursor(cursor)
+            created_at, post_id = (
+                datetime.fromisoformat(created_at),
+                UUID(post_id),
+            )
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+            )
+        # Expanded from (created_at, post_id) < (...) so that the
+        # created_at indexes can serve the range.
+        query = query.where(
+            Post.created_at <= created_at,
+            or_(Post.created_at < created_at, Post.post_id < post_id),
+        )
+    else:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def split_page(posts, limit: int):
+    """
+    Splits the rows fetched by `paginate_posts` into the page and the
+    cursor of the next one.
+    """
+    if len(posts) <= limit:
+        return list(posts), None
+    last = posts[limit - 1]
+    return list(posts[:limit]), encode_cursor(
+        last.created_at.isoformat(), str(last.post_id)
+    )
+
+
+async def can_update_post(
+    db_session: AsyncSession, user: User, post: Post
+) -> bool:
+    """Whether the user owns the post or was granted updates on it"""
+    return await has_owner_permission(
+        db_session=db_session,
+        user=user,
+        owner_username=post.author_username,
+        bypass_role=None,
+        resource_name=POST_RESOURCE,
+        resource_id=str(post.post_id),
+        action_name=ACTION_UPDATE,
+    )
+
+
+TagsMode = Literal["any", "all"]
+
+
+def filter_by_tags(query, tags: List[str], mode: TagsMode):
+    """
+    Keeps posts tagged with any or all of the given names, as a semi-join
+    on the (tag_id, post_id) link index rather than a row-multiplying join.
+    """
+    names = set(tags)
+    tagged = (
+        select(PostTagLink.post_id)
+        .join(PostTag, PostTag.tag_id == PostTagLink.tag_id)
+        .where(PostTag.name.in_(names))
+    )
+    if mode == "all":
+        tagged = tagged.group_by(PostTagLink.post_id).having(
+            func.count() == len(names)
+        )
+    return query.where(Post.post_id.in_(tagged))
+
+
+async def load_post_dtos(
+    db_session: AsyncSession, post_ids: List[UUID]
+) -> List[PostDTO]:
+    posts = (
+        await db_session.exec(
+            with_dto_relations(select(Post).where(Post.post_id.in_(post_ids)))
+        )
+    ).all()
+    await render_stale_posts(db_session, posts)
+    return [post.to_dto() for post in posts]
+
+
+async def load_post_summaries(
+    db_session: AsyncSession, post_ids: List[UUID]
+) -> List[PostSummaryDTO]:
+    posts = await db_session.exec(
+        with_summary_relations(select(Post).where(Post.post_id.in_(post_ids)))
+    )
+    return [post.to_summary_dto() for post in posts.all()]
+
+
+Fields = Optional[Set[str]]
+
+POST_FIELDS = set(PostDTO.model_fields)
+# Fields only full posts carry, read from the post's body
+BODY_FIELDS = POST_FIELDS - set(PostSummaryDTO.model_fields)
+
+
+def parse_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated post fields to return, e.g. "
+        "`title,tags`. List endpoints leave out the body fields "
+        "(`content`, `content_html`, ...) unless asked.",
+    ),
+) -> Fields:
+    """Parses a `fields=` sparse fieldset; post_id is always included"""
+    if not fields:
+        return None
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - POST_FIELDS
+    if unknown:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}.",
+        )
+    return names | {"post_id"}
+
+
+async def load_listed_posts(
+    db_session: AsyncSession, post_ids: List[UUID], fields: Fields
+) -> List[PostSummaryDTO]:
+    """
+    Loads the posts of a listing as summaries, or as full posts when body
+    fields were asked for.
+    """
+    if fields and fields & BODY_FIELDS:
+        return await post_cache.get_posts(
+            post_ids, partial(load_post_dtos, db_session)
+        )
+    return await post_cache.get_summaries(
+        post_ids, partial(load_post_summaries, db_session)
+    )
+
+
+_summary_list = TypeAdapter(List[PostSummaryDTO])
+_post_list = TypeAdapter(List[PostDTO])
+
+
+def serialize_posts(posts: List[PostSummaryDTO], fields: Fields) -> bytes:
+    """
+    Serialises a listing straight to JSON, keeping only the requested
+    fields, without the route re-validating every post.
+    """
+    if not fields:
+        return _summary_list.dump_json(posts)
+    adapter = _post_list if fields & BODY_FIELDS else _summary_list
+    return adapter.dump_json(posts, include={"__all__": fields})
+
+
+def post_version(
+    post_id: UUID, last_modified: datetime, like_count: int, comment_count: int
+) -> tuple:
+    """
+    What a post's representation changes with: every write to a post moves
+    last_modified, except likes and comments, which move the counters, and
+    re-renders, which come with a new renderer version.
+    """
+    return (
+        str(post_id),
+        last_modified.isoformat(),
+        like_count,
+        comment_count,
+        RENDER_VERSION,
+    )
+
+
+async def page_etag(
+    db_session: AsyncSession,
+    post_ids: List[UUID],
+    next_cursor: Optional[str],
+) -> str:
+    """
+    The ETag of a page of posts, read from their version columns alone so
+    that a matching If-None-Match is answered before any post is loaded.
+    """
+    rows = await db_session.exec(
+        select(
+            Post.post_id,
+            Post.last_modified,
+            Post.like_count,
+            Post.comment_count,
+        ).where(Post.post_id.in_(post_ids))
+    )
+    versions = {row.post_id: post_version(*row) for row in rows.all()}
+    return make_etag(
+        next_cursor,
+        *(versions[post_id] for post_id in post_ids if post_id in versions),
+    )
 
 
 async def get_posts(
-    db_session: Session,
+    db_session: AsyncSession,
     skip: int = 0,
     limit: int = 10,
     tags: Optional[List[str]] = None,
     author: Optional[str] = None,
     published_only: bool = True,
+    cursor: Optional[str] = None,
+    tags_mode: TagsMode = "any",
+    fields: Fields = None,
+    if_none_match: Optional[str] = None,
 ):
     """Get all posts with optional filtering"""
-    query = select(Post)
+    query = select(Post.post_id, Post.created_at)
 
     if published_only:
         query = query.where(Post.published)
 
     if tags:
-        query = query.join(PostTag).where(PostTag.name in tags)
+        query = filter_by_tags(query, tags, tags_mode)
 
     if author:
         query = query.where(Post.author_username == author)
 
-    posts = db_session.exec(query.offset(skip).limit(limit)).all()
-    return [post.to_dto() for post in posts]
+    async def load_page():
+        page = paginate_posts(query, skip, limit, cursor)
+        rows, next_cursor = split_page(
+            (await db_session.exec(page)).all(), limit
+        )
+        return [row.post_id for row in rows], next_cursor
+
+    post_ids, next_cursor = await post_cache.get_page(
+        [
+            "posts",
+            skip,
+            limit,
+            sorted(set(tags or [])),
+            tags_mode,
+            author,
+            published_only,
+            cursor,
+        ],
+        load_page,
+    )
+    etag = await page_etag(db_session, post_ids, next_cursor)
+    check_not_modified(if_none_match, etag)
+    posts = await load_listed_posts(db_session, post_ids, fields)
+    return posts, next_cursor, etag
+
+
+async def search_posts(
+    db_session: AsyncSession,
+    query: str,
+    skip: int = 0,
+    limit: int = 10,
+    fields: Fields = None,
+    if_none_match: Optional[str] = None,
+):
+    """Search published posts, best match first"""
+    post_ids = await search_post_ids(db_session, query, skip, limit)
+    etag = await page_etag(db_session, post_ids, None)
+    check_not_modified(if_none_match, etag)
+    posts = await load_listed_posts(db_session, post_ids, fields)
+    return posts, etag
 
 
 async def get_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     current_user: Optional[User] = None,
+    if_none_match: Optional[str] = None,
 ):
-    """Get a specific post by ID"""
-    post = db_session.get(Post, post_id)
-    if not post:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND, detail="Post not found."
+    """
+    Get a specific post by ID, with its ETag. When the post is not cached,
+    a conditional request is first checked against its version columns,
+    so a 304 never loads the post's body or relations.
+    """
+
+    def check_visible(published: bool, author_username: str):
+        # If post is not published, only the author can view it
+        if not published and (
+            not current_user or current_user.username != author_username
+        ):
+            raise HTTPException(
+                status_code=HTTP_403_FORBIDDEN, detail="Post not available."
+            )
+
+    async def load_post():
+        post = await get_post_with_relations(db_session, post_id)
+        if not post:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND, detail="Post not found."
+            )
+        await render_stale_posts(db_session, [post])
+        return post.to_dto()
+
+    post = await post_cache.get_cached_post(post_id)
+    if post is None and if_none_match:
+        version = (
+            await db_session.exec(
+                select(
+                    Post.last_modified,
+                    Post.like_count,
+                    Post.comment_count,
+                    Post.published,
+                    Post.author_username,
+                ).where(Post.post_id == post_id)
+            )
+        ).first()
+        if not version:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND, detail="Post not found."
+            )
+        check_visible(version.published, version.author_username)
+        check_not_modified(
+            if_none_match,
+            make_etag(
+                post_version(
+                    post_id,
+                    version.last_modified,
+                    version.like_count,
+                    version.comment_count,
+                )
+            ),
         )
-
-    # If post is not published, only the author can view it
-    if not post.published and (
-        not current_user or current_user.username != post.author_username
-    ):
-        raise HTTPException(
-            status_code=HTTP_403_FORBIDDEN, detail="Post not available."
+    if post is None:
+        post = await post_cache.get_post(post_id, load_post)
+
+    check_visible(post.published, post.author_username)
+    etag = make_etag(
+        post_version(
+            post.post_id,
+            post.last_modified,
+            post.like_count,
+            post.comments_count,
         )
-
-    return post
+    )
+    check_not_modified(if_none_match, etag)
+    return post, etag
 
 
 async def create_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_data: PostCreateDTO,
     current_user: User,
 ):
@@ -78,66 +468,38 @@ async def create_post(
         last_modified=now,
         title=post_data.title,
         description=post_data.description,
-        content=post_data.content,
         published=post_data.published,
+        body=PostBody(content=post_data.content),
     )
+    render_post(post)
 
     # Add tags if provided
     if post_data.tags:
-        for tag_name in post_data.tags:
-            # Check if tag exists, create if not
-            tag_query = select(PostTag).where(PostTag.name == tag_name)
-            tag = db_session.exec(tag_query).first()
-            if not tag:
-                tag = PostTag(name=tag_name)
-                db_session.add(tag)
-                db_session.commit()
-                db_session.refresh(tag)
-            post.tags.append(tag)
-
-    permission = create_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        action_name=ACTION_CRUD,
-    )
+        post.tags = await upsert_tags(db_session, post_data.tags)
 
     db_session.add(post)
-    db_session.add(permission)
-    db_session.commit()
-    db_session.refresh(post)
+    await index_post(db_session, post)
+    await db_session.commit()
+    await post_cache.invalidate_pages()
+    post = await get_post_with_relations(db_session, post.post_id)
     return post.to_dto()
 
 
 async def update_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     post_data: PostUpdateDTO,
     current_user: User,
 ):
     """Update an existing post"""
-    post = db_session.get(Post, post_id)
+    post = await get_post_with_relations(db_session, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Only the author can update the post
-    if not has_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        action_name=ACTION_UPDATE,
-        bypass_role=None,
-    ) or has_crud_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        bypass_role=None,
-    ):
+    if not await can_update_post(db_session, current_user, post):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to update this post",
@@ -149,135 +511,158 @@ async def update_post(
     if post_data.description is not None:
         post.description = post_data.description
     if post_data.content is not None:
-        post.content = post_data.content
+        post.body.content = post_data.content
     if post_data.published is not None:
         post.published = post_data.published
 
     post.last_modified = datetime.utcnow()
     post.modified = True
+    render_post(post)
 
     # Update tags if provided
     if post_data.tags is not None:
-        # Clear existing tags
-        post.tags = []
-
-        # Add new tags
-        for tag_name in post_data.tags:
-            tag_query = select(PostTag).where(PostTag.name == tag_name)
-            tag = db_session.exec(tag_query).first()
-            if not tag:
-                tag = PostTag(name=tag_name)
-                db_session.add(tag)
-                db_session.commit()
-                db_session.refresh(tag)
-            post.tags.append(tag)
+        post.tags = await upsert_tags(db_session, post_data.tags)
 
     db_session.add(post)
-    db_session.commit()
-    db_session.refresh(post)
+    await index_post(db_session, post)
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
+    # Publishing or retagging changes which listings the post belongs to
+    if post_data.published is not None or post_data.tags is not None:
+        await post_cache.invalidate_pages()
     return post.to_dto()
 
 
 async def delete_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     current_user: User,
 ):
     """Delete a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
-    # Only the author can delete the post
-    if not has_permission(
+    # Only the author, explicit grantees and admins can delete the post
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        action_name=ACTION_CRUD,
+        user=current_user,
+        owner_username=post.author_username,
         bypass_role="admin",
-    ) or has_crud_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
         resource_name=POST_RESOURCE,
         resource_id=str(post.post_id),
-        bypass_role="admin",
+        action_name=ACTION_DELETE,
     ):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this post",
         )
 
-    db_session.delete(post)
-    db_session.commit()
+    await db_session.delete(post)
+    await unindex_post(db_session, post_id)
+    await revoke_resource_permissions(
+        db_session, POST_RESOURCE, str(post_id), commit=False
+    )
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
+    await post_cache.invalidate_pages()
     return {"message": "Post deleted successfully"}
 
 
 async def like_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     current_user: User,
 ):
     """Like a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Check if user already liked the post
-    if current_user in post.liked_by:
+    like = await db_session.get(
+        UserPostLikeLink, (post_id, current_user.username)
+    )
+    if like:
         return {"message": "Post already liked"}
 
-    post.liked_by.append(current_user)
-    db_session.commit()
-    return post.get_likes_count()
+    db_session.add(
+        UserPostLikeLink(post_id=post_id, username=current_user.username)
+    )
+    like_count = (
+        await db_session.exec(
+            update(Post)
+            .where(Post.post_id == post_id)
+            .values(like_count=Post.like_count + 1)
+            .returning(Post.like_count)
+        )
+    ).scalar_one()
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
+    return like_count
 
 
 async def has_liked_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     current_user: User,
 ):
     """Check if the user has liked a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Check if user liked the post
-    return current_user in post.liked_by
+    like = await db_session.get(
+        UserPostLikeLink, (post_id, current_user.username)
+    )
+    return like is not None
 
 
 async def unlike_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     current_user: User,
 ):
     """Unlike a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Check if user liked the post
-    if current_user not in post.liked_by:
+    like = await db_session.get(
+        UserPostLikeLink, (post_id, current_user.username)
+    )
+    if not like:
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="User has not liked this post.",
         )
 
-    post.liked_by.remove(current_user)
-    db_session.commit()
-    return post.get_likes_count()
+    await db_session.delete(like)
+    like_count = (
+        await db_session.exec(
+            update(Post)
+            .where(Post.post_id == post_id)
+            .values(like_count=Post.like_count - 1)
+            .returning(Post.like_count)
+        )
+    ).scalar_one()
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
+    return like_count
 
 
 async def add_media_to_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     media_id: UUID,
     description: str,
@@ -285,34 +670,21 @@ async def add_media_to_post(
     current_user: User,
 ):
     """Add media to a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Only the author can add media to the post
-    if not has_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        action_name=ACTION_UPDATE,
-        bypass_role=None,
-    ) or has_crud_permission(
-        db_session=db_session,
-        role_id=current_user.role_id,
-        resource_name=POST_RESOURCE,
-        resource_id=str(post.post_id),
-        bypass_role=None,
-    ):
+    if not await can_update_post(db_session, current_user, post):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to update this post",
         )
 
     # Check if media exists
-    media = db_session.get(Media, media_id)
+    media = await db_session.get(Media, media_id)
     if not media:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Media not found"
@@ -327,47 +699,53 @@ async def add_media_to_post(
 
     # If this is a cover image, set all other media for this post to not be covers
     if is_cover:
-        existing_covers = db_session.exec(
-            select(PostMedia)
-            .where(PostMedia.post_id == post_id)
-            .where(PostMedia.cover_image == True)
+        existing_covers = (
+            await db_session.exec(
+                select(PostMedia)
+                .where(PostMedia.post_id == post_id)
+                .where(PostMedia.cover_image == True)
+            )
         ).all()
         for cover in existing_covers:
             cover.cover_image = False
             db_session.add(cover)
 
     db_session.add(post_media)
-    db_session.commit()
-    db_session.refresh(post_media)
-
+    post.last_modified = datetime.utcnow()
+    db_session.add(post)
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
+    post = await get_post_with_relations(db_session, post_id)
     return post.to_dto()
 
 
 async def remove_media_from_post(
-    db_session: Session,
+    db_session: AsyncSession,
     post_id: UUID,
     media_id: UUID,
     current_user: User,
 ):
     """Remove media from a post"""
-    post = db_session.get(Post, post_id)
+    post = await db_session.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="Post not found"
         )
 
     # Only the author can remove media from the post
-    if post.author_username != current_user.username:
+    if not await can_update_post(db_session, current_user, post):
         raise HTTPException(
             status_code=HTTP_403_FORBIDDEN,
             detail="Not authorized to update this post",
         )
 
     # Find post media link
-    post_media = db_session.exec(
-        select(PostMedia)
-        .where(PostMedia.post_id == post_id)
-        .where(PostMedia.media_id == media_id)
+    post_media = (
+        await db_session.exec(
+            select(PostMedia)
+            .where(PostMedia.post_id == post_id)
+            .where(PostMedia.media_id == media_id)
+        )
     ).first()
 
     if not post_media:
@@ -376,7 +754,11 @@ async def remove_media_from_post(
             detail="Media not attached to this post",
         )
 
-    db_session.delete(post_media)
-    db_session.commit()
+    await db_session.delete(post_media)
+    post.last_modified = datetime.utcnow()
+    db_session.add(post)
+    await db_session.commit()
+    await post_cache.invalidate_post(post_id)
 
+    post = await get_post_with_relations(db_session, post_id)
     return post.to_dto()
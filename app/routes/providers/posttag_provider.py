@@ -1,30 +1,89 @@
-from sqlmodel import Session, select
+from typing import Optional
 
-from app.db.models import Post, PostTag
+from fastapi import HTTPException
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.db.models import Post, PostTag, PostTagLink
+from app.routes.providers.post_provider import (
+    Fields,
+    load_listed_posts,
+    page_etag,
+    paginate_posts,
+    split_page,
+)
+from app.services import post_cache
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.etag import check_not_modified, make_etag
 
 
 async def get_tags(
-    db_session: Session,
+    db_session: AsyncSession,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = None,
 ):
     """Get all post tags"""
-    tags = db_session.exec(select(PostTag).offset(skip).limit(limit)).all()
-    return [tag.to_dto() for tag in tags]
+    query = select(PostTag).order_by(PostTag.name)
+    if cursor:
+        try:
+            (name,) = decode_cursor(cursor)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+            )
+        query = query.where(PostTag.name > name)
+    else:
+        query = query.offset(skip)
+
+    tags = (await db_session.exec(query.limit(limit + 1))).all()
+    next_cursor = None
+    if len(tags) > limit:
+        tags = tags[:limit]
+        next_cursor = encode_cursor(tags[-1].name)
+    # Tags are never renamed, so a page's version is the tags on it
+    etag = make_etag(
+        next_cursor, *((str(tag.tag_id), tag.name) for tag in tags)
+    )
+    check_not_modified(if_none_match, etag)
+    return [tag.to_dto() for tag in tags], next_cursor, etag
 
 
 async def get_posts_by_tag(
-    db_session: Session,
+    db_session: AsyncSession,
     tag_name: str,
     skip: int = 0,
     limit: int = 10,
     published_only: bool = True,
+    cursor: Optional[str] = None,
+    fields: Fields = None,
+    if_none_match: Optional[str] = None,
 ):
     """Get all posts with a specific tag"""
-    query = select(Post).join(PostTag).where(PostTag.name == tag_name)
+    query = (
+        select(Post.post_id, Post.created_at)
+        .join(PostTagLink)
+        .join(PostTag)
+        .where(PostTag.name == tag_name)
+    )
 
     if published_only:
         query = query.where(Post.published)
 
-    posts = db_session.exec(query.offset(skip).limit(limit)).all()
-    return posts
+    async def load_page():
+        page = paginate_posts(query, skip, limit, cursor)
+        rows, next_cursor = split_page(
+            (await db_session.exec(page)).all(), limit
+        )
+        return [row.post_id for row in rows], next_cursor
+
+    post_ids, next_cursor = await post_cache.get_page(
+        ["tag", tag_name, skip, limit, published_only, cursor],
+        load_page,
+    )
+    etag = await page_etag(db_session, post_ids, next_cursor)
+    check_not_modified(if_none_match, etag)
+    posts = await load_listed_posts(db_session, post_ids, fields)
+    return posts, next_cursor, etag
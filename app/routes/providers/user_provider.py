@@ -1,63 +1,115 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import (
     HTTP_401_UNAUTHORIZED,
     HTTP_404_NOT_FOUND,
 )
 
-from app.db.models import Post, User, WhiteListedEmail
+from app.db.counters import discount_user
+from app.db.models import Media, Post, User, WhiteListedEmail
+from app.db.search import unindex_posts
 from app.dto.user_dto import UserDTO
+from app.routes.providers.post_provider import (
+    Fields,
+    load_listed_posts,
+    paginate_posts,
+    post_version,
+    split_page,
+)
 from app.security.permission import (
     ACTION_CRUD,
+    ACTION_READ,
     ADMIN_ACTION,
     USER_RESOURCE,
+    has_owner_permission,
     has_permission,
 )
+from app.security.session_cache import invalidate_user
+from app.services import post_cache
+from app.services.last_login import forget_activity
+from app.storage.blobs import collect_blobs, release_blobs
+from app.utils.etag import check_not_modified, make_etag
 
 
 async def get_user_posts(
-    db_session: Session,
+    db_session: AsyncSession,
     current_user: User,
     username: str,
     skip: int = 0,
     limit: int = 10,
     published_only: bool = True,
+    cursor: Optional[str] = None,
+    fields: Fields = None,
+    if_none_match: Optional[str] = None,
 ):
-    """Get all posts by a specific user"""
-    query = select(Post).where(Post.author_username == username)
+    """
+    Get all posts by a specific user. The page is first selected as version
+    columns only, so a matching If-None-Match is answered before any post
+    is loaded; the posts themselves come from the post cache.
+    """
+    query = select(
+        Post.post_id,
+        Post.created_at,
+        Post.last_modified,
+        Post.like_count,
+        Post.comment_count,
+    ).where(Post.author_username == username)
 
     # If requesting user is not the author, only show published posts
-    if published_only and (
-        has_permission(
-            db_session=db_session,
-            role_id=current_user.role_id,
-            resource_name=USER_RESOURCE,
-            resource_id=username,
-            action_name=ACTION_CRUD,
-            bypass_role="admin",
-        )
+    if published_only or not await has_owner_permission(
+        db_session=db_session,
+        user=current_user,
+        owner_username=username,
+        bypass_role="admin",
+        resource_name=USER_RESOURCE,
+        resource_id=username,
+        action_name=ACTION_READ,
     ):
         query = query.where(Post.published)
 
-    posts = db_session.exec(query.offset(skip).limit(limit)).all()
-    return posts
+    query = paginate_posts(query, skip, limit, cursor)
+    rows, next_cursor = split_page((await db_session.exec(query)).all(), limit)
+    etag = make_etag(
+        next_cursor,
+        *(
+            post_version(
+                row.post_id,
+                row.last_modified,
+                row.like_count,
+                row.comment_count,
+            )
+            for row in rows
+        ),
+    )
+    check_not_modified(if_none_match, etag)
+    posts = await load_listed_posts(
+        db_session, [row.post_id for row in rows], fields
+    )
+    return posts, next_cursor, etag
 
 
 async def get_user_profile(
-    db_session: Session,
+    db_session: AsyncSession,
     username: str,
 ):
     """Get a user's public profile"""
-    user = db_session.get(User, username)
+    user = await db_session.get(User, username)
     if not user:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND, detail="User not found"
         )
 
     # Get post count
-    post_count = len(user.posts)
+    post_count = (
+        await db_session.exec(
+            select(func.count())
+            .select_from(Post)
+            .where(Post.author_username == username)
+        )
+    ).one()
     return UserDTO(
         username=user.username,
         display_name=user.display_name,
@@ -72,14 +124,15 @@ async def get_user_profile(
     )
 
 
-async def get_user_email(db_session: Session, user: User):
-    if not has_permission(
+async def get_user_email(db_session: AsyncSession, user: User):
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role="admin",
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role="admin",
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -108,16 +161,17 @@ WorkIndustries = Literal[
 
 
 async def change_work_industry(
-    db_session: Session, user: User, industry: WorkIndustries
+    db_session: AsyncSession, user: User, industry: WorkIndustries
 ):
     """Change the work industry of a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role=None,
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role=None,
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -126,20 +180,22 @@ async def change_work_industry(
 
     user.work_industry = industry
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    invalidate_user(user.username)
     return user.to_dto()
 
 
-async def change_bio(db_session: Session, user: User, bio: str):
+async def change_bio(db_session: AsyncSession, user: User, bio: str):
     """Change the bio of a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role=None,
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role=None,
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -148,20 +204,22 @@ async def change_bio(db_session: Session, user: User, bio: str):
 
     user.bio = bio
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    invalidate_user(user.username)
     return user.to_dto()
 
 
-async def change_location(db_session: Session, user: User, location: str):
+async def change_location(db_session: AsyncSession, user: User, location: str):
     """Change the location of a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role=None,
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role=None,
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -170,20 +228,22 @@ async def change_location(db_session: Session, user: User, location: str):
 
     user.location = location
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    invalidate_user(user.username)
     return user.to_dto()
 
 
-async def change_work_title(db_session: Session, user: User, title: str):
+async def change_work_title(db_session: AsyncSession, user: User, title: str):
     """Change the work title of a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role=None,
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role=None,
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -192,44 +252,80 @@ async def change_work_title(db_session: Session, user: User, title: str):
 
     user.work_title = title
     db_session.add(user)
-    db_session.commit()
-    db_session.refresh(user)
+    await db_session.commit()
+    await db_session.refresh(user)
+    invalidate_user(user.username)
     return user.to_dto()
 
 
-async def unsubscribe(db_session: Session, user: User):
+async def delete_account(db_session: AsyncSession, user: User):
+    """Delete a user along with their posts, and forget them everywhere"""
+    post_ids = list(
+        (
+            await db_session.exec(
+                select(Post.post_id).where(
+                    Post.author_username == user.username
+                )
+            )
+        ).all()
+    )
+    media_hashes = list(
+        (
+            await db_session.exec(
+                select(Media.sha256).where(
+                    Media.uploader_username == user.username
+                )
+            )
+        ).all()
+    )
+    await unindex_posts(db_session, post_ids)
+    await release_blobs(db_session, media_hashes)
+    # Posts of others the user liked or commented on change counts too
+    post_ids += await discount_user(db_session, user.username)
+    await db_session.delete(user)
+    await db_session.commit()
+    invalidate_user(user.username)
+    forget_activity(user.username)
+    await post_cache.invalidate_posts(post_ids)
+    if post_ids:
+        await post_cache.invalidate_pages()
+    await collect_blobs(db_session, media_hashes)
+
+
+async def unsubscribe(db_session: AsyncSession, user: User):
     """Unsubscribe a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role=None,
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role=None,
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
             detail="Not authorized to access this resource",
         )
 
-    db_session.delete(user)
-    db_session.commit()
+    await delete_account(db_session, user)
     return {"detail": "User unsubscribed successfully."}
 
 
 async def delete_user(
-    db_session: Session,
+    db_session: AsyncSession,
     user: User,
     whitelist: bool = False,
 ):
     """Delete a role from a user"""
-    if not has_permission(
+    if not await has_owner_permission(
         db_session=db_session,
-        role_id=user.role_id,
+        user=user,
+        owner_username=user.username,
+        bypass_role="admin",
         resource_name=USER_RESOURCE,
         resource_id=user.username,
         action_name=ACTION_CRUD,
-        bypass_role="admin",
     ):
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED,
@@ -237,7 +333,7 @@ async def delete_user(
         )
 
     if whitelist:
-        if not has_permission(
+        if not await has_permission(
             db_session=db_session,
             role_id=user.role_id,
             resource_name=USER_RESOURCE,
@@ -251,8 +347,7 @@ async def delete_user(
             )
         db_session.add(WhiteListedEmail(email=user.email))
 
-    db_session.delete(user)
-    db_session.commit()
+    await delete_account(db_session, user)
     return {"detail": "User deleted successfully."}
 
 
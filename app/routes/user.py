@@ -1,42 +1,61 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Header, Query, Response
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.db.models import Post, User
+from app.db.models import User
 from app.db.setup import get_db_session
+from app.dto.post_dto import PostSummaryDTO
 from app.dto.user_dto import UserDTO
-from app.routes.providers import user_provider
+from app.routes.providers import post_provider, user_provider
 from app.routes.providers.auth_provider import get_current_user
+from app.utils.cursor import NEXT_CURSOR_HEADER
+from app.utils.etag import ETAG_HEADER
 
 user_router = APIRouter()
 
 
-@user_router.get("/{username}/posts", response_model=List[Post])
+@user_router.get("/{username}/posts", response_model=List[PostSummaryDTO])
 async def read_user_posts(
     current_user: Annotated[User, Depends(get_current_user)],
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     username: str,
+    response: Response,
+    fields: Annotated[
+        post_provider.Fields, Depends(post_provider.parse_fields)
+    ],
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     published_only: bool = Query(True),
+    cursor: Optional[str] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
 ):
     """Get all posts by a specific user"""
-    posts = await user_provider.get_user_posts(
+    posts, next_cursor, etag = await user_provider.get_user_posts(
         db_session=db_session,
         current_user=current_user,
         username=username,
         skip=skip,
         limit=limit,
         published_only=published_only,
+        cursor=cursor,
+        fields=fields,
+        if_none_match=if_none_match,
+    )
+    response.headers[ETAG_HEADER] = etag
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(
+        content=post_provider.serialize_posts(posts, fields),
+        media_type="application/json",
+        headers=response.headers,
     )
-    return posts
 
 
 @user_router.get("/user/{username}", response_model=UserDTO)
 async def read_user_profile(
     username: str,
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
 ):
     """Get a user's public profile"""
     profile = await user_provider.get_user_profile(
@@ -48,7 +67,7 @@ async def read_user_profile(
 
 @user_router.get("/me/email", response_model=str)
 async def read_user_email(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Get the current user's email address"""
@@ -62,7 +81,7 @@ async def read_user_email(
 @user_router.put("/me/industry", response_model=UserDTO)
 async def update_work_industry(
     industry: user_provider.WorkIndustries,
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Update the current user's work industry"""
@@ -77,7 +96,7 @@ async def update_work_industry(
 @user_router.put("/me/bio", response_model=UserDTO)
 async def update_bio(
     bio: str,
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Update the current user's bio"""
@@ -92,7 +111,7 @@ async def update_bio(
 @user_router.put("/me/location", response_model=UserDTO)
 async def update_location(
     location: str,
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Update the current user's location"""
@@ -107,7 +126,7 @@ async def update_location(
 @user_router.put("/me/work-title", response_model=UserDTO)
 async def update_work_title(
     title: str,
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Update the current user's work title"""
@@ -121,7 +140,7 @@ async def update_work_title(
 
 @user_router.post("/account/unsubscribe")
 async def unsubscribe(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Unsubscribe the current user"""
@@ -133,7 +152,7 @@ async def unsubscribe(
 
 @user_router.delete("/account/delete")
 async def delete_account(
-    db_session: Annotated[Session, Depends(get_db_session)],
+    db_session: Annotated[AsyncSession, Depends(get_db_session)],
     current_user: Annotated[User, Depends(get_current_user)],
 ):
     """Delete the current user's account"""
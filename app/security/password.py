@@ -1,11 +1,58 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.config import env
+
+BCRYPT_ROUNDS = int(env.get_env("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(env.get_env("PASSWORD_HASH_WORKERS", "4"))
+
+# Hashes below the configured cost count as outdated and are replaced on
+# the next successful login.
+password_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the
+# event loop while bounding how many hashes run at once.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, password_context.hash, password
+    )
 
 
-def hash_password(password: str) -> str:
-    return password_context.hash(password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor,
+        password_context.verify,
+        plain_password,
+        hashed_password,
+    )
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return password_context.verify(plain_password, hashed_password)
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verifies a password and, when its hash uses an outdated cost, returns
+    a replacement hash as the second element.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor,
+        password_context.verify_and_update,
+        plain_password,
+        hashed_password,
+    )
@@ -1,16 +1,18 @@
 from typing import Literal, Optional
 
 from fastapi import HTTPException
-from sqlmodel import Session, select
+from sqlmodel import delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_404_NOT_FOUND, HTTP_409_CONFLICT
 
-from app.db.models import Permission, Role
+from app.db.models import Permission, Role, User
 
 POST_RESOURCE = "post"
 COMMENT_RESOURCE = "comment"
 USER_RESOURCE = "user"
 MEDIA_RESOURCE = "media"
 TAG_RESOURCE = "tag"
+METRICS_RESOURCE = "metrics"
 
 ACTION_CREATE = "create"
 ACTION_READ = "read"
@@ -19,113 +21,249 @@ ACTION_DELETE = "delete"
 ACTION_CRUD = "crud"
 ADMIN_ACTION = "admin_action"
 
+# Actions the owner of a resource holds without any stored permission
+OWNER_ACTIONS = {
+    ACTION_CREATE,
+    ACTION_READ,
+    ACTION_UPDATE,
+    ACTION_DELETE,
+    ACTION_CRUD,
+}
 
-def create_global_permission(
+RoleType = Literal["admin", "user", "moderator"]
+
+# Resource id stored on global permissions
+GLOBAL_RESOURCE_ID = ""
+
+
+class RolePermissions:
+    """
+    A role's type and all its (resource type, resource id, action)
+    grants, loaded in one query so that checks are set lookups.
+    """
+
+    def __init__(self, role_type: str, grants: set[tuple[str, str, str]]):
+        self.role_type = role_type
+        self.grants = grants
+
+    def allows(
+        self,
+        bypass_role: Optional[RoleType],
+        resource_name: str,
+        resource_id: str,
+        action_name: str,
+    ) -> bool:
+        if self.role_type == bypass_role:
+            return True
+        return (resource_name, resource_id, action_name) in self.grants
+
+    def allows_global(
+        self,
+        bypass_role: Optional[RoleType],
+        resource_name: str,
+        action_name: str,
+    ) -> bool:
+        if self.role_type == bypass_role:
+            return True
+        return (
+            resource_name,
+            GLOBAL_RESOURCE_ID,
+            action_name,
+        ) in self.grants
+
+
+async def get_role_permissions(
+    db_session: AsyncSession, role_id: str
+) -> RolePermissions:
+    """
+    Returns the permissions of a role, loading them at most once per
+    database session, i.e. once per request.
+    """
+    loaded = db_session.info.setdefault("role_permissions", {})
+    if role_id in loaded:
+        return loaded[role_id]
+
+    rows = (
+        await db_session.exec(
+            select(
+                Role.role_type,
+                Permission.resource_type,
+                Permission.resource_id,
+                Permission.action,
+            )
+            .outerjoin(Permission, Permission.role_id == Role.role_id)
+            .where(Role.role_id == role_id)
+        )
+    ).all()
+    if not rows:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND, detail="Role not found."
+        )
+    role_permissions = RolePermissions(
+        role_type=rows[0][0],
+        grants={
+            (resource_type, resource_id, action)
+            for _, resource_type, resource_id, action in rows
+            if resource_type is not None
+        },
+    )
+    loaded[role_id] = role_permissions
+    return role_permissions
+
+
+def _remember_permission(db_session: AsyncSession, permission: Permission):
+    loaded = db_session.info.get("role_permissions", {})
+    if permission.role_id in loaded:
+        loaded[permission.role_id].grants.add(
+            (
+                permission.resource_type,
+                permission.resource_id,
+                permission.action,
+            )
+        )
+
+
+async def create_global_permission(
     role_id: str,
-    db_session: Session,
+    db_session: AsyncSession,
     resource_name: str,
     action_name: str,
     commit: bool = True,
 ):
-    role = db_session.get(Role, role_id)
-    if not role:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND, detail="Role not found."
-        )
-    permission_in_db = db_session.exec(
-        select(Permission).where(
-            Permission.role_id == role_id,
-            Permission.name == f"{resource_name}:{action_name}",
-        )
-    ).first()
-    if permission_in_db:
+    role_permissions = await get_role_permissions(db_session, role_id)
+    if role_permissions.allows_global(None, resource_name, action_name):
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
             detail="The user already has this permission.",
         )
     permission = Permission(
-        name=f"{resource_name}:{action_name}",
         role_id=role_id,
+        resource_type=resource_name,
+        resource_id=GLOBAL_RESOURCE_ID,
+        action=action_name,
     )
+    _remember_permission(db_session, permission)
     if commit:
         db_session.add(permission)
-        db_session.commit()
-        db_session.refresh(permission)
+        await db_session.commit()
+        await db_session.refresh(permission)
     else:
         db_session.add(permission)
         return permission
 
 
-def create_permission(
+async def create_permission(
     role_id: str,
-    db_session: Session,
+    db_session: AsyncSession,
     resource_name: str,
     resource_id: str,
     action_name: str,
     commit: bool = True,
 ):
-    role = db_session.get(Role, role_id)
-    if not role:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND, detail="Role not found."
-        )
-    permission_in_db = db_session.exec(
-        select(Permission).where(
-            Permission.role_id == role_id,
-            Permission.name == f"{resource_name}:{resource_id}:{action_name}",
-        )
-    ).first()
-    if permission_in_db:
+    role_permissions = await get_role_permissions(db_session, role_id)
+    if role_permissions.allows(None, resource_name, resource_id, action_name):
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
             detail="The user already has this permission.",
         )
     permission = Permission(
-        name=f"{resource_name}:{resource_id}:{action_name}",
         role_id=role_id,
+        resource_type=resource_name,
+        resource_id=resource_id,
+        action=action_name,
     )
+    _remember_permission(db_session, permission)
     if commit:
         db_session.add(permission)
-        db_session.commit()
-        db_session.refresh(permission)
+        await db_session.commit()
+        await db_session.refresh(permission)
     else:
         db_session.add(permission)
         return permission
 
 
-def has_permission(
-    db_session: Session,
+async def revoke_resource_permissions(
+    db_session: AsyncSession,
+    resource_name: str,
+    resource_id: str,
+    commit: bool = True,
+):
+    """
+    Deletes every role's permissions on a resource, e.g. once the resource
+    itself is deleted.
+    """
+    await db_session.exec(
+        delete(Permission)
+        .where(Permission.resource_type == resource_name)
+        .where(Permission.resource_id == resource_id)
+    )
+    for role_permissions in db_session.info.get(
+        "role_permissions", {}
+    ).values():
+        role_permissions.grants = {
+            grant
+            for grant in role_permissions.grants
+            if grant[:2] != (resource_name, resource_id)
+        }
+    if commit:
+        await db_session.commit()
+
+
+async def has_permission(
+    db_session: AsyncSession,
     role_id: str,
-    bypass_role: Optional[Literal["admin", "user", "moderator"]],
+    bypass_role: Optional[RoleType],
     resource_name: str,
     resource_id: str,
     action_name: str,
 ) -> bool:
-    role = db_session.get(Role, role_id)
-    if not role:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND, detail="Role not found."
-        )
-    if role.role_type == bypass_role:
-        return True
+    role_permissions = await get_role_permissions(db_session, role_id)
+    return role_permissions.allows(
+        bypass_role, resource_name, resource_id, action_name
+    )
+
 
-    permission = db_session.exec(
-        select(Permission).where(
-            Permission.role_id == role_id,
-            Permission.name == f"{resource_name}:{resource_id}:{action_name}",
+async def has_owner_permission(
+    db_session: AsyncSession,
+    user: User,
+    owner_username: str,
+    bypass_role: Optional[RoleType],
+    resource_name: str,
+    resource_id: str,
+    action_name: str,
+) -> bool:
+    """
+    Owners may perform any CRUD action on their own resources, which
+    needs no query. Everyone else needs the action or CRUD granted
+    explicitly, or the bypass role.
+    """
+    if action_name not in OWNER_ACTIONS:
+        return await has_permission(
+            db_session=db_session,
+            role_id=user.role_id,
+            bypass_role=bypass_role,
+            resource_name=resource_name,
+            resource_id=resource_id,
+            action_name=action_name,
         )
-    ).first()
-    return permission is not None
+    if user.username == owner_username:
+        return True
+    role_permissions = await get_role_permissions(db_session, user.role_id)
+    return role_permissions.allows(
+        bypass_role, resource_name, resource_id, action_name
+    ) or role_permissions.allows(
+        bypass_role, resource_name, resource_id, ACTION_CRUD
+    )
 
 
-def has_crud_permission(
-    db_session: Session,
+async def has_crud_permission(
+    db_session: AsyncSession,
     role_id: str,
-    bypass_role: Optional[Literal["admin", "user", "moderator"]],
+    bypass_role: Optional[RoleType],
     resource_name: str,
     resource_id: str,
 ) -> bool:
-    return has_permission(
+    return await has_permission(
         db_session=db_session,
         role_id=role_id,
         bypass_role=bypass_role,
@@ -135,39 +273,28 @@ def has_crud_permission(
     )
 
 
-def has_global_permission(
-    db_session: Session,
+async def has_global_permission(
+    db_session: AsyncSession,
     role_id: str,
     bypass_role: Optional[
-        Literal["admin", "user", "moderator"]
+        RoleType
     ],  # Required role type (admin, user, moderator)
     resource_name: str,
     action_name: str,
 ) -> bool:
-    role = db_session.get(Role, role_id)
-    if not role:
-        raise HTTPException(
-            status_code=HTTP_404_NOT_FOUND, detail="Role not found."
-        )
-    if role.role_type == bypass_role:
-        return True
-
-    permission = db_session.exec(
-        select(Permission).where(
-            Permission.role_id == role_id,
-            Permission.name == f"{resource_name}:{action_name}",
-        )
-    ).first()
-    return permission is not None
+    role_permissions = await get_role_permissions(db_session, role_id)
+    return role_permissions.allows_global(
+        bypass_role, resource_name, action_name
+    )
 
 
-def has_global_crud_permission(
-    db_session: Session,
+async def has_global_crud_permission(
+    db_session: AsyncSession,
     role_id: str,
-    bypass_role: Optional[Literal["admin", "user", "moderator"]],
+    bypass_role: Optional[RoleType],
     resource_name: str,
 ) -> bool:
-    return has_global_permission(
+    return await has_global_permission(
         db_session=db_session,
         role_id=role_id,
         bypass_role=bypass_role,
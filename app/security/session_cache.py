@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import env
+from app.db.models import User
+from app.utils.cache import TTLCache
+
+SESSION_CACHE_SIZE = int(env.get_env("SESSION_CACHE_SIZE", "10000"))
+# Each worker has its own cache, so a session revoked through another
+# worker stays usable here for at most this many seconds.
+SESSION_CACHE_TTL = float(env.get_env("SESSION_CACHE_TTL", "60"))
+
+session_cache = TTLCache(capacity=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL)
+
+
+def cache_user(session_id: str, user: User, expires_at: datetime):
+    """
+    Caches the user resolved from a login session until the cache TTL or
+    the session expiry, whichever comes first.
+    """
+    # Keep a detached copy: the cached instance is shared between
+    # requests, so it must never belong to one of their sessions.
+    snapshot = User(**user.model_dump())
+    make_transient_to_detached(snapshot)
+    ttl = min(
+        SESSION_CACHE_TTL, (expires_at - datetime.utcnow()).total_seconds()
+    )
+    session_cache.set(session_id, snapshot, ttl=ttl)
+
+
+async def get_cached_user(
+    db_session: AsyncSession, session_id: str
+) -> Optional[User]:
+    """
+    Returns the cached user of a login session attached to `db_session`,
+    or None on a miss.
+    """
+    snapshot = session_cache.get(session_id)
+    if snapshot is None:
+        return None
+    # load=False copies the cached state in without querying the database
+    return await db_session.merge(snapshot, load=False)
+
+
+def invalidate_session(session_id: str):
+    session_cache.delete(session_id)
+
+
+def invalidate_user(username: str):
+    session_cache.delete_where(lambda _, user: user.username == username)
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import bindparam
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlmodel import update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.config import env
+from app.db.models import User
+from app.db.setup import engine
+from app.log.console import log_error
+
+_users = User.__table__
+# A Core executemany: unlike the ORM bulk UPDATE, it does not fail when
+# some of the users have been deleted since their activity was queued.
+_update_last_login = (
+    update(_users)
+    .where(_users.c.username == bindparam("b_username"))
+    .values(last_login=bindparam("b_last_login"))
+)
+
+# Seconds between two flushes; each user is written at most once per
+# interval however many requests they make.
+LAST_LOGIN_FLUSH_INTERVAL = float(
+    env.get_env("LAST_LOGIN_FLUSH_INTERVAL", "60")
+)
+
+_pending: dict[str, datetime] = {}
+
+
+def record_activity(username: str):
+    """
+    Queues a last_login update for the user instead of writing it now.
+    """
+    _pending[username] = datetime.utcnow()
+
+
+def forget_activity(username: str):
+    """Drops the queued last_login of a deleted user"""
+    _pending.pop(username, None)
+
+
+async def flush_last_logins():
+    """
+    Writes every queued last_login in a single batched UPDATE.
+    """
+    if not _pending:
+        return
+    batch = dict(_pending)
+    _pending.clear()
+    try:
+        async with AsyncSession(engine) as db_session:
+            await db_session.exec(
+                _update_last_login,
+                params=[
+                    {"b_username": username, "b_last_login": last_login}
+                    for username, last_login in batch.items()
+                ],
+            )
+            await db_session.commit()
+    except (OperationalError, InterfaceError, PoolTimeoutError, OSError):
+        # Requeue only when the database was unreachable or busy, keeping
+        # any newer activity recorded meanwhile. A batch failing for any
+        # other reason would fail again, and block every later flush.
+        for username, last_login in batch.items():
+            _pending.setdefault(username, last_login)
+        raise
+
+
+async def _flush_periodically():
+    while True:
+        await asyncio.sleep(LAST_LOGIN_FLUSH_INTERVAL)
+        try:
+            await flush_last_logins()
+        except Exception as e:
+            log_error(f"Failed to flush last_login updates: {e}")
+
+
+def start_last_login_flusher() -> asyncio.Task:
+    return asyncio.create_task(_flush_periodically())
+
+
+async def stop_last_login_flusher(flusher: asyncio.Task):
+    """
+    Stops the periodic flusher and writes whatever is still queued.
+    """
+    flusher.cancel()
+    try:
+        await flusher
+    except asyncio.CancelledError:
+        pass
+    try:
+        await flush_last_logins()
+    except Exception as e:
+        log_error(f"Failed to flush last_login updates: {e}")
@@ -0,0 +1,310 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from uuid import UUID
+
+from app.config import env
+from app.dto.post_dto import PostDTO, PostSummaryDTO
+from app.utils.cache import TTLCache
+
+POST_CACHE_SIZE = int(env.get_env("POST_CACHE_SIZE", "10000"))
+# Writes invalidate the posts they touch, so the TTL only bounds how long a
+# post can outlive a write made through another worker's in-process cache.
+POST_CACHE_TTL = float(env.get_env("POST_CACHE_TTL", "300"))
+# Listing pages only hold post ids and are dropped whenever a post appears,
+# disappears or changes tags. Their posts are cached as summaries, apart from
+# the full posts, so listings never load content.
+POST_LIST_CACHE_TTL = float(env.get_env("POST_LIST_CACHE_TTL", "60"))
+# Empty keeps the cache in-process; a redis:// URL shares it between workers.
+POST_CACHE_URL = env.get_env("POST_CACHE_URL", "")
+
+Page = tuple[list[UUID], Optional[str]]
+
+
+class MemoryCacheBackend:
+    """
+    In-process backend storing values as they are.
+    """
+
+    serializes = False
+
+    def __init__(self, capacity: int, ttl: float):
+        self.cache = TTLCache(capacity=capacity, ttl=ttl)
+        self.generation = 0
+
+    async def get_many(self, keys: list[str]) -> list[Any]:
+        return [self.cache.get(key) for key in keys]
+
+    async def set_many(self, items: dict[str, Any], ttl: float):
+        for key, value in items.items():
+            self.cache.set(key, value, ttl=ttl)
+
+    async def delete(self, keys: list[str]):
+        for key in keys:
+            self.cache.delete(key)
+
+    async def get_generation(self) -> int:
+        return self.generation
+
+    async def bump_generation(self):
+        self.generation += 1
+
+    def stats(self) -> dict:
+        return {"backend": "memory", **self.cache.stats()}
+
+
+class RedisCacheBackend:
+    """
+    Backend shared by every worker, storing values as JSON in Redis.
+    """
+
+    serializes = True
+    generation_key = "post_cache:generation"
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "POST_CACHE_URL requires the redis package, "
+                "install the `redis` extra."
+            ) from e
+        self.client = redis.from_url(url)
+
+    async def get_many(self, keys: list[str]) -> list[Any]:
+        return [
+            None if value is None else json.loads(value)
+            for value in await self.client.mget(keys)
+        ]
+
+    async def set_many(self, items: dict[str, Any], ttl: float):
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for key, value in items.items():
+                pipeline.set(key, json.dumps(value), px=int(ttl * 1000))
+            await pipeline.execute()
+
+    async def delete(self, keys: list[str]):
+        await self.client.delete(*keys)
+
+    async def get_generation(self) -> int:
+        return int(await self.client.get(self.generation_key) or 0)
+
+    async def bump_generation(self):
+        await self.client.incr(self.generation_key)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+if POST_CACHE_URL:
+    backend = RedisCacheBackend(POST_CACHE_URL)
+else:
+    backend = MemoryCacheBackend(POST_CACHE_SIZE, POST_CACHE_TTL)
+
+_inflight: dict[str, asyncio.Future] = {}
+_running_loads = 0
+# Keys invalidated while some load was running; that load's result may
+# predate the write and must not be cached.
+_invalidated_during_load: set[str] = set()
+
+
+def post_key(post_id: UUID) -> str:
+    return f"post:{post_id}"
+
+
+def summary_key(post_id: UUID) -> str:
+    return f"summary:{post_id}"
+
+
+def _encode(post: PostSummaryDTO) -> Any:
+    return post.model_dump(mode="json") if backend.serializes else post
+
+
+def _decode(value: Any, dto: type[PostSummaryDTO]) -> PostSummaryDTO:
+    return value if isinstance(value, dto) else dto.model_validate(value)
+
+
+async def _set_many(items: dict[str, Any], ttl: float):
+    items = {
+        key: value
+        for key, value in items.items()
+        if key not in _invalidated_during_load
+    }
+    if items:
+        await backend.set_many(items, ttl)
+
+
+async def _cache_posts(
+    posts: Iterable[PostSummaryDTO], key: Callable[[UUID], str] = post_key
+):
+    await _set_many(
+        {key(post.post_id): _encode(post) for post in posts},
+        POST_CACHE_TTL,
+    )
+
+
+@contextmanager
+def _loading():
+    global _running_loads
+    _running_loads += 1
+    try:
+        yield
+    finally:
+        _running_loads -= 1
+        if not _running_loads:
+            _invalidated_during_load.clear()
+
+
+async def _load_once(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Runs `load` for the first of concurrent misses on `key` and hands its
+    result to the others, so an expiring popular entry costs one database
+    load instead of a stampede. If that load fails, each waiter loads
+    for itself.
+    """
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        await asyncio.wait([inflight])
+        if not inflight.cancelled():
+            return inflight.result()
+        return await load()
+
+    inflight = asyncio.get_running_loop().create_future()
+    _inflight[key] = inflight
+    try:
+        result = await load()
+        inflight.set_result(result)
+        return result
+    finally:
+        if not inflight.done():
+            inflight.cancel()
+        del _inflight[key]
+
+
+async def get_cached_post(post_id: UUID) -> Optional[PostDTO]:
+    """
+    Returns the cached post, or None on a miss.
+    """
+    (cached,) = await backend.get_many([post_key(post_id)])
+    return None if cached is None else _decode(cached, PostDTO)
+
+
+async def get_post(
+    post_id: UUID, load: Callable[[], Awaitable[PostDTO]]
+) -> PostDTO:
+    """
+    Returns the cached post, loading and caching it with `load` on a miss.
+    """
+    post = await get_cached_post(post_id)
+    if post is not None:
+        return post
+    key = post_key(post_id)
+
+    async def load_and_cache() -> PostDTO:
+        with _loading():
+            post = await load()
+            await _cache_posts([post])
+        return post
+
+    return await _load_once(key, load_and_cache)
+
+
+async def _get_many(
+    post_ids: list[UUID],
+    load: Callable[[list[UUID]], Awaitable[list[PostSummaryDTO]]],
+    key: Callable[[UUID], str],
+    dto: type[PostSummaryDTO],
+) -> list:
+    cached = await backend.get_many([key(post_id) for post_id in post_ids])
+    posts = {
+        post_id: _decode(value, dto)
+        for post_id, value in zip(post_ids, cached)
+        if value is not None
+    }
+    missing = [post_id for post_id in post_ids if post_id not in posts]
+    if missing:
+        with _loading():
+            loaded = await load(missing)
+            await _cache_posts(loaded, key)
+        posts.update((post.post_id, post) for post in loaded)
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+
+async def get_posts(
+    post_ids: list[UUID],
+    load: Callable[[list[UUID]], Awaitable[list[PostDTO]]],
+) -> list[PostDTO]:
+    """
+    Returns the posts in the given order, loading only the uncached ones
+    with a single call to `load`. Posts that no longer exist are skipped.
+    """
+    return await _get_many(post_ids, load, post_key, PostDTO)
+
+
+async def get_summaries(
+    post_ids: list[UUID],
+    load: Callable[[list[UUID]], Awaitable[list[PostSummaryDTO]]],
+) -> list[PostSummaryDTO]:
+    """
+    Same as `get_posts`, for post summaries.
+    """
+    return await _get_many(post_ids, load, summary_key, PostSummaryDTO)
+
+
+async def get_page(
+    params: list, load_page: Callable[[], Awaitable[Page]]
+) -> Page:
+    """
+    Returns the post ids and next cursor of a listing page identified by
+    `params`. Pages hold no posts, so a page stays valid when the posts on
+    it change.
+    """
+    generation = await backend.get_generation()
+    key = "page:" + json.dumps([generation, *params], default=str)
+    (cached,) = await backend.get_many([key])
+    if cached is not None:
+        post_ids = [UUID(post_id) for post_id in cached["post_ids"]]
+        return post_ids, cached["next_cursor"]
+
+    async def load_and_cache() -> Page:
+        with _loading():
+            post_ids, next_cursor = await load_page()
+            page = {
+                "post_ids": [str(post_id) for post_id in post_ids],
+                "next_cursor": next_cursor,
+            }
+            await _set_many({key: page}, POST_LIST_CACHE_TTL)
+        return post_ids, next_cursor
+
+    return await _load_once(key, load_and_cache)
+
+
+async def invalidate_posts(post_ids: Iterable[UUID]):
+    """
+    Drops cached posts after they were written to.
+    """
+    keys = [
+        key(post_id) for post_id in post_ids for key in (post_key, summary_key)
+    ]
+    if not keys:
+        return
+    if _running_loads:
+        _invalidated_during_load.update(keys)
+    await backend.delete(keys)
+
+
+async def invalidate_post(post_id: UUID):
+    await invalidate_posts([post_id])
+
+
+async def invalidate_pages():
+    """
+    Drops every cached listing page, e.g. after a post was created,
+    deleted, (un)published or retagged.
+    """
+    await backend.bump_generation()
+
+
+def stats() -> dict:
+    return backend.stats()
@@ -0,0 +1,180 @@
+import asyncio
+import re
+import sys
+from datetime import datetime
+
+from markdown_it import MarkdownIt
+from markdown_it.token import Token
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Post, PostBody
+from app.db.setup import engine
+from app.dto.post_dto import TocEntryDTO
+from app.log.console import log_info, log_success
+from app.services import post_cache
+
+# Bump whenever the rendered output changes. Stored bodies are re-rendered
+# when next read, or all at once with `python -m app.services.render`.
+RENDER_VERSION = 1
+
+RENDER_BATCH_SIZE = 500
+EXCERPT_LENGTH = 280
+WORDS_PER_MINUTE = 200
+RENDERED_FIELDS = (
+    "content_html",
+    "excerpt",
+    "reading_time",
+    "toc",
+    "rendered_from",
+    "render_version",
+)
+
+# Raw HTML is escaped rather than passed through, and markdown-it refuses
+# javascript:, vbscript:, file: and non-image data: links, so the output is
+# safe to embed as is.
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(
+    ["table", "strikethrough"]
+)
+
+
+def _plain_text(inline: Token) -> str:
+    parts = []
+    for child in inline.children or []:
+        if child.type in ("softbreak", "hardbreak"):
+            parts.append(" ")
+        else:
+            parts.append(child.content)
+    return "".join(parts).strip()
+
+
+def _anchor(title: str, taken: set[str]) -> str:
+    slug = re.sub(r"[^\w\s-]", "", title.lower()).strip()
+    slug = re.sub(r"[\s-]+", "-", slug) or "section"
+    anchor, n = slug, 1
+    while anchor in taken:
+        anchor, n = f"{slug}-{n}", n + 1
+    taken.add(anchor)
+    return anchor
+
+
+def _excerpt(paragraphs: list[str]) -> str:
+    text = " ".join(paragraphs)
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    return text[:EXCERPT_LENGTH].rsplit(" ", 1)[0].rstrip(",;:.") + "…"
+
+
+def render_body(body: PostBody, last_modified: datetime):
+    """
+    Renders body.content to sanitised HTML with anchored headings, and
+    stores it with its excerpt, reading time and table of contents,
+    tagged with the post version it was rendered from.
+    """
+    tokens = _markdown.parse(body.content)
+    toc, anchors, paragraphs, words = [], set(), [], 0
+    for i, token in enumerate(tokens):
+        if token.type == "inline":
+            text = _plain_text(token)
+            words += len(text.split())
+            if tokens[i - 1].type == "paragraph_open":
+                paragraphs.append(text)
+        elif token.type in ("fence", "code_block"):
+            words += len(token.content.split())
+        elif token.type == "heading_open":
+            title = _plain_text(tokens[i + 1])
+            anchor = _anchor(title, anchors)
+            token.attrSet("id", anchor)
+            toc.append(
+                TocEntryDTO(
+                    level=int(token.tag[1]), title=title, anchor=anchor
+                )
+            )
+
+    body.content_html = _markdown.renderer.render(
+        tokens, _markdown.options, {}
+    )
+    body.excerpt = _excerpt(paragraphs)
+    body.reading_time = max(1, round(words / WORDS_PER_MINUTE))
+    body.toc = [entry.model_dump() for entry in toc]
+    body.rendered_from = last_modified
+    body.render_version = RENDER_VERSION
+
+
+def render_post(post: Post):
+    """Renders the post's loaded body from its current version"""
+    render_body(post.body, post.last_modified)
+
+
+async def render_stale_posts(db_session: AsyncSession, posts: list[Post]):
+    """
+    Renders the loaded bodies of `posts` that an older renderer produced,
+    or none did, and saves them. A body the post's author rewrote in the
+    meantime is already current and is left alone.
+    """
+    stale = [
+        post for post in posts if post.body.render_version < RENDER_VERSION
+    ]
+    if not stale:
+        return
+    for post in stale:
+        rendered = PostBody(post_id=post.post_id, content=post.body.content)
+        render_body(rendered, post.last_modified)
+        values = {field: getattr(rendered, field) for field in RENDERED_FIELDS}
+        await db_session.exec(
+            update(PostBody)
+            .where(PostBody.post_id == post.post_id)
+            .where(PostBody.render_version < RENDER_VERSION)
+            .values(**values)
+        )
+        # Loaded as rendered, so that nothing is left to flush
+        for field, value in values.items():
+            set_committed_value(post.body, field, value)
+    await db_session.commit()
+
+
+async def rerender_posts(db_session: AsyncSession, everything: bool = False):
+    """
+    Re-renders the bodies rendered by an older renderer, or all of them,
+    in batches, dropping the re-rendered posts from the post cache.
+
+    Args:
+        db_session (AsyncSession): The database session.
+        everything (bool): Whether to re-render up-to-date bodies too.
+    """
+    query = select(PostBody, Post.last_modified).join(Post)
+    if not everything:
+        query = query.where(PostBody.render_version < RENDER_VERSION)
+    query = query.order_by(PostBody.post_id).limit(RENDER_BATCH_SIZE)
+    last_id = None
+    while True:
+        batch = (
+            query
+            if last_id is None
+            else query.where(PostBody.post_id > last_id)
+        )
+        rows = (await db_session.exec(batch)).all()
+        if not rows:
+            return
+        post_ids = []
+        for body, last_modified in rows:
+            render_body(body, last_modified)
+            db_session.add(body)
+            post_ids.append(body.post_id)
+        await db_session.commit()
+        db_session.expunge_all()
+        await post_cache.invalidate_posts(post_ids)
+        last_id = post_ids[-1]
+
+
+async def main():
+    everything = "--all" in sys.argv[1:]
+    log_info("Re-rendering post bodies...")
+    async with AsyncSession(engine) as db_session:
+        await rerender_posts(db_session, everything)
+    log_success("Post bodies re-rendered.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
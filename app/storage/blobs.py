@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+import os
+from collections import Counter
+from typing import Optional
+
+import anyio
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import delete, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Blob, Media
+from app.db.setup import engine
+from app.log.console import log_info, log_success, log_warning
+from app.storage.storage import (
+    blob_path,
+    delete_blob,
+    delete_variants,
+    get_file_path,
+    move_to_blob,
+)
+
+# Stored files are content-addressed: every Media row with the same SHA-256
+# shares one blob, which counts its references. A blob whose count drops to
+# zero is deleted by collect_blobs, under its row lock, so that a concurrent
+# upload of the same content either reuses it first or recreates it after.
+
+MIGRATE_BATCH_SIZE = 100
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+async def store_blob(
+    db_session: AsyncSession, path: str, sha256: str, size: int
+) -> bool:
+    """
+    Adds a reference to the blob of `sha256`, storing the file at `path`
+    as that blob unless it is already stored. Call before adding the
+    referencing Media row, and commit afterwards; if the commit fails,
+    pass the hash to discard_blob.
+
+    Returns:
+        bool: Whether the file was moved into the store. If not, it is a
+        duplicate, for the caller to delete once committed.
+    """
+    while True:
+        ref_count = (
+            await db_session.exec(
+                update(Blob)
+                .where(Blob.sha256 == sha256)
+                .values(ref_count=Blob.ref_count + 1)
+                .returning(Blob.ref_count)
+            )
+        ).scalar_one_or_none()
+        if ref_count is not None:
+            break
+        try:
+            async with db_session.begin_nested():
+                db_session.add(Blob(sha256=sha256, size=size, ref_count=1))
+            ref_count = 1
+            break
+        except IntegrityError:
+            # Stored by a concurrent upload; reference theirs instead
+            continue
+
+    # A blob that was at zero references may already have lost its file
+    if ref_count > 1:
+        return False
+    await anyio.to_thread.run_sync(move_to_blob, path, sha256)
+    return True
+
+
+async def discard_blob(db_session: AsyncSession, sha256: str):
+    """
+    Rolls back a transaction that store_blob moved a file into the store
+    for, and deletes the file unless a committed Blob row owns it.
+    Without its row, collect_blobs could never find the file.
+    """
+    try:
+        await db_session.rollback()
+        if await db_session.get(Blob, sha256) is None:
+            await anyio.to_thread.run_sync(delete_blob, sha256)
+    except Exception as e:
+        log_warning(f"Failed to discard blob {sha256}: {e!r}")
+
+
+def _uploaded_by(sha256: str, username: str):
+    """Whether `username` already has a Media row with this content"""
+    return (
+        select(Media.media_id)
+        .where(Media.sha256 == sha256)
+        .where(Media.uploader_username == username)
+        .exists()
+    )
+
+
+async def add_blob_ref(
+    db_session: AsyncSession, sha256: str, username: str
+) -> Optional[int]:
+    """
+    Adds a reference to an already stored blob, for a new Media row with
+    the same content. Only blobs that `username` uploaded themselves can
+    be referenced, so that a hash alone never grants access to a file.
+    Returns the blob's size, or None if there is no such blob.
+    """
+    return (
+        await db_session.exec(
+            update(Blob)
+            .where(Blob.sha256 == sha256)
+            .where(Blob.ref_count > 0)
+            .where(_uploaded_by(sha256, username))
+            .values(ref_count=Blob.ref_count + 1)
+            .returning(Blob.size)
+        )
+    ).scalar_one_or_none()
+
+
+async def get_blob(
+    db_session: AsyncSession, sha256: str, username: str
+) -> Optional[Blob]:
+    """The blob of `sha256`, if it is stored and `username` uploaded it"""
+    return (
+        await db_session.exec(
+            select(Blob)
+            .where(Blob.sha256 == sha256)
+            .where(Blob.ref_count > 0)
+            .where(_uploaded_by(sha256, username))
+        )
+    ).first()
+
+
+async def release_blobs(db_session: AsyncSession, hashes: list[str]):
+    """
+    Drops one reference per entry of `hashes`, for Media rows about to be
+    deleted. Commit, then pass the same hashes to collect_blobs.
+    """
+    for sha256, count in Counter(filter(None, hashes)).items():
+        await db_session.exec(
+            update(Blob)
+            .where(Blob.sha256 == sha256)
+            .values(ref_count=Blob.ref_count - count)
+        )
+
+
+async def collect_blobs(db_session: AsyncSession, hashes: list[str]):
+    """Deletes the blobs among `hashes` that have no references left"""
+    hashes = list(set(filter(None, hashes)))
+    if not hashes:
+        return
+    unreferenced = (
+        await db_session.exec(
+            delete(Blob)
+            .where(Blob.sha256.in_(hashes))
+            .where(Blob.ref_count <= 0)
+            .returning(Blob.sha256)
+        )
+    ).all()
+    # The rows stay locked until the commit, so the files go first
+    for (sha256,) in unreferenced:
+        await anyio.to_thread.run_sync(delete_blob, sha256)
+    await db_session.commit()
+
+
+def hash_file(path: str) -> tuple[str, int]:
+    digest, size = hashlib.sha256(), 0
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+async def migrate_legacy_files(db_session: AsyncSession):
+    """
+    Moves the files stored under their media_id before the blob store
+    into it, in batches, merging duplicates.
+
+    Args:
+        db_session (AsyncSession): The database session.
+    """
+    query = (
+        select(Media)
+        .where(Media.sha256 == None)  # noqa: E711
+        .order_by(Media.media_id)
+        .limit(MIGRATE_BATCH_SIZE)
+    )
+    last_id = None
+    while True:
+        batch = (
+            query if last_id is None else query.where(Media.media_id > last_id)
+        )
+        medias = (await db_session.exec(batch)).all()
+        if not medias:
+            return
+        last_id = medias[-1].media_id
+        media_ids = [media.media_id for media in medias]
+        stored, duplicates = [], []
+        for media in medias:
+            path = get_file_path(media)
+            if not os.path.exists(path):
+                continue
+            sha256, size = await anyio.to_thread.run_sync(hash_file, path)
+            if await store_blob(db_session, path, sha256, size):
+                stored.append((sha256, path))
+            else:
+                duplicates.append(path)
+            media.sha256, media.size = sha256, size
+            db_session.add(media)
+        try:
+            await db_session.commit()
+        except BaseException:
+            await db_session.rollback()
+            # Put the files back where their Media rows still expect them
+            for sha256, path in stored:
+                await anyio.to_thread.run_sync(
+                    os.replace, blob_path(sha256), path
+                )
+            raise
+        db_session.expunge_all()
+        for path in duplicates:
+            await anyio.to_thread.run_sync(os.unlink, path)
+        # Their resized copies were cached under the media_id
+        for media_id in media_ids:
+            await anyio.to_thread.run_sync(delete_variants, str(media_id))
+
+
+async def main():
+    log_info("Moving media files into the blob store...")
+    async with AsyncSession(engine) as db_session:
+        await migrate_legacy_files(db_session)
+    log_success("Media files moved.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
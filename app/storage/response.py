@@ -0,0 +1,216 @@
+import os
+from secrets import token_hex
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, PlainTextResponse
+from starlette.types import Receive, Scope, Send
+
+PATHSEND = "http.response.pathsend"
+
+# Requests asking for more ranges than this get the whole file, as RFC 9110
+# allows, rather than a response made of thousands of tiny parts.
+MAX_RANGES = 16
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_ranges(
+    http_range: str, size: int
+) -> Optional[list[tuple[int, int]]]:
+    """
+    Parses a `Range: bytes=...` header into sorted, coalesced
+    [start, end) spans of a file of `size` bytes. Returns None when the
+    header should be ignored and the whole file served.
+
+    Raises:
+        RangeNotSatisfiable: If no requested range overlaps the file.
+    """
+    units, _, specs = http_range.partition("=")
+    if units.strip().lower() != "bytes":
+        return None
+    specs = [spec.strip() for spec in specs.split(",")]
+    if len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        first, dash, last = spec.partition("-")
+        if not dash or not (first or last):
+            return None
+        if not (first or "0").isdigit() or not (last or "0").isdigit():
+            return None
+        if not first:
+            # Suffix range: the last `last` bytes
+            if int(last) > 0 and size > 0:
+                ranges.append((max(0, size - int(last)), size))
+            continue
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+        if last and int(last) < start:
+            return None
+        if start < size:
+            ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class MediaFileResponse(FileResponse):
+    """
+    Streams a stored file in FileResponse.chunk_size chunks, so a download
+    holds one chunk in memory whatever the file size. Whole-file bodies are
+    handed to the server's sendfile instead when it offers the ASGI
+    pathsend extension.
+
+    Range requests get a 206 carrying only the requested spans, as one
+    body or as multipart/byteranges, and only those bytes are read from
+    storage. If-Range falls back to the whole file once the stored file
+    has changed.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if self.stat_result is None:
+            self.stat_result = await anyio.to_thread.run_sync(
+                os.stat, self.path
+            )
+            self.set_stat_headers(self.stat_result)
+        size = self.stat_result.st_size
+        send_header_only = scope["method"].upper() == "HEAD"
+
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        http_if_range = headers.get("if-range")
+        ranges = None
+        if http_range and (
+            http_if_range is None
+            or http_if_range
+            in (self.headers["etag"], self.headers["last-modified"])
+        ):
+            try:
+                ranges = parse_ranges(http_range, size)
+            except RangeNotSatisfiable:
+                response = PlainTextResponse(
+                    status_code=416,
+                    headers={
+                        "Content-Range": f"bytes */{size}",
+                        "Accept-Ranges": "bytes",
+                    },
+                )
+                return await response(scope, receive, send)
+
+        if ranges is None:
+            await self._send_file(scope, send, send_header_only)
+        elif len(ranges) == 1:
+            await self._send_range(send, *ranges[0], size, send_header_only)
+        else:
+            await self._send_ranges(send, ranges, size, send_header_only)
+
+        if self.background is not None:
+            await self.background()
+
+    async def _start(self, send: Send, status_code: int):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": self.raw_headers,
+            }
+        )
+
+    async def _end(self, send: Send, body: bytes = b""):
+        await send(
+            {"type": "http.response.body", "body": body, "more_body": False}
+        )
+
+    async def _send_span(self, send: Send, file, start: int, end: int):
+        await file.seek(start)
+        while start < end:
+            chunk = await file.read(min(self.chunk_size, end - start))
+            if not chunk:
+                break
+            start += len(chunk)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": True,
+                }
+            )
+
+    async def _send_file(self, scope: Scope, send: Send, header_only: bool):
+        await self._start(send, self.status_code)
+        if header_only:
+            return await self._end(send)
+        if PATHSEND in scope.get("extensions", {}):
+            return await send(
+                {"type": PATHSEND, "path": os.path.abspath(self.path)}
+            )
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await self._send_span(send, file, 0, self.stat_result.st_size)
+        await self._end(send)
+
+    async def _send_range(
+        self, send: Send, start: int, end: int, size: int, header_only: bool
+    ):
+        self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+        self.headers["content-length"] = str(end - start)
+        await self._start(send, 206)
+        if not header_only:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await self._send_span(send, file, start, end)
+        await self._end(send)
+
+    async def _send_ranges(
+        self,
+        send: Send,
+        ranges: list[tuple[int, int]],
+        size: int,
+        header_only: bool,
+    ):
+        boundary = token_hex(13)
+        # Parts are separated by CRLF--boundary, as RFC 2046 requires
+        part_headers = [
+            (
+                ("\r\n" if i else "")
+                + f"--{boundary}\r\n"
+                + f"Content-Type: {self.media_type}\r\n"
+                + f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n"
+            ).encode("latin-1")
+            for i, (start, end) in enumerate(ranges)
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        self.headers["content-type"] = (
+            f"multipart/byteranges; boundary={boundary}"
+        )
+        self.headers["content-length"] = str(
+            sum(map(len, part_headers))
+            + sum(end - start for start, end in ranges)
+            + len(closing)
+        )
+        await self._start(send, 206)
+        if header_only:
+            return await self._end(send)
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            for part_header, (start, end) in zip(part_headers, ranges):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": part_header,
+                        "more_body": True,
+                    }
+                )
+                await self._send_span(send, file, start, end)
+        await self._end(send, closing)
@@ -1,7 +1,5 @@
+import glob
 import os
-import shutil
-
-from fastapi import UploadFile
 
 from app.config import env
 from app.db.models import Media
@@ -10,11 +8,58 @@ STORAGE = env.get_env("STORAGE", "fs/storage")
 os.makedirs(STORAGE, exist_ok=True)
 
 
-def write_file(uploaded_file: UploadFile, media: Media):
-    with open(f"{STORAGE}/{media.media_id}", "wb") as buffer:
-        shutil.copyfileobj(uploaded_file.file, buffer)
+BLOB_DIR = f"{STORAGE}/blobs"
+VARIANT_DIR = f"{STORAGE}/variants"
+
+
+def blob_path(sha256: str) -> str:
+    # Fanned out by the first two hex digits to keep directories small
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256}"
+
+
+def get_file_path(media: Media) -> str:
+    if media.sha256 is None:
+        # Not yet moved into the blob store, see app.storage.blobs
+        return f"{STORAGE}/{media.media_id}"
+    return blob_path(media.sha256)
+
+
+def move_to_blob(path: str, sha256: str):
+    """
+    Atomically moves a file into the blob store, so readers never see a
+    partly written blob.
+    """
+    os.makedirs(os.path.dirname(blob_path(sha256)), exist_ok=True)
+    os.replace(path, blob_path(sha256))
+
+
+def delete_blob(sha256: str):
+    try:
+        os.unlink(blob_path(sha256))
+    except FileNotFoundError:
+        pass
+    delete_variants(sha256)
+
+
+def variant_path(key: str, name: str) -> str:
+    """
+    Where a resized copy of a stored file is cached. `key` identifies the
+    file's content, `name` the resize parameters.
+    """
+    return f"{VARIANT_DIR}/{key[:2]}/{key}-{name}"
+
+
+def delete_variants(key: str):
+    for path in glob.glob(variant_path(key, "*")):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
 
 
-def get_file(media: Media):
-    with open(f"{STORAGE}/{media.media_id}", "rb") as buffer:
-        return buffer.read()
+def stat_file(media: Media) -> os.stat_result:
+    """
+    Raises:
+        FileNotFoundError: If the media has no stored file.
+    """
+    return os.stat(get_file_path(media))
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import anyio
+from fastapi import HTTPException, Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import (
+    MultipartParser,
+    MultipartState,
+    parse_options_header,
+)
+from starlette.status import (
+    HTTP_400_BAD_REQUEST,
+    HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+    HTTP_507_INSUFFICIENT_STORAGE,
+)
+
+from app.config import env
+from app.storage.storage import STORAGE
+
+MiB = 1024 * 1024
+
+# Uploads are written here first; it sits in STORAGE so that moving a
+# finished upload into place is an atomic rename on the same filesystem.
+UPLOAD_DIR = f"{STORAGE}/.uploads"
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+MEDIA_SIZE_LIMITS = {
+    "image": int(env.get_env("MEDIA_MAX_IMAGE_SIZE", str(10 * MiB))),
+    "audio": int(env.get_env("MEDIA_MAX_AUDIO_SIZE", str(50 * MiB))),
+    "video": int(env.get_env("MEDIA_MAX_VIDEO_SIZE", str(200 * MiB))),
+    "other": int(env.get_env("MEDIA_MAX_OTHER_SIZE", str(20 * MiB))),
+}
+MAX_UPLOAD_SIZE = max(MEDIA_SIZE_LIMITS.values())
+# Uploads are refused rather than let free disk space drop below this
+MEDIA_MIN_FREE_SPACE = int(
+    env.get_env("MEDIA_MIN_FREE_SPACE", str(1024 * MiB))
+)
+# Room for the form fields and multipart framing around the file
+FORM_OVERHEAD = 64 * 1024
+MAX_FIELD_SIZE = 1024
+
+
+def size_limit(media_type: str) -> int:
+    """The largest file allowed for a media type, by its top-level type"""
+    kind = media_type.split("/", 1)[0]
+    return MEDIA_SIZE_LIMITS.get(kind, MEDIA_SIZE_LIMITS["other"])
+
+
+def too_large(limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File exceeds the maximum size of {limit // MiB} MiB.",
+    )
+
+
+def bad_upload(detail: str) -> HTTPException:
+    return HTTPException(status_code=HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class MediaUpload:
+    """
+    A multipart/form-data media upload read straight off the request
+    stream. Its single file part is written to a temporary file in worker
+    threads, and hashed and measured in the same pass.
+    """
+
+    def __init__(self):
+        self.fields: dict[str, str] = {}
+        self.filename: Optional[str] = None
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        self.temp_path: Optional[str] = None
+        self._file = None
+        self._part_headers: dict[bytes, bytes] = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._field_name: Optional[str] = None
+        self._field_value = bytearray()
+        self._in_file = False
+        self._pending: list[bytes] = []
+
+    @property
+    def limit(self) -> int:
+        # Exact once media_type has been received, which clients do by
+        # sending it before the file; until then, the largest limit.
+        media_type = self.fields.get("media_type")
+        return size_limit(media_type) if media_type else MAX_UPLOAD_SIZE
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._part_headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._part_headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(
+            self._part_headers.get(b"content-disposition", b"")
+        )
+        if b"name" not in options:
+            raise bad_upload("Every form part needs a name.")
+        if b"filename" in options:
+            if self.filename is not None:
+                raise bad_upload("Only one file can be uploaded at a time.")
+            self.filename = options[b"filename"].decode(errors="replace")
+            self._in_file = True
+        else:
+            self._field_name = options[b"name"].decode(errors="replace")
+            self._field_value = bytearray()
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_file:
+            self.size += end - start
+            if self.size > self.limit:
+                raise too_large(self.limit)
+            self._pending.append(data[start:end])
+            return
+        self._field_value += data[start:end]
+        if len(self._field_value) > MAX_FIELD_SIZE:
+            raise bad_upload(f"Form field {self._field_name} is too long.")
+
+    def _on_part_end(self):
+        if self._in_file:
+            self._in_file = False
+        else:
+            self.fields[self._field_name] = self._field_value.decode(
+                errors="replace"
+            )
+
+    def _open(self):
+        fd, self.temp_path = tempfile.mkstemp(dir=UPLOAD_DIR)
+        self._file = os.fdopen(fd, "wb")
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self.sha256.update(data)
+
+    async def flush(self):
+        """Writes the file data parsed so far"""
+        if self.filename is not None and self._file is None:
+            await anyio.to_thread.run_sync(self._open)
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending.clear()
+            await anyio.to_thread.run_sync(self._write, data)
+
+    async def close(self):
+        if self._file is not None:
+            await anyio.to_thread.run_sync(self._file.close)
+
+    async def discard(self):
+        """Deletes the temporary file, unless it was already moved"""
+        await self.close()
+        if self.temp_path is not None:
+            path, self.temp_path = self.temp_path, None
+            try:
+                await anyio.to_thread.run_sync(os.unlink, path)
+            except FileNotFoundError:
+                pass
+
+
+def check_free_space(size: int):
+    free = shutil.disk_usage(UPLOAD_DIR).free
+    if free - size < MEDIA_MIN_FREE_SPACE:
+        raise HTTPException(
+            status_code=HTTP_507_INSUFFICIENT_STORAGE,
+            detail="Not enough storage space for this upload.",
+        )
+
+
+async def receive_media_upload(request: Request) -> MediaUpload:
+    """
+    Streams a multipart media upload to a temporary file. The size limit
+    is enforced as the bytes arrive, so an oversized upload is cut off at
+    the limit instead of being stored first.
+
+    Raises:
+        HTTPException: 400 for a malformed form or a missing file, 413 for
+        a file over its limit, 507 when the disk is nearly full.
+    """
+    content_type, params = parse_options_header(
+        request.headers.get("content-type", "")
+    )
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise bad_upload("Expected a multipart/form-data upload.")
+    content_length = request.headers.get("content-length")
+    if content_length is None:
+        expected = MAX_UPLOAD_SIZE
+    elif content_length.isdigit():
+        expected = int(content_length)
+    else:
+        raise bad_upload("Invalid Content-Length header.")
+    if expected > MAX_UPLOAD_SIZE + FORM_OVERHEAD:
+        raise too_large(MAX_UPLOAD_SIZE)
+    await anyio.to_thread.run_sync(check_free_space, expected)
+
+    upload = MediaUpload()
+    parser = MultipartParser(params[b"boundary"], upload.callbacks())
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                await upload.flush()
+            parser.finalize()
+            # finalize() does not object to a body that stops early
+            if parser.state != MultipartState.END:
+                raise bad_upload("Truncated multipart/form-data body.")
+        except MultipartParseError:
+            raise bad_upload("Malformed multipart/form-data body.")
+        await upload.flush()
+        await upload.close()
+        if upload.temp_path is None:
+            raise bad_upload("A file is required.")
+    except BaseException:
+        await upload.discard()
+        raise
+    return upload
@@ -0,0 +1,192 @@
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.status import HTTP_400_BAD_REQUEST
+
+from app.config import env
+from app.db.models import Media
+from app.dto.media_dto import FitLiteral
+from app.log.console import log_warning
+from app.storage.storage import get_file_path, variant_path
+from imaging.resize import make_variant
+
+# Pillow format, content type and extension of the variants of each
+# resizable type. GIFs, which may be animated, and SVGs are always served
+# as uploaded.
+VARIANT_FORMATS = {
+    "image/jpeg": ("JPEG", "image/jpeg", "jpg"),
+    "image/png": ("PNG", "image/png", "png"),
+    "image/webp": ("WEBP", "image/webp", "webp"),
+    "image/bmp": ("PNG", "image/png", "png"),
+    "image/tiff": ("PNG", "image/png", "png"),
+}
+
+# The only widths and heights served, so that the cache stays bounded
+VARIANT_SIZES = sorted(
+    int(size)
+    for size in env.get_env(
+        "MEDIA_VARIANT_SIZES", "64,160,320,640,1280"
+    ).split(",")
+)
+# Variants generated as soon as an image is uploaded, as comma separated
+# WxH-fit specs where 0 leaves a side free, e.g. "320x0-contain"
+PREGENERATE_VARIANTS = [
+    (int(width) or None, int(height) or None, fit)
+    for width, height, fit in re.findall(
+        r"(\d+)x(\d+)-(contain|cover)",
+        env.get_env("MEDIA_PREGENERATE_VARIANTS", ""),
+    )
+]
+VARIANT_WORKERS = int(env.get_env("MEDIA_VARIANT_WORKERS", "2"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_inflight: dict[str, asyncio.Future] = {}
+_pregenerating: set[asyncio.Task] = set()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the workers need none of the
+        # server's state, its event loop and connections least of all.
+        _pool = ProcessPoolExecutor(
+            VARIANT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_variant_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def check_variant(
+    media_type: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: FitLiteral,
+):
+    """
+    Raises:
+        HTTPException: 400 unless the media is an image and the size is
+        one of VARIANT_SIZES.
+    """
+    if not media_type.startswith("image/"):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="Only images can be resized",
+        )
+    for size in (width, height):
+        if size is not None and size not in VARIANT_SIZES:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail=f"Sizes must be one of {VARIANT_SIZES}",
+            )
+    if fit == "cover" and not (width and height):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail="fit=cover needs both w and h",
+        )
+
+
+async def _variant(
+    source: str,
+    key: str,
+    media_type: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: FitLiteral,
+) -> Optional[tuple[str, str]]:
+    image_format, variant_type, extension = VARIANT_FORMATS[media_type]
+    path = variant_path(key, f"{width or 0}x{height or 0}-{fit}.{extension}")
+    if os.path.exists(path):
+        return path, variant_type
+
+    # Concurrent requests for the same variant share one resize
+    inflight = _inflight.get(path)
+    try:
+        if inflight is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            inflight = asyncio.get_running_loop().run_in_executor(
+                _get_pool(),
+                make_variant,
+                source,
+                path,
+                width,
+                height,
+                fit,
+                image_format,
+            )
+            _inflight[path] = inflight
+            inflight.add_done_callback(lambda _: _inflight.pop(path, None))
+        await asyncio.shield(inflight)
+    except Exception as e:
+        log_warning(f"Failed to resize {source}: {e!r}")
+        if isinstance(e, BrokenProcessPool):
+            # A worker died, e.g. killed for memory; start a fresh pool
+            shutdown_variant_pool()
+        return None
+    return path, variant_type
+
+
+async def get_variant(
+    media: Media,
+    width: Optional[int],
+    height: Optional[int],
+    fit: FitLiteral,
+) -> Optional[tuple[str, str]]:
+    """
+    Returns the path and content type of the media resized to width x
+    height, generating it in the worker pool on first use and caching it
+    on disk. Returns None when the original should be served instead:
+    when no size is asked for, the image type is not resized, or the
+    image cannot be decoded.
+
+    Raises:
+        HTTPException: 400 for a disallowed size or a non-image media.
+    """
+    if width is None and height is None:
+        return None
+    check_variant(media.media_type, width, height, fit)
+    if media.media_type not in VARIANT_FORMATS:
+        return None
+    return await _variant(
+        get_file_path(media),
+        media.sha256 or str(media.media_id),
+        media.media_type,
+        width,
+        height,
+        fit,
+    )
+
+
+async def _pregenerate(source: str, key: str, media_type: str):
+    for width, height, fit in PREGENERATE_VARIANTS:
+        if await _variant(source, key, media_type, width, height, fit) is None:
+            return
+
+
+def pregenerate_variants(media: Media):
+    """
+    Starts generating the PREGENERATE_VARIANTS of a new image in the
+    background, so that its first viewers do not wait for them.
+    """
+    if not PREGENERATE_VARIANTS or media.media_type not in VARIANT_FORMATS:
+        return
+    task = asyncio.create_task(
+        _pregenerate(
+            get_file_path(media),
+            media.sha256 or str(media.media_id),
+            media.media_type,
+        )
+    )
+    _pregenerating.add(task)
+    task.add_done_callback(_pregenerating.discard)
@@ -0,0 +1,45 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+ETAG_HEADER = "ETag"
+
+
+def make_etag(*versions) -> str:
+    """
+    Builds a strong entity tag from the values a response is derived from,
+    e.g. (post_id, last_modified, like_count, comment_count) per post.
+    """
+    payload = json.dumps(versions, default=str, separators=(",", ":"))
+    digest = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header names `etag`. The comparison is weak,
+    as RFC 9110 requires for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def check_not_modified(if_none_match: Optional[str], etag: str):
+    """
+    Raises:
+        HTTPException: 304 Not Modified, carrying the ETag, if the client
+        already holds this version.
+    """
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(
+            status_code=HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag}
+        )
@@ -0,0 +1,128 @@
+"""
+Login throughput under concurrent requests.
+
+Sends concurrent POST /v1/auth/login requests through the app and
+reports logins per second, latency, failed logins, and how long the
+event loop stalled while bcrypt ran.
+
+Run from the repository root:
+
+    python -m bench.login_throughput --concurrency 20 --requests 200
+
+It uses a throwaway SQLite database unless DB_URL is set, and hashes at
+the BCRYPT_ROUNDS cost the app is configured with.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="frusablog-bench-")
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{BENCH_DIR}/app.db")
+os.environ.setdefault("STORAGE", f"{BENCH_DIR}/storage")
+
+from datetime import datetime  # noqa: E402
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.db.models import Role, User  # noqa: E402
+from app.db.setup import engine  # noqa: E402
+from app.security.password import password_context  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+async def seed(users: int):
+    """Creates verified users bench0@example.com, bench1@... with PASSWORD"""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+    hashed_password = password_context.hash(PASSWORD)
+    async with AsyncSession(engine) as session:
+        for i in range(users):
+            role = Role(role_type="user")
+            session.add(role)
+            session.add(
+                User(
+                    username=f"bench{i}",
+                    role_id=role.role_id,
+                    avatar_url=None,
+                    display_name=f"Bench {i}",
+                    email=f"bench{i}@example.com",
+                    hashed_password=hashed_password,
+                    last_login=datetime.utcnow(),
+                    bio=None,
+                    work_industry=None,
+                    location=None,
+                    work_title=None,
+                    account_verified=True,
+                )
+            )
+        await session.commit()
+
+
+async def watch_loop(lags: list[float], interval: float = 0.01):
+    """Records how late the event loop wakes up from short sleeps"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(concurrency: int, requests: int):
+    await seed(concurrency)
+    latencies: list[float] = []
+    lags: list[float] = []
+    failures = 0
+    remaining = iter(range(requests))
+
+    # Errors are counted as failed logins rather than stopping the run
+    transport = ASGITransport(app=app, raise_app_exceptions=False)
+    async with AsyncClient(
+        transport=transport, base_url="http://bench/v1"
+    ) as client:
+
+        async def worker(email: str):
+            nonlocal failures
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/auth/login",
+                    data={"email": email, "password": PASSWORD},
+                )
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        watcher = asyncio.create_task(watch_loop(lags))
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker(f"bench{i}@example.com") for i in range(concurrency))
+        )
+        elapsed = time.perf_counter() - started
+        watcher.cancel()
+
+    latencies.sort()
+    print(f"logins:       {requests} at concurrency {concurrency}")
+    print(f"throughput:   {requests / elapsed:.1f} logins/s")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.0f} ms")
+    print(
+        f"latency p95:  {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms"
+    )
+    print(f"failed:       {failures}")
+    print(f"max loop lag: {max(lags, default=0.0) * 1000:.0f} ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.requests))
@@ -0,0 +1,147 @@
+"""
+Load check for the database connection pool.
+
+Sends concurrent listing requests through the app and reports request
+throughput and latency, how long the event loop stalled, and the pool
+statistics the /metrics/db-pool endpoint serves.
+
+Run from the repository root:
+
+    python -m bench.pool_load --concurrency 50 --requests 2000
+
+It uses a throwaway SQLite database unless DB_URL is set, and bypasses
+the post cache so that every request reaches the database.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+BENCH_DIR = tempfile.mkdtemp(prefix="frusablog-bench-")
+os.environ.setdefault("DB_URL", f"sqlite+aiosqlite:///{BENCH_DIR}/app.db")
+os.environ.setdefault("STORAGE", f"{BENCH_DIR}/storage")
+os.environ.setdefault("POST_CACHE_TTL", "0")
+os.environ.setdefault("POST_LIST_CACHE_TTL", "0")
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.db.models import (  # noqa: E402
+    LoginSession,
+    Post,
+    PostBody,
+    Role,
+    User,
+)
+from app.db.setup import engine, get_pool_stats  # noqa: E402
+
+
+async def seed(posts: int) -> str:
+    """Creates a user with `posts` published posts; returns its session"""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        role = Role(role_type="user")
+        user = User(
+            username="bench",
+            role_id=role.role_id,
+            avatar_url=None,
+            display_name="Bench",
+            email="bench@example.com",
+            hashed_password="",
+            last_login=datetime.utcnow(),
+            bio=None,
+            work_industry=None,
+            location=None,
+            work_title=None,
+            account_verified=True,
+        )
+        login_session = LoginSession(
+            username=user.username,
+            issued_at=datetime.utcnow(),
+            expires_at=datetime.utcnow() + timedelta(days=1),
+        )
+        session.add_all([role, user, login_session])
+        start = datetime(2026, 1, 1)
+        for i in range(posts):
+            created_at = start + timedelta(minutes=i)
+            session.add(
+                Post(
+                    author_username=user.username,
+                    created_at=created_at,
+                    last_modified=created_at,
+                    title=f"Post {i}",
+                    description="A post",
+                    published=True,
+                    body=PostBody(content="Hello"),
+                )
+            )
+        await session.commit()
+        return login_session.session_id
+
+
+async def watch_loop(lags: list[float], interval: float = 0.01):
+    """Records how late the event loop wakes up from short sleeps"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def run(concurrency: int, requests: int, posts: int):
+    session_id = await seed(posts)
+    latencies: list[float] = []
+    lags: list[float] = []
+    remaining = iter(range(requests))
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench/v1"
+    ) as client:
+        client.cookies.set("session", session_id)
+        # Warms up the session cache, which is not what is measured
+        await client.get("/posts", params={"limit": 1})
+
+        async def worker():
+            for i in remaining:
+                started = time.perf_counter()
+                response = await client.get(
+                    "/posts", params={"skip": i % posts, "limit": 10}
+                )
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        watcher = asyncio.create_task(watch_loop(lags))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        watcher.cancel()
+
+    latencies.sort()
+    print(f"requests:     {requests} at concurrency {concurrency}")
+    print(f"throughput:   {requests / elapsed:.0f} req/s")
+    print(f"latency p50:  {statistics.median(latencies) * 1000:.1f} ms")
+    print(
+        f"latency p95:  {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+    )
+    print(f"max loop lag: {max(lags, default=0.0) * 1000:.1f} ms")
+    print("pool stats:")
+    for name, value in get_pool_stats().items():
+        print(f"  {name}: {value}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.requests, args.posts))
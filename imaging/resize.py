@@ -0,0 +1,62 @@
+import os
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+# Runs in the variant worker processes. It lives outside the app package,
+# whose __init__ imports the whole application, and imports only Pillow,
+# so that spawning a worker does not load the app.
+
+# Pillow refuses images above twice this many pixels as decompression bombs
+Image.MAX_IMAGE_PIXELS = 64_000_000
+
+QUALITY = 82
+
+
+def _cover_size(
+    image: Image.Image, width: int, height: int
+) -> tuple[int, int]:
+    # Shrinks the box to fit the image, keeping its shape, so that a small
+    # image is cropped to the requested shape but never enlarged.
+    scale = min(1.0, image.width / width, image.height / height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def make_variant(
+    source: str,
+    dest: str,
+    width: Optional[int],
+    height: Optional[int],
+    fit: str,
+    image_format: str,
+):
+    """
+    Writes a resized copy of the image at `source` to `dest`. "contain"
+    scales the image down to fit inside width x height, either of which
+    may be None; "cover" scales and crops it to fill them exactly.
+    Images are never enlarged.
+    """
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if fit == "cover":
+            image = ImageOps.fit(
+                image,
+                _cover_size(image, width, height),
+                Image.Resampling.LANCZOS,
+            )
+        else:
+            image.thumbnail(
+                (width or image.width, height or image.height),
+                Image.Resampling.LANCZOS,
+            )
+        if image_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        temp_path = f"{dest}.{os.getpid()}.tmp"
+        try:
+            image.save(temp_path, image_format, quality=QUALITY, optimize=True)
+            os.replace(temp_path, dest)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
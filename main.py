@@ -1,10 +1,14 @@
-from fastapi import FastAPI
+import asyncio
 
-from app.app import run_app
-from app.db.setup import connect_db
+from fastapi import FastAPI
 
 app = FastAPI()
 
 if __name__ == "__main__":
-    connect_db()
+    # Imported here because spawned processes, such as the image variant
+    # workers, re-import this script and need none of the app.
+    from app.app import run_app
+    from app.db.setup import connect_db
+
+    asyncio.run(connect_db())
     run_app()
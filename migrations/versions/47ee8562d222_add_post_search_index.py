@@ -0,0 +1,94 @@
+"""add the post full-text search index
+
+Revision ID: 47ee8562d222
+Revises: d3fc6859afa5
+Create Date: 2026-10-17 13:26:52.180447
+
+"""
+from typing import Sequence, Union
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47ee8562d222'
+down_revision: Union[str, None] = 'd3fc6859afa5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+post = sa.table(
+    'post',
+    sa.column('post_id', sa.Uuid),
+    sa.column('title', sa.String),
+    sa.column('description', sa.String),
+    sa.column('content', sa.String),
+    sa.column('published', sa.Boolean),
+)
+
+
+def sqlite_upgrade() -> None:
+    op.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS post_search USING fts5("
+        "post_id UNINDEXED, title, description, content, "
+        "tokenize = 'porter unicode61')"
+    )
+    connection = op.get_bind()
+    insert = sa.text(
+        'INSERT INTO post_search(rowid, post_id, title, description, content) '
+        'VALUES (:rowid, :post_id, :title, :description, :content)'
+    )
+    rows = connection.execute(
+        sa.select(post.c.post_id, post.c.title, post.c.description, post.c.content)
+        .where(post.c.published)
+    ).fetchall()
+    for start in range(0, len(rows), BATCH_SIZE):
+        connection.execute(insert, [
+            dict(
+                # Same derivation as app.db.search.search_rowid
+                rowid=UUID(str(post_id)).int >> 65,
+                post_id=UUID(str(post_id)).hex,
+                title=title,
+                description=description,
+                content=content,
+            )
+            for post_id, title, description, content in rows[start:start + BATCH_SIZE]
+        ])
+
+
+def postgresql_upgrade() -> None:
+    # Adding a stored generated column rewrites the table once.
+    op.execute(
+        "ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', title), 'A') || "
+        "setweight(to_tsvector('english', description), 'B') || "
+        "setweight(to_tsvector('english', content), 'C')) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_post_search_vector '
+            'ON post USING gin (search_vector)'
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        sqlite_upgrade()
+    elif dialect == 'postgresql':
+        postgresql_upgrade()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS post_search')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_post_search_vector')
+        op.execute('ALTER TABLE post DROP COLUMN IF EXISTS search_vector')
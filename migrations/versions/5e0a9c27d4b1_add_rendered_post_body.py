@@ -0,0 +1,44 @@
+"""store post bodies rendered to HTML
+
+Revision ID: 5e0a9c27d4b1
+Revises: b7c41e9d02f3
+Create Date: 2026-10-17 16:11:05.274913
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0a9c27d4b1'
+down_revision: Union[str, None] = 'b7c41e9d02f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing bodies are left at render_version 0. They are rendered when
+    # first read, or all at once with `python -m app.services.render`.
+    with op.batch_alter_table('postbody') as batch_op:
+        batch_op.add_column(sa.Column('content_html', sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('excerpt', sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default=''))
+        batch_op.add_column(sa.Column('reading_time', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('toc', sa.JSON(), nullable=False, server_default='[]'))
+        batch_op.add_column(sa.Column('rendered_from', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('render_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('postbody') as batch_op:
+        batch_op.drop_column('render_version')
+        batch_op.drop_column('rendered_from')
+        batch_op.drop_column('toc')
+        batch_op.drop_column('reading_time')
+        batch_op.drop_column('excerpt')
+        batch_op.drop_column('content_html')
@@ -0,0 +1,43 @@
+"""store media files by content in shared blobs
+
+Revision ID: 8f2b6d4e1a97
+Revises: c3d81f5a6e20
+Create Date: 2026-10-17 18:05:12.640378
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2b6d4e1a97'
+down_revision: Union[str, None] = 'c3d81f5a6e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('blob',
+    sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    # Existing files stay under their media_id until moved into the blob
+    # store with `python -m app.storage.blobs`, which also hashes them.
+    op.execute('UPDATE media SET sha256 = NULL')
+    with op.batch_alter_table('media') as batch_op:
+        batch_op.create_foreign_key('fk_media_sha256_blob', 'blob', ['sha256'], ['sha256'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Run only with no media in the blob store: their files would be lost.
+    with op.batch_alter_table('media') as batch_op:
+        batch_op.drop_constraint('fk_media_sha256_blob', type_='foreignkey')
+    op.drop_table('blob')
@@ -0,0 +1,127 @@
+"""store permissions as resource type, resource id and action columns
+
+Revision ID: a6b3d50e7928
+Revises: a917896f9ba1
+Create Date: 2026-10-17 11:20:05.114873
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6b3d50e7928'
+down_revision: Union[str, None] = 'a917896f9ba1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+permission = sa.table(
+    'permission',
+    sa.column('permission_id', sa.String),
+    sa.column('name', sa.String),
+    sa.column('resource_type', sa.String),
+    sa.column('resource_id', sa.String),
+    sa.column('action', sa.String),
+)
+
+
+def split_name(name: str) -> tuple[str, str, str]:
+    """Splits `type:id:action` or the global `type:action`."""
+    parts = name.split(':')
+    if len(parts) == 2:
+        return parts[0], '', parts[1]
+    return parts[0], ':'.join(parts[1:-1]), parts[-1]
+
+
+def convert_names(connection) -> None:
+    if connection.dialect.name == 'postgresql':
+        op.execute(
+            "UPDATE permission SET "
+            "resource_type = split_part(name, ':', 1), "
+            "resource_id = CASE WHEN split_part(name, ':', 3) = '' "
+            "THEN '' ELSE split_part(name, ':', 2) END, "
+            "action = CASE WHEN split_part(name, ':', 3) = '' "
+            "THEN split_part(name, ':', 2) ELSE split_part(name, ':', 3) END"
+        )
+        return
+
+    update = (
+        permission.update()
+        .where(permission.c.permission_id == sa.bindparam('pid'))
+        .where(permission.c.name == sa.bindparam('pname'))
+        .values(
+            resource_type=sa.bindparam('rtype'),
+            resource_id=sa.bindparam('rid'),
+            action=sa.bindparam('raction'),
+        )
+    )
+    rows = connection.execute(
+        sa.select(permission.c.permission_id, permission.c.name)
+    ).fetchall()
+    for start in range(0, len(rows), BATCH_SIZE):
+        params = []
+        for permission_id, name in rows[start:start + BATCH_SIZE]:
+            resource_type, resource_id, action = split_name(name)
+            params.append(dict(
+                pid=permission_id,
+                pname=name,
+                rtype=resource_type,
+                rid=resource_id,
+                raction=action,
+            ))
+        connection.execute(update, params)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('permission', sa.Column('resource_type', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('permission', sa.Column('resource_id', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('permission', sa.Column('action', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    convert_names(op.get_bind())
+    # The old primary key allowed the same name twice under different ids
+    op.execute(
+        'DELETE FROM permission WHERE permission_id NOT IN ('
+        'SELECT min(permission_id) FROM permission '
+        'GROUP BY role_id, resource_type, resource_id, action)'
+    )
+
+    with op.batch_alter_table('permission') as batch_op:
+        batch_op.alter_column('resource_type', nullable=False)
+        batch_op.alter_column('resource_id', nullable=False)
+        batch_op.alter_column('action', nullable=False)
+        batch_op.drop_column('name')
+        batch_op.create_primary_key('pk_permission', ['permission_id'])
+        batch_op.create_index(
+            'ix_permission_role_resource_action',
+            ['role_id', 'resource_type', 'resource_id', 'action'],
+            unique=True,
+        )
+        batch_op.create_index(
+            'ix_permission_resource', ['resource_type', 'resource_id']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('permission', sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.execute(
+        "UPDATE permission SET name = CASE WHEN resource_id = '' "
+        "THEN resource_type || ':' || action "
+        "ELSE resource_type || ':' || resource_id || ':' || action END"
+    )
+    with op.batch_alter_table('permission') as batch_op:
+        batch_op.drop_index('ix_permission_resource')
+        batch_op.drop_index('ix_permission_role_resource_action')
+        batch_op.drop_constraint('pk_permission', type_='primary')
+        batch_op.drop_column('action')
+        batch_op.drop_column('resource_id')
+        batch_op.drop_column('resource_type')
+        batch_op.alter_column('name', nullable=False)
+        batch_op.create_primary_key('pk_permission', ['permission_id', 'name'])
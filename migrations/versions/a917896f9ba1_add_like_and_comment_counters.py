@@ -0,0 +1,47 @@
+"""add like and comment counters
+
+Revision ID: a917896f9ba1
+Revises: fb3437714d36
+Create Date: 2026-10-17 10:03:17.642091
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a917896f9ba1'
+down_revision: Union[str, None] = 'fb3437714d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('post', sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('post', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('comment', sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'))
+    # Backfill; later drift can be fixed with `python -m app.db.counters`.
+    op.execute(
+        'UPDATE post SET '
+        'like_count = (SELECT count(*) FROM userpostlikelink '
+        'WHERE userpostlikelink.post_id = post.post_id), '
+        'comment_count = (SELECT count(*) FROM comment '
+        'WHERE comment.post_id = post.post_id)'
+    )
+    op.execute(
+        'UPDATE comment SET '
+        'like_count = (SELECT count(*) FROM usercommentlikelink '
+        'WHERE usercommentlikelink.comment_id = comment.comment_id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('comment') as batch_op:
+        batch_op.drop_column('like_count')
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
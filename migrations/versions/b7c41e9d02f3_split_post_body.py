@@ -0,0 +1,82 @@
+"""move post content into its own table
+
+Revision ID: b7c41e9d02f3
+Revises: 47ee8562d222
+Create Date: 2026-10-17 15:02:44.918305
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9d02f3'
+down_revision: Union[str, None] = '47ee8562d222'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.create_table('postbody',
+    sa.Column('post_id', sa.Uuid(), nullable=False),
+    sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.post_id'], ),
+    sa.PrimaryKeyConstraint('post_id')
+    )
+    op.execute(
+        'INSERT INTO postbody (post_id, content) '
+        'SELECT post_id, content FROM post'
+    )
+    if dialect == 'postgresql':
+        # A generated column cannot read postbody, so the vector moves there
+        # and is written by the application (app.db.search.index_post).
+        op.execute('ALTER TABLE post DROP COLUMN IF EXISTS search_vector')
+        op.execute('ALTER TABLE postbody ADD COLUMN search_vector tsvector')
+        op.execute(
+            'UPDATE postbody SET search_vector = '
+            "setweight(to_tsvector('english', post.title), 'A') || "
+            "setweight(to_tsvector('english', post.description), 'B') || "
+            "setweight(to_tsvector('english', postbody.content), 'C') "
+            'FROM post WHERE post.post_id = postbody.post_id'
+        )
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.drop_column('content')
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+                'ix_postbody_search_vector ON postbody USING gin (search_vector)'
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.add_column(sa.Column('content', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.execute(
+        'UPDATE post SET content = (SELECT content FROM postbody '
+        'WHERE postbody.post_id = post.post_id)'
+    )
+    with op.batch_alter_table('post') as batch_op:
+        batch_op.alter_column('content', nullable=False)
+    op.drop_table('postbody')
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', description), 'B') || "
+            "setweight(to_tsvector('english', content), 'C')) STORED"
+        )
+        with op.get_context().autocommit_block():
+            op.execute(
+                'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_post_search_vector '
+                'ON post USING gin (search_vector)'
+            )
@@ -0,0 +1,35 @@
+"""record media file sizes and SHA-256 digests
+
+Revision ID: c3d81f5a6e20
+Revises: 5e0a9c27d4b1
+Create Date: 2026-10-17 17:20:41.503126
+
+"""
+from typing import Sequence, Union
+
+import sqlmodel
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d81f5a6e20'
+down_revision: Union[str, None] = '5e0a9c27d4b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Files uploaded before this revision keep size 0 and no digest.
+    with op.batch_alter_table('media') as batch_op:
+        batch_op.add_column(sa.Column('size', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('media') as batch_op:
+        batch_op.drop_column('sha256')
+        batch_op.drop_column('size')
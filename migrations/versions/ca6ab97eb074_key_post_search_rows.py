@@ -0,0 +1,73 @@
+"""key post search rows through post_search_key
+
+Revision ID: ca6ab97eb074
+Revises: 8f2b6d4e1a97
+Create Date: 2026-10-17 19:12:37.208116
+
+"""
+from typing import Sequence, Union
+from uuid import UUID
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ca6ab97eb074'
+down_revision: Union[str, None] = '8f2b6d4e1a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # FTS rowids used to be the top 63 bits of the post id, which two posts
+    # can share. The index is rebuilt from the posts with assigned rowids.
+    op.execute(
+        'CREATE TABLE IF NOT EXISTS post_search_key ('
+        'search_rowid INTEGER PRIMARY KEY, post_id CHAR(32) NOT NULL UNIQUE)'
+    )
+    op.execute('DELETE FROM post_search')
+    op.execute('DELETE FROM post_search_key')
+    op.execute(
+        'INSERT INTO post_search_key(post_id) '
+        'SELECT post_id FROM post WHERE published'
+    )
+    op.execute(
+        'INSERT INTO post_search(rowid, post_id, title, description, content) '
+        'SELECT post_search_key.search_rowid, post.post_id, post.title, '
+        'post.description, postbody.content FROM post_search_key '
+        'JOIN post ON post.post_id = post_search_key.post_id '
+        'JOIN postbody ON postbody.post_id = post.post_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        'SELECT post_id, title, description, content FROM post_search'
+    )).fetchall()
+    op.execute('DELETE FROM post_search')
+    if rows:
+        connection.execute(
+            sa.text(
+                'INSERT INTO post_search(rowid, post_id, title, description, content) '
+                'VALUES (:rowid, :post_id, :title, :description, :content)'
+            ),
+            [
+                dict(
+                    rowid=UUID(post_id).int >> 65,
+                    post_id=post_id,
+                    title=title,
+                    description=description,
+                    content=content,
+                )
+                for post_id, title, description, content in rows
+            ],
+        )
+    op.execute('DROP TABLE post_search_key')
@@ -0,0 +1,40 @@
+"""add a tag-first index on the post/tag link table
+
+Revision ID: d3fc6859afa5
+Revises: ff48288386ff
+Create Date: 2026-10-17 12:41:19.530862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3fc6859afa5'
+down_revision: Union[str, None] = 'ff48288386ff'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posttaglink_tag_id_post_id',
+            'posttaglink',
+            ['tag_id', 'post_id'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_posttaglink_tag_id_post_id',
+            table_name='posttaglink',
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
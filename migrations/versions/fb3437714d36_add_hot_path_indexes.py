@@ -0,0 +1,140 @@
+"""add indexes for the hot query paths
+
+Revision ID: fb3437714d36
+Revises: e6b84071984e
+Create Date: 2026-10-17 09:12:44.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fb3437714d36'
+down_revision: Union[str, None] = 'e6b84071984e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns, unique)
+INDEXES = [
+    ('ix_user_email', 'user', ['email'], True),
+    ('ix_post_published_created_at', 'post', ['published', 'created_at'], False),
+    ('ix_post_author_username_created_at', 'post', ['author_username', 'created_at'], False),
+    ('ix_comment_post_id', 'comment', ['post_id'], False),
+    ('ix_posttag_name', 'posttag', ['name'], True),
+    ('ix_userpostlikelink_username', 'userpostlikelink', ['username'], False),
+    ('ix_usercommentlikelink_username', 'usercommentlikelink', ['username'], False),
+]
+
+posttag = sa.table(
+    'posttag',
+    sa.column('tag_id', sa.Uuid),
+    sa.column('name', sa.String),
+)
+posttaglink = sa.table(
+    'posttaglink',
+    sa.column('post_id', sa.Uuid),
+    sa.column('tag_id', sa.Uuid),
+)
+user = sa.table('user', sa.column('email', sa.String))
+
+
+def check_duplicate_emails(connection):
+    # Accounts cannot be merged automatically, so the upgrade stops before
+    # a failed CONCURRENTLY build leaves an invalid index behind.
+    emails = connection.execute(
+        sa.select(user.c.email)
+        .group_by(user.c.email)
+        .having(sa.func.count() > 1)
+    ).scalars().all()
+    if emails:
+        raise RuntimeError(
+            'Cannot add the unique index on user.email, these emails are '
+            f'used by more than one account: {", ".join(emails)}. Change or '
+            'delete the extra accounts, then run the upgrade again.'
+        )
+
+
+def merge_duplicate_tags(connection):
+    # Tags used to be created with a racy check-then-insert, so a name may
+    # have several tags. Their posts move to the first one.
+    duplicated = (
+        sa.select(posttag.c.name)
+        .group_by(posttag.c.name)
+        .having(sa.func.count() > 1)
+    )
+    rows = connection.execute(
+        sa.select(posttag.c.name, posttag.c.tag_id)
+        .where(posttag.c.name.in_(duplicated))
+        .order_by(posttag.c.name, posttag.c.tag_id)
+    ).all()
+    kept = {}
+    for name, tag_id in rows:
+        keep = kept.setdefault(name, tag_id)
+        if tag_id == keep:
+            continue
+        already_tagged = sa.select(posttaglink.c.post_id).where(
+            posttaglink.c.tag_id == keep
+        )
+        connection.execute(
+            posttaglink.insert().from_select(
+                ['post_id', 'tag_id'],
+                sa.select(posttaglink.c.post_id, sa.literal(keep, sa.Uuid))
+                .where(posttaglink.c.tag_id == tag_id)
+                .where(posttaglink.c.post_id.not_in(already_tagged)),
+            )
+        )
+        connection.execute(
+            posttaglink.delete().where(posttaglink.c.tag_id == tag_id)
+        )
+        connection.execute(posttag.delete().where(posttag.c.tag_id == tag_id))
+
+
+def drop_invalid_indexes(connection):
+    # A CONCURRENTLY build that failed on an earlier run leaves an invalid
+    # index, which IF NOT EXISTS would then keep.
+    invalid = connection.execute(
+        sa.text(
+            'SELECT class.relname FROM pg_index '
+            'JOIN pg_class class ON class.oid = pg_index.indexrelid '
+            'WHERE NOT pg_index.indisvalid AND class.relname IN :names'
+        ).bindparams(sa.bindparam('names', expanding=True)),
+        {'names': [name for name, *_ in INDEXES]},
+    ).scalars().all()
+    for name in invalid:
+        op.drop_index(name, if_exists=True, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    check_duplicate_emails(connection)
+    merge_duplicate_tags(connection)
+    # Postgres builds the indexes CONCURRENTLY so the tables stay writable,
+    # which cannot happen inside a transaction block.
+    with op.get_context().autocommit_block():
+        if connection.dialect.name == 'postgresql':
+            drop_invalid_indexes(connection)
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _columns, _unique in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
@@ -0,0 +1,83 @@
+"""drop the per-post crud permissions now implied by authorship
+
+Revision ID: ff48288386ff
+Revises: a6b3d50e7928
+Create Date: 2026-10-17 12:02:41.907316
+
+"""
+from typing import Sequence, Union
+from uuid import uuid4
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ff48288386ff'
+down_revision: Union[str, None] = 'a6b3d50e7928'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+permission = sa.table(
+    'permission',
+    sa.column('permission_id', sa.String),
+    sa.column('role_id', sa.String),
+    sa.column('resource_type', sa.String),
+    sa.column('resource_id', sa.String),
+    sa.column('action', sa.String),
+)
+post = sa.table(
+    'post',
+    sa.column('post_id', sa.Uuid),
+    sa.column('author_username', sa.String),
+)
+user = sa.table(
+    'user',
+    sa.column('username', sa.String),
+    sa.column('role_id', sa.String),
+)
+
+
+def matches_post_id(dialect: str) -> str:
+    # Permission ids are dashed uuid strings, post ids are native uuids on
+    # Postgres and undashed hex strings elsewhere.
+    if dialect == 'postgresql':
+        return 'CAST(post.post_id AS TEXT) = permission.resource_id'
+    return "post.post_id = replace(permission.resource_id, '-', '')"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    op.execute(
+        "DELETE FROM permission "
+        "WHERE resource_type = 'post' AND action = 'crud' AND EXISTS ("
+        'SELECT 1 FROM post JOIN "user" '
+        'ON "user".username = post.author_username '
+        f'WHERE {matches_post_id(dialect)} '
+        'AND "user".role_id = permission.role_id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(post.c.post_id, user.c.role_id).join(
+            user, user.c.username == post.c.author_username
+        )
+    ).fetchall()
+    if rows:
+        connection.execute(
+            permission.insert(),
+            [
+                dict(
+                    permission_id=uuid4().hex,
+                    role_id=role_id,
+                    resource_type='post',
+                    resource_id=str(post_id),
+                    action='crud',
+                )
+                for post_id, role_id in rows
+            ],
+        )
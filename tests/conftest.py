@@ -0,0 +1,127 @@
+import os
+import tempfile
+
+# The app reads its configuration on import, so point it at a throwaway
+# database and storage directory before anything imports it.
+TEST_DIR = tempfile.mkdtemp(prefix="frusablog-tests-")
+os.environ["DB_URL"] = f"sqlite+aiosqlite:///{TEST_DIR}/app.db"
+os.environ["STORAGE"] = f"{TEST_DIR}/storage"
+
+from datetime import datetime, timedelta  # noqa: E402
+from pathlib import Path  # noqa: E402
+
+import pytest  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlmodel import SQLModel  # noqa: E402
+from sqlmodel.ext.asyncio.session import AsyncSession  # noqa: E402
+
+from app.app import app  # noqa: E402
+from app.db.models import LoginSession, Role, User  # noqa: E402
+from app.db.setup import engine  # noqa: E402
+from app.services import post_cache  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def migrate(url: str, revision: str = "head", downgrade: bool = False):
+    """Runs the alembic migrations against the sync database `url`"""
+    os.environ["ALEMBIC_DB_URL"] = url
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "migrations"))
+    try:
+        if downgrade:
+            command.downgrade(config, revision)
+        else:
+            command.upgrade(config, revision)
+    finally:
+        del os.environ["ALEMBIC_DB_URL"]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db_session():
+    """A session on an empty database, recreated for every test"""
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+    await post_cache.invalidate_pages()
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(db_session):
+    """The SQL statements run against the database, as they run"""
+    executed = []
+
+    def record(_connection, _cursor, statement, *_args):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def create_user(db_session: AsyncSession, username: str) -> User:
+    role = Role(role_type="user")
+    user = User(
+        username=username,
+        role_id=role.role_id,
+        avatar_url=None,
+        display_name=username.title(),
+        email=f"{username}@example.com",
+        hashed_password="",
+        last_login=datetime.utcnow(),
+        bio=None,
+        work_industry=None,
+        location=None,
+        work_title=None,
+        account_verified=True,
+    )
+    db_session.add_all([role, user])
+    await db_session.commit()
+    return user
+
+
+async def log_in(db_session: AsyncSession, user: User) -> AsyncClient:
+    """An API client with a login session for `user`; close it after use"""
+    login_session = LoginSession(
+        username=user.username,
+        issued_at=datetime.utcnow(),
+        expires_at=datetime.utcnow() + timedelta(days=1),
+    )
+    db_session.add(login_session)
+    await db_session.commit()
+    client = AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test/v1"
+    )
+    client.cookies.set("session", login_session.session_id)
+    return client
+
+
+@pytest.fixture
+async def user(db_session) -> User:
+    return await create_user(db_session, "bob")
+
+
+@pytest.fixture
+async def client(db_session, user):
+    """An API client logged in as `user`"""
+    async with await log_in(db_session, user) as client:
+        yield client
+
+
+@pytest.fixture
+async def other_client(db_session):
+    """An API client logged in as another user, alice"""
+    alice = await create_user(db_session, "alice")
+    async with await log_in(db_session, alice) as client:
+        yield client
@@ -0,0 +1,129 @@
+from uuid import UUID
+
+import pytest
+from sqlmodel import select, update
+
+from app.db.counters import repair_counters
+from app.db.models import Comment, Post
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def post_id(client) -> str:
+    response = await client.post(
+        "/posts",
+        json={
+            "title": "Counted",
+            "description": "",
+            "content": "Hello",
+            "published": True,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()["post_id"]
+
+
+async def comment(client, post_id: str) -> str:
+    response = await client.post(
+        "/comments", json={"post_id": post_id, "content": "Nice"}
+    )
+    assert response.status_code == 200
+    return response.json()["comment_id"]
+
+
+async def post_counts(db_session, post_id: str) -> tuple[int, int]:
+    """The stored (like_count, comment_count) of a post"""
+    result = await db_session.exec(
+        select(Post.like_count, Post.comment_count).where(
+            Post.post_id == UUID(post_id)
+        )
+    )
+    return tuple(result.one())
+
+
+async def comment_likes(db_session, comment_id: str) -> int:
+    result = await db_session.exec(
+        select(Comment.like_count).where(
+            Comment.comment_id == UUID(comment_id)
+        )
+    )
+    return result.one()
+
+
+async def test_likes_are_counted_once(
+    db_session, client, other_client, post_id
+):
+    url = f"/posts/{post_id}/like"
+    assert (await other_client.post(url)).json() == 1
+    assert (await other_client.post(url)).status_code == 200
+    assert (await client.post(url)).json() == 2
+    assert await post_counts(db_session, post_id) == (2, 0)
+
+    assert (await other_client.delete(url)).status_code == 200
+    assert (await other_client.delete(url)).status_code == 403
+    assert await post_counts(db_session, post_id) == (1, 0)
+
+
+async def test_comment_likes_are_counted_once(
+    db_session, client, other_client, post_id
+):
+    comment_id = await comment(client, post_id)
+    url = f"/comments/{comment_id}/like"
+    await other_client.post(url)
+    await other_client.post(url)
+    await client.post(url)
+    assert await comment_likes(db_session, comment_id) == 2
+    assert (await client.get(f"/comments/{comment_id}")).json()[
+        "likes_count"
+    ] == 2
+
+    await other_client.delete(url)
+    await other_client.delete(url)
+    assert await comment_likes(db_session, comment_id) == 1
+
+
+async def test_comments_are_counted(db_session, client, other_client, post_id):
+    first = await comment(client, post_id)
+    await comment(other_client, post_id)
+    assert await post_counts(db_session, post_id) == (0, 2)
+
+    assert (await client.delete(f"/comments/{first}")).status_code == 200
+    assert await post_counts(db_session, post_id) == (0, 1)
+    response = await client.get(f"/posts/{post_id}")
+    assert response.json()["comments_count"] == 1
+
+
+async def test_deleted_accounts_are_taken_off_the_counters(
+    db_session, client, other_client, post_id
+):
+    comment_id = await comment(client, post_id)
+    await comment(other_client, post_id)
+    await comment(other_client, post_id)
+    await client.post(f"/posts/{post_id}/like")
+    await other_client.post(f"/posts/{post_id}/like")
+    await client.post(f"/comments/{comment_id}/like")
+    await other_client.post(f"/comments/{comment_id}/like")
+    await client.get(f"/posts/{post_id}")
+
+    response = await other_client.delete("/account/delete")
+    assert response.status_code == 200
+    assert await post_counts(db_session, post_id) == (1, 1)
+    assert await comment_likes(db_session, comment_id) == 1
+    post = (await client.get(f"/posts/{post_id}")).json()
+    assert (post["like_count"], post["comments_count"]) == (1, 1)
+
+
+async def test_repair_recounts_drifted_counters(
+    db_session, client, other_client, post_id
+):
+    comment_id = await comment(other_client, post_id)
+    await other_client.post(f"/posts/{post_id}/like")
+    await client.post(f"/comments/{comment_id}/like")
+    await db_session.exec(update(Post).values(like_count=7, comment_count=7))
+    await db_session.exec(update(Comment).values(like_count=7))
+    await db_session.commit()
+
+    await repair_counters(db_session)
+    assert await post_counts(db_session, post_id) == (1, 1)
+    assert await comment_likes(db_session, comment_id) == 1
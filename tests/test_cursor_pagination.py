@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import Post, PostBody, PostTag
+from app.utils.cursor import NEXT_CURSOR_HEADER, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+POST_LISTINGS = [
+    "/posts",
+    "/posts?tags=shared",
+    "/tags/shared/posts",
+    "/bob/posts",
+]
+BAD_CURSORS = [
+    "not a cursor",
+    encode_cursor("2026-01-01T00:00:00"),
+    encode_cursor("yesterday", "not a uuid"),
+    "e30",  # {}
+]
+
+
+@pytest.fixture
+async def post_ids(db_session, user) -> list:
+    """Eleven published posts newest first, created in pairs at the same
+    instant so that pages must break ties by post_id, and a draft"""
+    shared = PostTag(name="shared")
+    start = datetime(2026, 1, 1)
+    posts = [
+        Post(
+            author_username=user.username,
+            created_at=start + timedelta(minutes=i // 2),
+            last_modified=start,
+            title=f"Post {i}",
+            description="",
+            published=i < 11,
+            tags=[shared],
+            body=PostBody(content=""),
+        )
+        for i in range(12)
+    ]
+    db_session.add_all(posts)
+    await db_session.commit()
+    published = [post for post in posts if post.published]
+    published.sort(key=lambda post: (post.created_at, post.post_id))
+    return [str(post.post_id) for post in reversed(published)]
+
+
+async def walk(client, listing: str, limit: int, key: str) -> list:
+    """Follows the next cursors of a listing to its end"""
+    separator = "&" if "?" in listing else "?"
+    seen, cursor = [], None
+    while True:
+        url = f"{listing}{separator}limit={limit}"
+        if cursor:
+            url += f"&cursor={cursor}"
+        response = await client.get(url)
+        assert response.status_code == 200
+        page = [item[key] for item in response.json()]
+        assert len(page) <= limit
+        seen += page
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return seen
+        assert len(page) == limit
+
+
+@pytest.mark.parametrize("listing", POST_LISTINGS)
+@pytest.mark.parametrize("limit", [1, 3, 11, 20])
+async def test_cursors_visit_every_post_once(client, post_ids, listing, limit):
+    assert await walk(client, listing, limit, "post_id") == post_ids
+
+
+async def test_cursors_visit_every_tag_once(client, db_session):
+    names = [f"tag{i:02}" for i in range(7)]
+    db_session.add_all(PostTag(name=name) for name in reversed(names))
+    await db_session.commit()
+    assert await walk(client, "/tags", 3, "name") == names
+
+
+async def test_a_cursor_seeks_past_posts_added_since(
+    client, db_session, user, post_ids
+):
+    response = await client.get("/posts?limit=4")
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    db_session.add(
+        Post(
+            author_username=user.username,
+            created_at=datetime(2027, 1, 1),
+            last_modified=datetime(2027, 1, 1),
+            title="Newer",
+            description="",
+            published=True,
+            body=PostBody(content=""),
+        )
+    )
+    await db_session.commit()
+
+    response = await client.get(f"/posts?limit=4&cursor={cursor}")
+    assert [post["post_id"] for post in response.json()] == post_ids[4:8]
+
+
+@pytest.mark.parametrize("listing", POST_LISTINGS)
+@pytest.mark.parametrize("cursor", BAD_CURSORS)
+async def test_bad_cursors_are_rejected(client, post_ids, listing, cursor):
+    separator = "&" if "?" in listing else "?"
+    response = await client.get(f"{listing}{separator}cursor={cursor}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not a cursor", encode_cursor("a", "b"), "e30"]
+)
+async def test_bad_tag_cursors_are_rejected(client, cursor):
+    response = await client.get(f"/tags?cursor={cursor}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.pool import MonitoredPool
+
+pytestmark = pytest.mark.anyio
+
+
+async def checkout(engine):
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+
+async def test_each_pool_keeps_its_own_threshold_and_stats(tmp_path):
+    fast, slow = (
+        create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path}/{name}.db",
+            poolclass=MonitoredPool,
+            slow_checkout=slow_checkout,
+        )
+        for name, slow_checkout in (("fast", 0.0), ("slow", 60.0))
+    )
+    try:
+        await checkout(fast)
+        await checkout(fast)
+        await checkout(slow)
+        assert fast.pool.status_dict()["checkouts"] == 2
+        assert fast.pool.status_dict()["slow_checkouts"] == 2
+        assert slow.pool.status_dict()["checkouts"] == 1
+        assert slow.pool.status_dict()["slow_checkouts"] == 0
+
+        # Disposing replaces the pool, not its settings or statistics
+        await fast.dispose()
+        assert fast.pool.slow_checkout == 0.0
+        assert fast.pool.status_dict()["checkouts"] == 2
+    finally:
+        await fast.dispose()
+        await slow.dispose()
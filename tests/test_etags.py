@@ -0,0 +1,83 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def post_id(client) -> str:
+    response = await client.post(
+        "/posts",
+        json={
+            "title": "Conditional requests",
+            "description": "On ETags",
+            "content": "Hello",
+            "published": True,
+            "tags": ["http"],
+        },
+    )
+    assert response.status_code == 200
+    return response.json()["post_id"]
+
+
+async def etag_of(client, url: str) -> str:
+    response = await client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+@pytest.mark.parametrize(
+    "url", ["/posts/{}", "/posts", "/tags/http/posts", "/bob/posts", "/tags"]
+)
+async def test_a_matching_if_none_match_gets_304(client, post_id, url):
+    url = url.format(post_id)
+    etag = await etag_of(client, url)
+
+    for if_none_match in (etag, f'"other", W/{etag}', "*"):
+        response = await client.get(
+            url, headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    response = await client.get(url, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize(
+    "url", ["/posts/{}", "/posts", "/tags/http/posts", "/bob/posts"]
+)
+async def test_likes_comments_and_edits_change_the_etag(
+    client, other_client, post_id, url
+):
+    url = url.format(post_id)
+    etags = [await etag_of(client, url)]
+
+    assert (
+        await other_client.post(f"/posts/{post_id}/like")
+    ).status_code == 200
+    etags.append(await etag_of(client, url))
+
+    response = await other_client.post(
+        "/comments", json={"post_id": post_id, "content": "Nice"}
+    )
+    assert response.status_code == 200
+    etags.append(await etag_of(client, url))
+
+    response = await client.put(f"/posts/{post_id}", json={"title": "Renamed"})
+    assert response.status_code == 200
+    etags.append(await etag_of(client, url))
+
+    assert len(set(etags)) == len(etags)
+    response = await client.get(url, headers={"If-None-Match": etags[0]})
+    assert response.status_code == 200
+
+
+async def test_new_tags_change_the_tags_etag(client, post_id):
+    etag = await etag_of(client, "/tags")
+    response = await client.put(
+        f"/posts/{post_id}", json={"tags": ["http", "caching"]}
+    )
+    assert response.status_code == 200
+    assert await etag_of(client, "/tags") != etag
@@ -0,0 +1,100 @@
+from uuid import uuid4
+
+import pytest
+from conftest import migrate
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import sqlite
+from sqlmodel import select
+
+from app.db.models import (
+    Comment,
+    Permission,
+    Post,
+    PostTag,
+    Role,
+    User,
+    UserCommentLikeLink,
+    UserPostLikeLink,
+)
+from app.routes.providers.post_provider import paginate_posts
+
+# Each hot query, as the app builds it, and the index it must use
+HOT_QUERIES = {
+    "login": (
+        select(User).where(User.email == "bob@example.com"),
+        "ix_user_email",
+    ),
+    "published listing": (
+        paginate_posts(
+            select(Post.post_id, Post.created_at).where(Post.published),
+            0,
+            10,
+            None,
+        ),
+        "ix_post_published_created_at",
+    ),
+    "author listing": (
+        paginate_posts(
+            select(Post.post_id, Post.created_at).where(
+                Post.author_username == "bob"
+            ),
+            0,
+            10,
+            None,
+        ),
+        "ix_post_author_username_created_at",
+    ),
+    "tag lookup": (
+        select(PostTag).where(PostTag.name.in_(["python", "sql"])),
+        "ix_posttag_name",
+    ),
+    "comments of a post": (
+        select(Comment).where(Comment.post_id == uuid4()),
+        "ix_comment_post_id",
+    ),
+    "posts liked by a user": (
+        select(UserPostLikeLink.post_id).where(
+            UserPostLikeLink.username == "bob"
+        ),
+        "ix_userpostlikelink_username",
+    ),
+    "comments liked by a user": (
+        select(UserCommentLikeLink.comment_id).where(
+            UserCommentLikeLink.username == "bob"
+        ),
+        "ix_usercommentlikelink_username",
+    ),
+    "permission lookup": (
+        select(
+            Role.role_type,
+            Permission.resource_type,
+            Permission.resource_id,
+            Permission.action,
+        )
+        .outerjoin(Permission, Permission.role_id == Role.role_id)
+        .where(Role.role_id == "role"),
+        "ix_permission_role_resource_action",
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def migrated_db(tmp_path_factory):
+    """A SQLite database built by the migrations rather than create_all"""
+    url = f"sqlite:///{tmp_path_factory.mktemp('migrations')}/app.db"
+    migrate(url)
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+def test_hot_query_uses_index(migrated_db, name):
+    query, index = HOT_QUERIES[name]
+    sql = query.compile(
+        dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    with migrated_db.connect() as connection:
+        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()
+    details = [row[-1] for row in plan]
+    assert any(index in detail for detail in details), details
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import select
+
+from app.db.models import User
+from app.services import last_login
+from app.services.last_login import flush_last_logins, record_activity
+
+pytestmark = pytest.mark.anyio
+
+LONG_AGO = datetime(2000, 1, 1)
+
+
+@pytest.fixture(autouse=True)
+def no_pending_activity():
+    last_login._pending.clear()
+    yield
+    last_login._pending.clear()
+
+
+async def stored_last_login(db_session, username: str) -> datetime:
+    result = await db_session.exec(
+        select(User.last_login).where(User.username == username)
+    )
+    return result.one()
+
+
+@pytest.fixture
+async def idle_user(db_session, user) -> User:
+    user.last_login = LONG_AGO
+    await db_session.commit()
+    return user
+
+
+async def test_requests_only_queue_last_login(
+    db_session, idle_user, client, statements
+):
+    before = datetime.utcnow()
+    for _ in range(3):
+        assert (await client.get("/me")).status_code == 200
+    assert not any(s.lstrip().startswith("UPDATE") for s in statements)
+    assert await stored_last_login(db_session, "bob") == LONG_AGO
+    assert last_login._pending["bob"] >= before
+
+
+async def test_a_flush_writes_every_queued_user_at_once(
+    db_session, idle_user, other_client, statements
+):
+    await other_client.get("/me")
+    record_activity("bob")
+    queued = dict(last_login._pending)
+
+    statements.clear()
+    await flush_last_logins()
+    assert [s.split()[0] for s in statements] == ["UPDATE"]
+    assert last_login._pending == {}
+    for username in ("bob", "alice"):
+        last_seen = await stored_last_login(db_session, username)
+        assert last_seen == queued[username]
+
+    statements.clear()
+    await flush_last_logins()
+    assert statements == []
+
+
+async def test_deleted_users_do_not_block_a_flush(db_session, idle_user):
+    record_activity("ghost")
+    record_activity("bob")
+    await flush_last_logins()
+    assert last_login._pending == {}
+    assert await stored_last_login(db_session, "bob") > LONG_AGO
+
+
+async def test_deleting_an_account_forgets_its_activity(other_client):
+    await other_client.get("/me")
+    assert "alice" in last_login._pending
+    assert (await other_client.delete("/account/delete")).status_code == 200
+    assert "alice" not in last_login._pending
+
+
+async def test_an_unreachable_database_keeps_the_batch_queued(
+    db_session, idle_user, monkeypatch, tmp_path
+):
+    record_activity("bob")
+    queued = last_login._pending["bob"]
+    unreachable = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path}/missing/app.db"
+    )
+    monkeypatch.setattr(last_login, "engine", unreachable)
+    with pytest.raises(OperationalError):
+        await flush_last_logins()
+    assert last_login._pending == {"bob": queued}
+    await unreachable.dispose()
+
+    monkeypatch.undo()
+    await flush_last_logins()
+    assert await stored_last_login(db_session, "bob") == queued
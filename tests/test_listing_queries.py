@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import (
+    Comment,
+    Media,
+    Post,
+    PostBody,
+    PostMedia,
+    PostTag,
+    UserPostLikeLink,
+)
+from app.services import post_cache
+
+pytestmark = pytest.mark.anyio
+
+PAGE_SIZES = (1, 10, 100)
+LISTINGS = ["/posts", "/posts?tags=t0", "/bob/posts"]
+
+
+@pytest.fixture
+async def posts(db_session, user):
+    """Enough posts for the largest page, each with tags, media, a like
+    and a comment, so that any per-post lazy load would show"""
+    tags = [PostTag(name=f"t{i}") for i in range(3)]
+    start = datetime(2026, 1, 1)
+    post_ids = []
+    for i in range(max(PAGE_SIZES) + 1):
+        created_at = start + timedelta(minutes=i)
+        post = Post(
+            author_username=user.username,
+            created_at=created_at,
+            last_modified=created_at,
+            title=f"Post {i}",
+            description="A post",
+            published=True,
+            tags=tags,
+            body=PostBody(content="Hello"),
+        )
+        media = Media(
+            name="cover.png",
+            media_type="image/png",
+            description="cover.png",
+            uploader_username=user.username,
+        )
+        db_session.add_all(
+            [
+                post,
+                media,
+                PostMedia(
+                    media_id=media.media_id,
+                    post_id=post.post_id,
+                    cover_image=True,
+                ),
+                UserPostLikeLink(post_id=post.post_id, username=user.username),
+                Comment(
+                    post_id=post.post_id,
+                    author_username=user.username,
+                    created_at=created_at,
+                    last_modified=created_at,
+                    content="Nice",
+                ),
+            ]
+        )
+        post_ids.append(post.post_id)
+    await db_session.commit()
+    return post_ids
+
+
+@pytest.mark.parametrize("listing", LISTINGS)
+async def test_statement_count_does_not_grow_with_page_size(
+    client, posts, statements, listing
+):
+    # Resolves and caches the session user, which is not what is measured
+    await client.get("/posts", params={"limit": 1})
+
+    counts = []
+    for limit in PAGE_SIZES:
+        # Measure cold loads, not the post cache
+        await post_cache.invalidate_posts(posts)
+        await post_cache.invalidate_pages()
+        statements.clear()
+        separator = "&" if "?" in listing else "?"
+        response = await client.get(f"{listing}{separator}limit={limit}")
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts.append(len(statements))
+
+    assert counts == [counts[0]] * len(PAGE_SIZES), counts
+
+
+@pytest.mark.parametrize(
+    "listing", ["/posts", "/posts?tags=t0", "/tags/t0/posts", "/bob/posts"]
+)
+async def test_not_modified_pages_load_no_posts(
+    client, posts, statements, listing
+):
+    response = await client.get(listing)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    await post_cache.invalidate_posts(posts)
+    statements.clear()
+    response = await client.get(listing, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    loaded = " ".join(statements).lower()
+    for table in ("postbody", "posttaglink", "postmedia", "comment"):
+        assert f"from {table}" not in loaded, table
@@ -0,0 +1,148 @@
+import hashlib
+import os
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.app import app
+from app.db.models import Blob
+from app.db.setup import engine, get_db_session
+from app.storage.storage import blob_path
+from app.storage.upload import UPLOAD_DIR
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = b"a file only bob has uploaded"
+SHA256 = hashlib.sha256(CONTENT).hexdigest()
+
+
+async def upload(client, content: bytes = CONTENT):
+    return await client.post(
+        "/media",
+        data={"media_type": "text/plain"},
+        files={"file": ("notes.txt", content, "text/plain")},
+    )
+
+
+async def test_uploader_can_reuse_their_blob(client):
+    assert (await upload(client)).status_code == 200
+
+    response = await client.get(f"/media/blobs/{SHA256}")
+    assert response.status_code == 200
+    assert response.json() == {"sha256": SHA256, "size": len(CONTENT)}
+
+    response = await client.post(
+        f"/media/blobs/{SHA256}",
+        data={"name": "copy.txt", "media_type": "text/plain"},
+    )
+    assert response.status_code == 200
+    assert (await client.get(response.json()["url"][3:])).content == CONTENT
+
+
+async def test_hash_does_not_reveal_another_users_blob(client, other_client):
+    assert (await upload(client)).status_code == 200
+
+    response = await other_client.get(f"/media/blobs/{SHA256}")
+    assert response.status_code == 404
+    response = await other_client.post(
+        f"/media/blobs/{SHA256}",
+        data={"name": "stolen.txt", "media_type": "text/plain"},
+    )
+    assert response.status_code == 404
+
+
+async def test_uploading_the_same_content_is_still_allowed(
+    client, other_client
+):
+    assert (await upload(client)).status_code == 200
+    response = await upload(other_client)
+    assert response.status_code == 200
+    assert (
+        await other_client.get(f"/media/blobs/{SHA256}")
+    ).status_code == 200
+
+
+async def ref_count(db_session, sha256: str = SHA256):
+    """The blob's reference count, or None once it is collected"""
+    return (
+        await db_session.exec(
+            select(Blob.ref_count).where(Blob.sha256 == sha256)
+        )
+    ).one_or_none()
+
+
+async def test_media_with_the_same_content_share_one_blob(
+    client, other_client, db_session
+):
+    assert (await upload(client)).status_code == 200
+    assert (await upload(client)).status_code == 200
+    assert (await upload(other_client)).status_code == 200
+    response = await client.post(
+        f"/media/blobs/{SHA256}",
+        data={"name": "copy.txt", "media_type": "text/plain"},
+    )
+    assert response.status_code == 200
+
+    assert await ref_count(db_session) == 4
+    with open(blob_path(SHA256), "rb") as file:
+        assert file.read() == CONTENT
+    assert os.listdir(UPLOAD_DIR) == []
+
+
+async def test_blobs_are_collected_with_their_last_reference(
+    client, other_client, db_session
+):
+    await upload(client)
+    await upload(client)
+    await upload(other_client)
+
+    response = await client.delete("/account/delete")
+    assert response.status_code == 200
+    assert await ref_count(db_session) == 1
+    assert os.path.exists(blob_path(SHA256))
+
+    response = await other_client.delete("/account/delete")
+    assert response.status_code == 200
+    assert await ref_count(db_session) is None
+    assert not os.path.exists(blob_path(SHA256))
+
+
+async def test_collected_content_can_be_uploaded_again(
+    client, other_client, db_session
+):
+    await upload(other_client)
+    await other_client.delete("/account/delete")
+
+    response = await upload(client)
+    assert response.status_code == 200
+    assert await ref_count(db_session) == 1
+    assert (await client.get(response.json()["url"][3:])).content == CONTENT
+
+
+@pytest.fixture
+def failing_commit():
+    """Makes the routes' database sessions fail to commit"""
+
+    async def get_failing_session():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+
+            async def commit():
+                raise OperationalError("COMMIT", {}, Exception("disk full"))
+
+            session.commit = commit
+            yield session
+
+    app.dependency_overrides[get_db_session] = get_failing_session
+    yield
+    del app.dependency_overrides[get_db_session]
+
+
+async def test_failed_commit_leaves_no_file_behind(client, failing_commit):
+    content = b"an upload whose transaction never commits"
+    with pytest.raises(OperationalError):
+        await upload(client, content)
+
+    assert not os.path.exists(blob_path(hashlib.sha256(content).hexdigest()))
+    assert os.listdir(UPLOAD_DIR) == []
@@ -0,0 +1,178 @@
+import email
+
+import pytest
+
+from app.storage.response import MAX_RANGES, PATHSEND, MediaFileResponse
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = bytes(range(256)) * 1024
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    path = tmp_path / "track.mp3"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+async def serve(path: str, method="GET", headers=(), extensions=None):
+    """Runs a MediaFileResponse and returns the ASGI messages it sent"""
+    scope = {
+        "type": "http",
+        "method": method,
+        "headers": [
+            (name.lower().encode(), value.encode()) for name, value in headers
+        ],
+        "extensions": extensions or {},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await MediaFileResponse(path, media_type="audio/mpeg")(
+        scope, receive, send
+    )
+    return messages
+
+
+def body_of(messages) -> bytes:
+    return b"".join(
+        message["body"]
+        for message in messages
+        if message["type"] == "http.response.body"
+    )
+
+
+async def test_files_are_streamed_in_chunks(path):
+    messages = await serve(path)
+    assert messages[0]["status"] == 200
+    chunks = [message["body"] for message in messages[1:] if message["body"]]
+    assert len(chunks) == len(CONTENT) // MediaFileResponse.chunk_size
+    assert all(len(chunk) <= MediaFileResponse.chunk_size for chunk in chunks)
+    assert body_of(messages) == CONTENT
+
+
+async def test_whole_files_go_to_pathsend_when_offered(path):
+    messages = await serve(path, extensions={PATHSEND: {}})
+    assert [message["type"] for message in messages] == [
+        "http.response.start",
+        PATHSEND,
+    ]
+    assert messages[1]["path"] == path
+
+
+async def test_head_sends_no_body(path):
+    messages = await serve(path, method="HEAD")
+    headers = dict(messages[0]["headers"])
+    assert headers[b"content-length"] == str(len(CONTENT)).encode()
+    assert body_of(messages) == b""
+
+
+@pytest.fixture
+async def media_url(client) -> str:
+    response = await client.post(
+        "/media",
+        data={"media_type": "audio/mpeg"},
+        files={"file": ("track.mp3", CONTENT, "audio/mpeg")},
+    )
+    assert response.status_code == 200
+    return response.json()["url"].removeprefix("/v1")
+
+
+@pytest.mark.parametrize(
+    "http_range, start, end",
+    [
+        ("bytes=0-99", 0, 100),
+        ("bytes=100-", 100, len(CONTENT)),
+        ("bytes=-10", len(CONTENT) - 10, len(CONTENT)),
+        ("bytes=1000-99999999", 1000, len(CONTENT)),
+        # Overlapping and adjacent ranges are sent as one
+        ("bytes=0-9, 5-19, 20-29", 0, 30),
+    ],
+)
+async def test_a_range_gets_206_with_its_bytes(
+    client, media_url, http_range, start, end
+):
+    response = await client.get(media_url, headers={"Range": http_range})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == (
+        f"bytes {start}-{end - 1}/{len(CONTENT)}"
+    )
+    assert response.headers["Content-Length"] == str(end - start)
+    assert response.content == CONTENT[start:end]
+
+
+async def test_several_ranges_get_a_multipart_body(client, media_url):
+    response = await client.get(
+        media_url, headers={"Range": "bytes=500-599,0-9,-5"}
+    )
+    assert response.status_code == 206
+    content_type = response.headers["Content-Type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    assert response.headers["Content-Length"] == str(len(response.content))
+
+    message = email.message_from_bytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + response.content
+    )
+    parts = [
+        (part["Content-Range"], part.get_payload(decode=True))
+        for part in message.get_payload()
+    ]
+    size = len(CONTENT)
+    assert parts == [
+        (f"bytes 0-9/{size}", CONTENT[:10]),
+        (f"bytes 500-599/{size}", CONTENT[500:600]),
+        (f"bytes {size - 5}-{size - 1}/{size}", CONTENT[-5:]),
+    ]
+    assert {part.get_content_type() for part in message.get_payload()} == {
+        "audio/mpeg"
+    }
+
+
+@pytest.mark.parametrize(
+    "http_range", [f"bytes={len(CONTENT)}-", "bytes=99999999-", "bytes=-0"]
+)
+async def test_ranges_past_the_end_get_416(client, media_url, http_range):
+    response = await client.get(media_url, headers={"Range": http_range})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+@pytest.mark.parametrize(
+    "http_range",
+    [
+        "items=0-9",
+        "bytes=abc",
+        "bytes=9-0",
+        "bytes=-",
+        "bytes="
+        + ",".join(f"{i * 10}-{i * 10}" for i in range(MAX_RANGES + 1)),
+    ],
+)
+async def test_unusable_ranges_get_the_whole_file(
+    client, media_url, http_range
+):
+    response = await client.get(media_url, headers={"Range": http_range})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_if_range_falls_back_to_the_whole_file(client, media_url):
+    etag = (await client.get(media_url)).headers["ETag"]
+
+    response = await client.get(
+        media_url, headers={"Range": "bytes=0-9", "If-Range": etag}
+    )
+    assert response.status_code == 206
+    assert response.content == CONTENT[:10]
+
+    response = await client.get(
+        media_url, headers={"Range": "bytes=0-9", "If-Range": '"changed"'}
+    )
+    assert response.status_code == 200
+    assert response.content == CONTENT
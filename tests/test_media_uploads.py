@@ -0,0 +1,159 @@
+import os
+
+import pytest
+
+from app.storage import upload
+from app.storage.upload import UPLOAD_DIR
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = "frontier"
+
+
+def form(*parts: tuple[str, str | None, bytes], end: bool = True) -> bytes:
+    """A multipart/form-data body of (name, filename, value) parts"""
+    body = b""
+    for name, filename, value in parts:
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        body += (
+            (
+                f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n\r\n"
+            ).encode()
+            + value
+            + b"\r\n"
+        )
+    if end:
+        body += f"--{BOUNDARY}--\r\n".encode()
+    return body
+
+
+async def post_form(client, body: bytes, content_type: str | None = None):
+    return await client.post(
+        "/media",
+        content=body,
+        headers={
+            "Content-Type": content_type
+            or f"multipart/form-data; boundary={BOUNDARY}"
+        },
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_uploads():
+    yield
+    assert os.listdir(UPLOAD_DIR) == []
+
+
+@pytest.fixture
+def small_image_limit(monkeypatch):
+    monkeypatch.setitem(upload.MEDIA_SIZE_LIMITS, "image", 1000)
+
+
+async def test_a_file_within_its_limit_is_stored(client, small_image_limit):
+    response = await post_form(
+        client,
+        form(
+            ("media_type", None, b"image/png"), ("file", "a.png", b"x" * 1000)
+        ),
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("media_type_first", [True, False])
+async def test_a_file_over_its_limit_gets_413(
+    client, small_image_limit, media_type_first
+):
+    parts = [
+        ("media_type", None, b"image/png"),
+        ("file", "a.png", b"x" * 1001),
+    ]
+    if not media_type_first:
+        parts.reverse()
+    response = await post_form(client, form(*parts))
+    assert response.status_code == 413
+
+
+async def test_a_body_over_every_limit_is_refused_up_front(
+    client, monkeypatch
+):
+    monkeypatch.setattr(upload, "MAX_UPLOAD_SIZE", 1000)
+    response = await post_form(
+        client, b"x" * (1000 + upload.FORM_OVERHEAD + 1)
+    )
+    assert response.status_code == 413
+
+
+async def test_a_nearly_full_disk_gets_507(client, monkeypatch):
+    monkeypatch.setattr(upload, "MEDIA_MIN_FREE_SPACE", 2**62)
+    response = await post_form(
+        client,
+        form(("media_type", None, b"text/plain"), ("file", "a.txt", b"x")),
+    )
+    assert response.status_code == 507
+
+
+@pytest.mark.parametrize(
+    "body, content_type, detail",
+    [
+        (
+            b"media_type=text/plain",
+            "application/x-www-form-urlencoded",
+            "Expected a multipart/form-data upload.",
+        ),
+        (b"", "multipart/form-data", "Expected a multipart/form-data upload."),
+        (
+            form(
+                ("media_type", None, b"text/plain"),
+                ("file", "a.txt", b"x"),
+                end=False,
+            )[:-10],
+            None,
+            "Truncated multipart/form-data body.",
+        ),
+        (
+            b"--frontier\r\nnot a header line\r\n\r\n",
+            None,
+            "Malformed multipart/form-data body.",
+        ),
+        (
+            form(("media_type", None, b"text/plain")),
+            None,
+            "A file is required.",
+        ),
+        (
+            form(("file", "a.txt", b"x"), ("file", "b.txt", b"y")),
+            None,
+            "Only one file can be uploaded at a time.",
+        ),
+        (
+            form(("media_type", None, b"x" * 2000), ("file", "a.txt", b"x")),
+            None,
+            "Form field media_type is too long.",
+        ),
+        (
+            form(("media_type", None, b"text/plain"), ("file", "a.txt", b"")),
+            None,
+            "File size is required",
+        ),
+        (
+            form(("media_type", None, b"text/x-unknown"), ("file", "a", b"x")),
+            None,
+            "A valid media_type is required",
+        ),
+        (
+            form(
+                ("media_type", None, b"text/plain"),
+                ("protected", None, b"maybe"),
+                ("file", "a.txt", b"x"),
+            ),
+            None,
+            "protected must be a boolean",
+        ),
+    ],
+)
+async def test_malformed_uploads_get_400(client, body, content_type, detail):
+    response = await post_form(client, body, content_type)
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
@@ -0,0 +1,125 @@
+import io
+import subprocess
+import sys
+
+import pytest
+from conftest import ROOT
+from PIL import Image
+
+from app.storage.variants import VARIANT_SIZES, shutdown_variant_pool
+
+pytestmark = pytest.mark.anyio
+
+
+def test_variant_workers_do_not_load_the_app():
+    # What a spawned worker imports to unpickle its job
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, imaging.resize; "
+            "print(*(name for name in sys.modules "
+            "if name.split('.')[0] == 'app'))",
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert loaded == []
+
+
+@pytest.fixture
+def variant_pool():
+    yield
+    shutdown_variant_pool()
+
+
+def png(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(output, "PNG")
+    return output.getvalue()
+
+
+async def upload(client, content: bytes, media_type="image/png") -> str:
+    response = await client.post(
+        "/media",
+        data={"media_type": media_type},
+        files={"file": ("picture", content, media_type)},
+    )
+    assert response.status_code == 200
+    return response.json()["url"].removeprefix("/v1")
+
+
+def size_of(response) -> tuple[int, int]:
+    with Image.open(io.BytesIO(response.content)) as image:
+        return image.size
+
+
+@pytest.mark.parametrize(
+    "params, size",
+    [
+        ("w=320", (320, 256)),
+        ("h=160", (200, 160)),
+        ("w=640&h=64", (80, 64)),
+        ("w=160&h=160&fit=cover", (160, 160)),
+        # Images are never enlarged
+        ("w=1280", (500, 400)),
+        ("w=640&h=640&fit=cover", (400, 400)),
+    ],
+)
+async def test_allowed_sizes_are_resized(client, variant_pool, params, size):
+    url = await upload(client, png(500, 400))
+    response = await client.get(f"{url}?{params}")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "image/png"
+    assert size_of(response) == size
+
+
+async def test_variants_are_cached_on_disk(client, variant_pool):
+    url = await upload(client, png(500, 400))
+    first = await client.get(f"{url}?w=64")
+    cached = await client.get(f"{url}?w=64")
+    assert cached.headers["ETag"] == first.headers["ETag"]
+    assert cached.content == first.content
+
+
+@pytest.mark.parametrize(
+    "params, detail",
+    [
+        ("w=321", f"Sizes must be one of {VARIANT_SIZES}"),
+        ("w=64&h=99999", f"Sizes must be one of {VARIANT_SIZES}"),
+        ("w=0", f"Sizes must be one of {VARIANT_SIZES}"),
+        ("w=160&fit=cover", "fit=cover needs both w and h"),
+    ],
+)
+async def test_other_sizes_are_refused(client, params, detail):
+    url = await upload(client, png(50, 40))
+    response = await client.get(f"{url}?{params}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": detail}
+
+
+async def test_only_images_are_resized(client):
+    url = await upload(client, b"plain text", "text/plain")
+    response = await client.get(f"{url}?w=64")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Only images can be resized"}
+
+
+@pytest.mark.parametrize(
+    "content, media_type",
+    [
+        (b"GIF89a not decoded", "image/gif"),
+        (b"<svg xmlns='http://www.w3.org/2000/svg'/>", "image/svg+xml"),
+        # Not an image after all: served as uploaded
+        (b"not a png", "image/png"),
+    ],
+)
+async def test_unresized_images_are_served_as_uploaded(
+    client, variant_pool, content, media_type
+):
+    url = await upload(client, content, media_type)
+    response = await client.get(f"{url}?w=64")
+    assert response.status_code == 200
+    assert response.content == content
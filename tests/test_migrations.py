@@ -0,0 +1,170 @@
+from uuid import uuid4
+
+import pytest
+from conftest import migrate
+from sqlalchemy import create_engine, inspect, text
+
+BEFORE_INDEXES = "e6b84071984e"
+INDEXES = "fb3437714d36"
+BEFORE_SEARCH_KEYS = "8f2b6d4e1a97"
+SEARCH_KEYS = "ca6ab97eb074"
+
+
+@pytest.fixture
+def database(tmp_path):
+    """A sync URL and engine for an empty SQLite database"""
+    url = f"sqlite:///{tmp_path}/app.db"
+    engine = create_engine(url)
+    yield url, engine
+    engine.dispose()
+
+
+def add_user(connection, username: str, email: str):
+    connection.execute(
+        text(
+            "INSERT INTO role (role_id, role_type) VALUES (:role_id, 'user')"
+        ),
+        {"role_id": username},
+    )
+    connection.execute(
+        text(
+            'INSERT INTO "user" (username, role_id, display_name, email, '
+            "hashed_password, last_login, account_verified) VALUES "
+            "(:username, :username, :username, :email, '', "
+            "'2026-01-01 00:00:00', 1)"
+        ),
+        {"username": username, "email": email},
+    )
+
+
+def add_post(connection, author: str) -> str:
+    post_id = uuid4().hex
+    connection.execute(
+        text(
+            "INSERT INTO post (post_id, author_username, created_at, "
+            "last_modified, modified, title, description, content, "
+            "published) VALUES (:post_id, :author, '2026-01-01 00:00:00', "
+            "'2026-01-01 00:00:00', 0, 'Title', '', '', 1)"
+        ),
+        {"post_id": post_id, "author": author},
+    )
+    return post_id
+
+
+def add_tag(connection, name: str, post_ids: list[str]) -> str:
+    tag_id = uuid4().hex
+    connection.execute(
+        text("INSERT INTO posttag (tag_id, name) VALUES (:tag_id, :name)"),
+        {"tag_id": tag_id, "name": name},
+    )
+    for post_id in post_ids:
+        connection.execute(
+            text(
+                "INSERT INTO posttaglink (post_id, tag_id) "
+                "VALUES (:post_id, :tag_id)"
+            ),
+            {"post_id": post_id, "tag_id": tag_id},
+        )
+    return tag_id
+
+
+def test_duplicate_tags_are_merged_before_the_unique_index(database):
+    url, engine = database
+    migrate(url, BEFORE_INDEXES)
+    with engine.begin() as connection:
+        add_user(connection, "bob", "bob@example.com")
+        first, second = (
+            add_post(connection, "bob"),
+            add_post(connection, "bob"),
+        )
+        add_tag(connection, "python", [first, second])
+        add_tag(connection, "python", [first])
+        add_tag(connection, "python", [])
+        add_tag(connection, "sql", [second])
+
+    migrate(url, INDEXES)
+
+    with engine.connect() as connection:
+        tags = connection.execute(
+            text("SELECT tag_id, name FROM posttag ORDER BY name")
+        ).all()
+        assert [name for _, name in tags] == ["python", "sql"]
+        links = connection.execute(
+            text(
+                "SELECT post_id, name FROM posttaglink "
+                "JOIN posttag USING (tag_id) ORDER BY name"
+            )
+        ).all()
+    assert sorted(links) == sorted(
+        [(first, "python"), (second, "python"), (second, "sql")]
+    )
+    unique = {
+        index["name"]
+        for index in inspect(engine).get_indexes("posttag")
+        if index["unique"]
+    }
+    assert "ix_posttag_name" in unique
+
+
+def test_duplicate_emails_stop_the_upgrade(database):
+    url, engine = database
+    migrate(url, BEFORE_INDEXES)
+    with engine.begin() as connection:
+        add_user(connection, "bob", "shared@example.com")
+        add_user(connection, "robert", "shared@example.com")
+
+    with pytest.raises(RuntimeError, match="shared@example.com"):
+        migrate(url, INDEXES)
+
+    with engine.connect() as connection:
+        version = connection.execute(
+            text("SELECT version_num FROM alembic_version")
+        ).scalar_one()
+    assert version == BEFORE_INDEXES
+    assert "ix_user_email" not in {
+        index["name"] for index in inspect(engine).get_indexes("user")
+    }
+
+
+def test_search_rows_are_rekeyed_and_restored(database):
+    url, engine = database
+    migrate(url, BEFORE_SEARCH_KEYS)
+    with engine.begin() as connection:
+        add_user(connection, "bob", "bob@example.com")
+        post_id = uuid4()
+        connection.execute(
+            text(
+                "INSERT INTO post (post_id, author_username, created_at, "
+                "last_modified, modified, title, description, published, "
+                "like_count, comment_count) VALUES (:post_id, 'bob', "
+                "'2026-01-01 00:00:00', '2026-01-01 00:00:00', 0, "
+                "'Espresso', '', 1, 0, 0)"
+            ),
+            {"post_id": post_id.hex},
+        )
+        connection.execute(
+            text(
+                "INSERT INTO postbody (post_id, content) "
+                "VALUES (:post_id, 'Brewing notes')"
+            ),
+            {"post_id": post_id.hex},
+        )
+
+    migrate(url, SEARCH_KEYS)
+    with engine.connect() as connection:
+        [(_, indexed)] = connection.execute(
+            text(
+                "SELECT search_rowid, post_search.post_id FROM post_search_key "
+                "JOIN post_search ON post_search.rowid = search_rowid "
+                "WHERE post_search MATCH 'brewing'"
+            )
+        ).all()
+    assert indexed == post_id.hex
+
+    migrate(url, BEFORE_SEARCH_KEYS, downgrade=True)
+    with engine.connect() as connection:
+        [(rowid, indexed)] = connection.execute(
+            text("SELECT rowid, post_id FROM post_search")
+        ).all()
+    assert (rowid, indexed) == (post_id.int >> 65, post_id.hex)
+    assert "post_search_key" not in inspect(engine).get_table_names()
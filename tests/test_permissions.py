@@ -0,0 +1,242 @@
+from uuid import uuid4
+
+import pytest
+from conftest import create_user, log_in
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Permission, Role, User
+from app.security.permission import (
+    ACTION_CRUD,
+    ACTION_UPDATE,
+    POST_RESOURCE,
+    create_global_permission,
+    create_permission,
+    get_role_permissions,
+    has_global_permission,
+    has_permission,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def post_id(client) -> str:
+    response = await client.post(
+        "/posts",
+        json={"title": "Mine", "description": "", "content": "Hello"},
+    )
+    assert response.status_code == 200
+    return response.json()["post_id"]
+
+
+@pytest.fixture
+async def comment_id(client, post_id) -> str:
+    response = await client.post(
+        "/comments", json={"post_id": post_id, "content": "First"}
+    )
+    assert response.status_code == 200
+    return response.json()["comment_id"]
+
+
+async def grant(db_session, username: str, post_id: str, action: str):
+    user = await db_session.get(User, username)
+    await create_permission(
+        user.role_id, db_session, POST_RESOURCE, post_id, action
+    )
+
+
+async def test_writing_posts_and_comments_stores_no_permissions(
+    db_session, client, post_id, comment_id
+):
+    await client.put(f"/posts/{post_id}", json={"title": "Still mine"})
+    count = await db_session.exec(select(func.count(Permission.permission_id)))
+    assert count.one() == 0
+
+
+async def test_owners_edit_and_delete_their_own(client, post_id, comment_id):
+    response = await client.put(
+        f"/comments/{comment_id}", json={"content": "Edited"}
+    )
+    assert response.status_code == 200
+    assert (await client.delete(f"/comments/{comment_id}")).status_code == 200
+    response = await client.put(f"/posts/{post_id}", json={"title": "New"})
+    assert response.status_code == 200
+    assert (await client.delete(f"/posts/{post_id}")).status_code == 200
+
+
+async def test_others_cannot_touch_them(
+    client, other_client, post_id, comment_id
+):
+    media_id = uuid4().hex
+    for response, detail in [
+        (await other_client.get(f"/posts/{post_id}"), "Post not available."),
+        (
+            await other_client.put(f"/posts/{post_id}", json={"title": "X"}),
+            "Not authorized to update this post",
+        ),
+        (
+            await other_client.post(
+                f"/posts/{post_id}/media",
+                data={"media_id": media_id, "description": ""},
+            ),
+            "Not authorized to update this post",
+        ),
+        (
+            await other_client.delete(f"/posts/{post_id}/media/{media_id}"),
+            "Not authorized to update this post",
+        ),
+        (
+            await other_client.delete(f"/posts/{post_id}"),
+            "Not authorized to delete this post",
+        ),
+        (
+            await other_client.put(
+                f"/comments/{comment_id}", json={"content": "X"}
+            ),
+            "Not authorized to update this comment",
+        ),
+        (
+            await other_client.delete(f"/comments/{comment_id}"),
+            "Not authorized to delete this comment",
+        ),
+    ]:
+        assert response.status_code == 403
+        assert response.json() == {"detail": detail}
+    assert (await client.get(f"/posts/{post_id}")).json()["title"] == "Mine"
+
+
+async def test_granted_actions_are_allowed_to_others(
+    db_session, other_client, post_id
+):
+    await grant(db_session, "alice", post_id, ACTION_UPDATE)
+    response = await other_client.put(
+        f"/posts/{post_id}", json={"title": "Edited by alice"}
+    )
+    assert response.status_code == 200
+    assert (await other_client.delete(f"/posts/{post_id}")).status_code == 403
+
+    await grant(db_session, "alice", post_id, ACTION_CRUD)
+    assert (await other_client.delete(f"/posts/{post_id}")).status_code == 200
+
+
+async def test_admins_can_delete_anything(db_session, post_id, comment_id):
+    admin = await create_user(db_session, "carol")
+    role = await db_session.get(Role, admin.role_id)
+    role.role_type = "admin"
+    await db_session.commit()
+
+    async with await log_in(db_session, admin) as client:
+        response = await client.delete(f"/comments/{comment_id}")
+        assert response.status_code == 200
+        assert (await client.delete(f"/posts/{post_id}")).status_code == 200
+
+
+async def test_permissions_are_stored_as_structured_rows(db_session, user):
+    await create_permission(
+        user.role_id, db_session, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+    )
+    await create_global_permission(
+        user.role_id, db_session, POST_RESOURCE, ACTION_CRUD
+    )
+    rows = await db_session.exec(
+        select(
+            Permission.resource_type,
+            Permission.resource_id,
+            Permission.action,
+        ).order_by(Permission.resource_id)
+    )
+    assert rows.all() == [
+        (POST_RESOURCE, "", ACTION_CRUD),
+        (POST_RESOURCE, "1" * 32, ACTION_UPDATE),
+    ]
+
+
+async def test_global_and_resource_grants_are_distinct(db_session, user):
+    await create_global_permission(
+        user.role_id, db_session, POST_RESOURCE, ACTION_UPDATE
+    )
+    assert await has_global_permission(
+        db_session, user.role_id, None, POST_RESOURCE, ACTION_UPDATE
+    )
+    assert not await has_permission(
+        db_session, user.role_id, None, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+    )
+
+
+@pytest.mark.parametrize("fresh_session", [False, True])
+async def test_duplicate_permissions_get_409(db_session, user, fresh_session):
+    await create_permission(
+        user.role_id, db_session, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+    )
+    await create_global_permission(
+        user.role_id, db_session, POST_RESOURCE, ACTION_UPDATE
+    )
+    session = (
+        AsyncSession(db_session.bind, expire_on_commit=False)
+        if fresh_session
+        else db_session
+    )
+    with pytest.raises(HTTPException) as error:
+        await create_permission(
+            user.role_id, session, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+        )
+    assert error.value.status_code == 409
+    with pytest.raises(HTTPException) as error:
+        await create_global_permission(
+            user.role_id, session, POST_RESOURCE, ACTION_UPDATE
+        )
+    assert error.value.status_code == 409
+    await session.close()
+
+
+async def test_the_database_refuses_duplicates(db_session, user):
+    for _ in range(2):
+        db_session.add(
+            Permission(
+                role_id=user.role_id,
+                resource_type=POST_RESOURCE,
+                resource_id="1" * 32,
+                action=ACTION_UPDATE,
+            )
+        )
+    with pytest.raises(IntegrityError):
+        await db_session.commit()
+    await db_session.rollback()
+
+
+async def test_role_permissions_load_once_per_session(
+    db_session, user, statements
+):
+    await create_permission(
+        user.role_id, db_session, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+    )
+    session = AsyncSession(db_session.bind, expire_on_commit=False)
+    statements.clear()
+    for _ in range(3):
+        assert await has_permission(
+            session, user.role_id, None, POST_RESOURCE, "1" * 32, ACTION_UPDATE
+        )
+        assert not await has_permission(
+            session, user.role_id, None, POST_RESOURCE, "2" * 32, ACTION_UPDATE
+        )
+    assert len(statements) == 1
+    await session.close()
+
+
+async def test_deleting_a_post_revokes_its_permissions(
+    db_session, client, other_client, post_id
+):
+    await grant(db_session, "alice", post_id, ACTION_UPDATE)
+    await grant(db_session, "bob", post_id, ACTION_CRUD)
+    assert (await client.delete(f"/posts/{post_id}")).status_code == 200
+
+    db_session.info.clear()
+    count = await db_session.exec(select(func.count(Permission.permission_id)))
+    assert count.one() == 0
+    alice = await db_session.get(User, "alice")
+    assert (await get_role_permissions(db_session, alice.role_id)).grants == (
+        set()
+    )
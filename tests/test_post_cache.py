@@ -0,0 +1,111 @@
+import pytest
+
+from app.dto.post_dto import PostDTO
+from app.services import post_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_post(client, **fields) -> dict:
+    response = await client.post(
+        "/posts",
+        json={
+            "title": "Cached",
+            "description": "",
+            "content": "Hello",
+            "published": True,
+            **fields,
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def read(client, url: str):
+    response = await client.get(url)
+    assert response.status_code == 200
+    return response.json()
+
+
+def listed(page: list) -> dict:
+    return {post["post_id"]: post for post in page}
+
+
+async def test_reads_are_served_from_the_cache(client, statements):
+    post_id = (await create_post(client))["post_id"]
+    await read(client, f"/posts/{post_id}")
+    await read(client, "/posts")
+
+    statements.clear()
+    await read(client, f"/posts/{post_id}")
+    await read(client, "/posts?fields=title")
+    # Only the listing's ETag reads the database, from the version columns
+    [statement] = statements
+    assert " ".join(statement.split()).startswith(
+        "SELECT post.post_id, post.last_modified, post.like_count, "
+        "post.comment_count FROM post "
+    )
+
+
+async def test_post_writes_show_on_the_next_read(client, other_client):
+    post_id = (await create_post(client, tags=["a"]))["post_id"]
+    url = f"/posts/{post_id}"
+    await read(client, url)
+    await read(client, "/posts")
+
+    await client.put(url, json={"content": "*Edited*", "tags": ["b"]})
+    post = await read(client, url)
+    assert post["content_html"] == "<p><em>Edited</em></p>\n"
+    assert [tag["name"] for tag in post["tags"]] == ["b"]
+    assert [
+        tag["name"]
+        for tag in listed(await read(client, "/posts"))[post_id]["tags"]
+    ] == ["b"]
+    assert await read(client, "/tags/a/posts") == []
+
+    await other_client.post(f"{url}/like")
+    assert (await read(client, url))["like_count"] == 1
+    assert listed(await read(client, "/posts"))[post_id]["like_count"] == 1
+    await other_client.delete(f"{url}/like")
+    assert (await read(client, url))["like_count"] == 0
+
+    response = await other_client.post(
+        "/comments", json={"post_id": post_id, "content": "Nice"}
+    )
+    comment_id = response.json()["comment_id"]
+    assert (await read(client, url))["comments_count"] == 1
+    await other_client.delete(f"/comments/{comment_id}")
+    assert (await read(client, url))["comments_count"] == 0
+
+
+async def test_listings_follow_posts_appearing_and_disappearing(client):
+    first = (await create_post(client))["post_id"]
+    assert list(listed(await read(client, "/posts"))) == [first]
+
+    second = (await create_post(client))["post_id"]
+    assert list(listed(await read(client, "/posts"))) == [second, first]
+
+    await client.put(f"/posts/{second}", json={"published": False})
+    assert list(listed(await read(client, "/posts"))) == [first]
+
+    await client.delete(f"/posts/{first}")
+    assert await read(client, "/posts") == []
+    response = await client.get(f"/posts/{first}")
+    assert response.status_code == 404
+
+
+async def test_a_load_racing_a_write_is_not_cached(client):
+    post = PostDTO.model_validate(await create_post(client))
+
+    async def load_during_write():
+        # The post is written to while this load is running
+        await post_cache.invalidate_post(post.post_id)
+        return post
+
+    async def load():
+        return post
+
+    assert await post_cache.get_post(post.post_id, load_during_write) == post
+    assert await post_cache.get_cached_post(post.post_id) is None
+    await post_cache.get_post(post.post_id, load)
+    assert await post_cache.get_cached_post(post.post_id) == post
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models import Post, PostBody
+from app.db.setup import engine
+from app.services.render import (
+    RENDER_VERSION,
+    render_post,
+    render_stale_posts,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def unrendered_post(db_session, user) -> Post:
+    """A post as the rendered body migration leaves it"""
+    post = Post(
+        author_username=user.username,
+        created_at=datetime(2026, 1, 1),
+        last_modified=datetime(2026, 1, 1),
+        title="Old post",
+        description="Written before bodies were rendered",
+        published=True,
+        body=PostBody(content="# Hello\n\nSome *old* words."),
+    )
+    db_session.add(post)
+    await db_session.commit()
+    return post
+
+
+async def stored_body(db_session, post: Post) -> PostBody:
+    await db_session.refresh(post.body)
+    return post.body
+
+
+async def test_reading_a_post_renders_its_body(
+    client, db_session, unrendered_post
+):
+    response = await client.get(f"/posts/{unrendered_post.post_id}")
+    assert response.status_code == 200
+    post = response.json()
+    assert "<em>old</em>" in post["content_html"]
+    assert post["excerpt"] == "Some old words."
+    assert post["toc"] == [{"level": 1, "title": "Hello", "anchor": "hello"}]
+
+    body = await stored_body(db_session, unrendered_post)
+    assert body.render_version == RENDER_VERSION
+    assert "<em>old</em>" in body.content_html
+
+
+async def test_listing_body_fields_renders_them(
+    client, db_session, unrendered_post
+):
+    response = await client.get("/posts", params={"fields": "content_html"})
+    assert response.status_code == 200
+    [post] = response.json()
+    assert "<em>old</em>" in post["content_html"]
+
+    body = await stored_body(db_session, unrendered_post)
+    assert body.render_version == RENDER_VERSION
+
+
+async def test_an_edit_made_meanwhile_is_not_overwritten(
+    db_session, unrendered_post
+):
+    # Another request loaded the post before its author rewrote it
+    async with AsyncSession(engine, expire_on_commit=False) as other:
+        stale = await other.get(Post, unrendered_post.post_id)
+        await other.refresh(stale, ["body"])
+
+        unrendered_post.body.content = "New words"
+        render_post(unrendered_post)
+        await db_session.commit()
+
+        await render_stale_posts(other, [stale])
+
+    body = await stored_body(db_session, unrendered_post)
+    assert body.content == "New words"
+    assert "New words" in body.content_html
@@ -0,0 +1,90 @@
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+
+from app.db.models import Post, PostBody
+from app.db.search import index_post, search_post_ids, unindex_post
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_posts_with_similar_ids_are_indexed_apart(db_session, user):
+    # The top 63 bits match, which once gave both posts the same FTS rowid
+    first, second = (
+        Post(
+            post_id=UUID(int=(0xC0FFEE << 65) | low),
+            author_username=user.username,
+            created_at=datetime(2026, 1, 1),
+            last_modified=datetime(2026, 1, 1),
+            title=title,
+            description="",
+            published=True,
+            body=PostBody(content="Brewing notes"),
+        )
+        for low, title in ((1, "Espresso"), (2, "Filter"))
+    )
+    db_session.add_all([first, second])
+    await index_post(db_session, first)
+    await index_post(db_session, second)
+    await db_session.commit()
+
+    assert await search_post_ids(db_session, "espresso", 0, 10) == [
+        first.post_id
+    ]
+    assert set(await search_post_ids(db_session, "brewing", 0, 10)) == {
+        first.post_id,
+        second.post_id,
+    }
+
+    await unindex_post(db_session, first.post_id)
+    await db_session.commit()
+    assert await search_post_ids(db_session, "brewing", 0, 10) == [
+        second.post_id
+    ]
+
+
+async def search(client, query: str) -> list:
+    response = await client.get("/posts/search", params={"q": query})
+    assert response.status_code == 200
+    return [post["post_id"] for post in response.json()]
+
+
+async def test_search_follows_post_writes(client):
+    response = await client.post(
+        "/posts",
+        json={
+            "title": "Espresso",
+            "description": "Brewing notes",
+            "content": "Grind finer",
+            "published": True,
+        },
+    )
+    post_id = response.json()["post_id"]
+    draft = await client.post(
+        "/posts",
+        json={"title": "Espresso draft", "description": "", "content": ""},
+    )
+    assert await search(client, "espresso") == [post_id]
+    assert await search(client, "grind") == [post_id]
+
+    await client.put(f"/posts/{post_id}", json={"content": "Tamp harder"})
+    assert await search(client, "grind") == []
+    assert await search(client, "tamp") == [post_id]
+
+    await client.put(f"/posts/{post_id}", json={"published": False})
+    assert await search(client, "espresso") == []
+    await client.put(
+        f"/posts/{draft.json()['post_id']}", json={"published": True}
+    )
+    assert await search(client, "espresso") == [draft.json()["post_id"]]
+
+    await client.put(f"/posts/{post_id}", json={"published": True})
+    await client.delete(f"/posts/{post_id}")
+    assert await search(client, "tamp") == []
+
+
+async def test_search_queries_are_not_fts_syntax(client):
+    for query in ['"', "title:x", "a OR", "*", "NEAR(a b)"]:
+        response = await client.get("/posts/search", params={"q": query})
+        assert response.status_code == 200
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import anyio
+import pytest
+
+from app.db.models import LoginSession
+from app.security.session_cache import session_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def me(client):
+    response = await client.get("/me")
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_a_logged_in_user_is_resolved_once(client, statements):
+    await me(client)
+    assert any("FROM loginsession" in s for s in statements)
+
+    statements.clear()
+    for _ in range(3):
+        assert (await me(client))["username"] == "bob"
+    assert statements == []
+
+
+async def test_profile_changes_show_on_the_next_request(client):
+    await me(client)
+    response = await client.put(
+        "/me/bio", params={"bio": "Writes about caching"}
+    )
+    assert response.status_code == 200
+    assert (await me(client))["bio"] == "Writes about caching"
+
+
+async def test_a_logged_out_session_is_refused(client):
+    session_id = client.cookies["session"]
+    await me(client)
+    assert (await client.post("/auth/logout")).status_code == 200
+    assert session_cache.get(session_id) is None
+    client.cookies.set("session", session_id)
+    response = await client.get("/me")
+    assert response.status_code == 401
+
+
+async def test_a_deleted_user_is_refused(client):
+    session_id = client.cookies["session"]
+    await me(client)
+    assert (await client.delete("/account/delete")).status_code == 200
+    assert session_cache.get(session_id) is None
+    client.cookies.set("session", session_id)
+    response = await client.get("/me")
+    assert response.status_code == 401
+
+
+async def test_the_cache_never_outlives_the_login_session(db_session, client):
+    session_id = client.cookies["session"]
+    await me(client)
+    login_session = await db_session.get(LoginSession, session_id)
+    login_session.expires_at = datetime.utcnow() + timedelta(seconds=0.2)
+    await db_session.commit()
+    session_cache.delete(session_id)
+
+    await me(client)
+    assert session_cache.get(session_id) is not None
+    await anyio.sleep(0.3)
+    assert session_cache.get(session_id) is None
+    response = await client.get("/me")
+    assert response.status_code == 401